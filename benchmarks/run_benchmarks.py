@@ -0,0 +1,219 @@
+""" Benchmark suite
+
+Times the main computational paths over parametrized problem sizes:
+    + steady_state : batched EIT steady states vs number of detunings
+    + liouvillian  : Liouvillian assembly and solve vs Hilbert dimension
+    + doppler      : Doppler-averaged spectra vs velocity nodes per panel
+    + transitions  : transition enumeration and indexing vs nmax / lmax
+    + arc_bound    : energies, dipoles and C6 terms through the ARC cache
+Each case reports the best wall time over the repeats, a per-phase
+breakdown and the peak traced memory (from a separate traced run).
+The ARC-bound case runs offline against benchmarks/synthetic_atom.py
+and a throwaway cache database.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--preset quick|full] [--only NAME ...]
+                                        [--save FILE] [--compare FILE]
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+# Append parent to path for resolving imports in adjacent folders
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fns.fns_liouvillian import liouvillian
+from fns.fns_steady_state import steady_state, sweep_rho
+from fns.fns_doppler import doppler_quadrature, doppler_rho_ge
+from fns.fns_transitions import dipole_transitions
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from classes.classes_arc_cache import CachedAtom
+from classes.classes_rydberg_mb import StateTable
+from classes.classes_spectral_index import SpectralIndex
+from benchmarks.synthetic_atom import SyntheticAtom
+
+gamma_eg = 2. * np.pi * 5.2     # rad/us
+gamma_re = 2. * np.pi * .01     # rad/us
+
+
+class PhaseTimer:
+
+    def __init__(self):
+        """ Accumulates wall time per named phase of a benchmark case. """
+        self.phases = {}
+
+    @contextmanager
+    def __call__(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.) + time.perf_counter() - start
+
+
+def bench_steady_state(phase, n_detune):
+    with phase('compile'):
+        model = AffineLiouvillian.ladder(gamma_eg, gamma_re)
+    delta_p = 2. * np.pi * np.linspace(-80., 80., n_detune)
+    with phase('solve'):
+        sweep_rho(model, (1, 0), delta_p=delta_p, delta_c=0., omega_p=2. * np.pi * .5,
+                  omega_c=2. * np.pi * 10.)
+
+
+def bench_liouvillian(phase, dim, batch=256):
+    rng = np.random.default_rng(0)
+    h = rng.normal(size=(batch, dim, dim)) + 1j * rng.normal(size=(batch, dim, dim))
+    h = h + np.conj(np.swapaxes(h, -1, -2))
+    c_ops = [np.sqrt(rng.uniform()) * np.eye(dim, k=-k) for k in range(1, dim)]
+    with phase('assemble'):
+        liouv = liouvillian(h, c_ops)
+    with phase('solve'):
+        steady_state(liouv)
+
+
+def bench_doppler(phase, n_panel, n_detune=200):
+    delta_p = 2. * np.pi * np.linspace(-80., 80., n_detune)
+    with phase('quadrature'):
+        doppler_quadrature(delta_p, 0., gamma_eg, gamma_re, 298., n_panel=n_panel)
+    with phase('solve'):
+        doppler_rho_ge(delta_p, 0., 2. * np.pi * .5, 2. * np.pi * 10., gamma_eg, gamma_re, 298.,
+                       n_panel=n_panel)
+
+
+def bench_transitions(phase, nmax, lmax):
+    atom = SyntheticAtom()
+    with phase('enumerate'):
+        trans = dipole_transitions(6, nmax, lmax)
+    with phase('index'):
+        states = StateTable.from_range(6, nmax, lmax)
+        levels, level_ids = states.levels()
+        ids_a, ids_b = states.transition_ids(trans)
+    with phase('energies'):
+        energies = np.array([atom.getEnergy(*lvl) for lvl in levels])
+        delta = energies[level_ids[ids_b]] - energies[level_ids[ids_a]]
+    with phase('spectral_index'):
+        index = SpectralIndex(delta * 2.418e8, ids_a, ids_b)
+        index.nearest(3.52e8 * np.ones(1000), k=5)
+
+
+def bench_arc_bound(phase, nmax, eval_cost=2000):
+    states = [(n, l, j) for n in range(6, nmax + 1) for l in range(min(n, 3))
+              for j in (l - .5, l + .5) if j > 0]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench_cache.sqlite')
+        for label in ('cold', 'warm'):
+            with phase(label):
+                cs = CachedAtom('Caesium', path=path, atom=SyntheticAtom(eval_cost))
+                for s in states:
+                    cs.getEnergy(*s)
+                    cs.getStateLifetime(*s)
+                for s, t in zip(states[:-1], states[1:]):
+                    cs.getDipoleMatrixElement(*s, .5, *t, .5, 0)
+                for s in states[::4]:
+                    cs.getC6term(*s, *s, *s)
+                cs.flush()
+
+
+# name -> (function, {preset: list of size keyword sets})
+cases = {
+    'steady_state' : (bench_steady_state, {
+        'quick' : [dict(n_detune=n) for n in (100, 1000)],
+        'full' : [dict(n_detune=n) for n in (100, 1000, 10000, 100000)]}),
+    'liouvillian' : (bench_liouvillian, {
+        'quick' : [dict(dim=d) for d in (3, 6)],
+        'full' : [dict(dim=d) for d in (3, 6, 10, 16)]}),
+    'doppler' : (bench_doppler, {
+        'quick' : [dict(n_panel=p) for p in (4, 8)],
+        'full' : [dict(n_panel=p) for p in (4, 8, 16)]}),
+    'transitions' : (bench_transitions, {
+        'quick' : [dict(nmax=30, lmax=1), dict(nmax=70, lmax=1)],
+        'full' : [dict(nmax=nmax, lmax=lmax) for nmax in (30, 70, 120) for lmax in (1, 3)]}),
+    'arc_bound' : (bench_arc_bound, {
+        'quick' : [dict(nmax=30)],
+        'full' : [dict(nmax=30), dict(nmax=70)]}),
+}
+
+
+def case_id(name: str, sizes: dict) -> str:
+    return name + '[' + ','.join(f'{k}={v}' for k, v in sizes.items()) + ']'
+
+
+def run_case(fn, sizes: dict, repeats: int) -> dict:
+    """
+    Run one benchmark case.
+
+    Args:
+        fn (callable): Benchmark function fn(phase, **sizes).
+        sizes (dict): Problem-size keyword arguments.
+        repeats (int): Number of timed runs; the fastest is reported.
+
+    Returns:
+        dict: 'wall_s', 'phases' (seconds per phase of the fastest run)
+              and 'peak_mb' (peak traced allocation).
+    """
+    best = None
+    for _ in range(repeats):
+        timer = PhaseTimer()
+        start = time.perf_counter()
+        fn(timer, **sizes)
+        wall = time.perf_counter() - start
+        if best is None or wall < best[0] : best = (wall, timer.phases)
+
+    tracemalloc.start()
+    fn(PhaseTimer(), **sizes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'wall_s' : best[0], 'phases' : best[1], 'peak_mb' : peak / 2. ** 20}
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """ Print the wall-time ratio of every case present in the baseline. """
+    print(f"\n{'case':<44}{'baseline (s)':>14}{'now (s)':>12}{'ratio':>9}")
+    for key, res in results.items():
+        if key not in baseline : continue
+        ratio = res['wall_s'] / baseline[key]['wall_s']
+        flag = '  SLOWER' if ratio > 1. + tolerance else ('  faster' if ratio < 1. - tolerance else '')
+        print(f"{key:<44}{baseline[key]['wall_s']:>14.4f}{res['wall_s']:>12.4f}{ratio:>9.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rydberg Maxwell-Bloch benchmark suite')
+    parser.add_argument('--preset', choices=('quick', 'full'), default='quick')
+    parser.add_argument('--only', nargs='*', choices=tuple(cases), help='cases to run')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--save', help='write results as a JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to compare against')
+    parser.add_argument('--tolerance', type=float, default=.2,
+                        help='relative change reported as slower/faster')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or cases:
+        fn, presets = cases[name]
+        for sizes in presets[args.preset]:
+            key = case_id(name, sizes)
+            res = run_case(fn, sizes, args.repeats)
+            results[key] = res
+            phases = '  '.join(f'{k}={v:.4f}' for k, v in res['phases'].items())
+            print(f"{key:<44}{res['wall_s']:>10.4f} s{res['peak_mb']:>10.1f} MB   {phases}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)['results'], args.tolerance)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'preset' : args.preset, 'numpy' : np.__version__,
+                       'results' : results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
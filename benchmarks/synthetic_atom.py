@@ -0,0 +1,57 @@
+""" Synthetic atom
+
+Offline stand-in for the ARC Caesium atom used by the benchmarks.
+Energies follow the Rydberg formula with the Cs quantum defects and the
+remaining quantities follow their n* scaling laws, so table sizes, value
+ranges and call patterns resemble the real ones without touching the
+ARC database. The numbers are not meant for physics.
+
+"""
+
+import numpy as np
+
+# Caesium quantum defects by (l, j); l >= 3 taken as hydrogenic
+quantum_defects = {(0, .5): 4.0493, (1, .5): 3.5916, (1, 1.5): 3.5590,
+                   (2, 1.5): 2.4754, (2, 2.5): 2.4663}
+rydberg_ev = 13.6057
+
+
+class SyntheticAtom:
+
+    def __init__(self, eval_cost: int = 0):
+        """
+        Synthetic Caesium atom exposing the ARC methods wrapped by CachedAtom.
+
+        Args:
+            eval_cost (int): Length of a dummy computation performed on every
+                             call, to mimic the cost of an ARC evaluation.
+        """
+        self.eval_cost = eval_cost
+        self.n_calls = 0
+
+    def _work(self):
+        self.n_calls += 1
+        if self.eval_cost : np.sin(np.arange(self.eval_cost)).sum()
+
+    @staticmethod
+    def n_star(n, l, j) -> float:
+        return n - quantum_defects.get((l, j), .0334 if l == 3 else 0.)
+
+    def getEnergy(self, n, l, j, s=.5):
+        self._work()
+        return -rydberg_ev / self.n_star(n, l, j) ** 2
+
+    def getDipoleMatrixElement(self, n1, l1, j1, mj1, n2, l2, j2, mj2, q, s=.5):
+        self._work()
+        if abs(l1 - l2) != 1 or abs(j1 - j2) > 1 or mj2 - mj1 != q : return 0.
+        ns1, ns2 = self.n_star(n1, l1, j1), self.n_star(n2, l2, j2)
+        return .5 * (ns1 ** 2 + ns2 ** 2) / (1. + abs(ns1 - ns2)) ** 1.5 * (1. - .1 * abs(mj1))
+
+    def getStateLifetime(self, n, l, j, temperature=0, includeLevelsUpTo=0, s=.5):
+        self._work()
+        return 1.1e-9 * self.n_star(n, l, j) ** 3
+
+    def getC6term(self, n, l, j, n1, l1, j1, n2, l2, j2, s=.5):
+        self._work()
+        ns, ns1, ns2 = self.n_star(n, l, j), self.n_star(n1, l1, j1), self.n_star(n2, l2, j2)
+        return 1e-10 * ns ** 4 * ns1 ** 2 * ns2 ** 2 / (1e-3 + abs(2. / ns ** 2 - 1. / ns1 ** 2 - 1. / ns2 ** 2))
@@ -0,0 +1,127 @@
+import numpy as np
+
+from fns.fns_liouvillian import (spre, spost, lindblad_dissipator, liouvillian,
+                                 projector, ladder_collapse_ops)
+
+
+class AffineLiouvillian:
+
+    def __init__(self, base: np.ndarray, components: dict):
+        """
+        A Liouvillian compiled into its affine parameter dependence,
+        L = L0 + sum_k p_k L_k.
+
+        The component superoperators are assembled once; evaluating the model
+        at new parameter values is a single contraction of the parameter
+        vector with the stacked components, optionally into a preallocated
+        buffer, with no operator algebra. apply() gives L x directly for
+        batched state vectors without forming L at all.
+
+        """
+        self.base = np.asarray(base, dtype=complex)
+        self.names = tuple(components)
+        self.components = np.stack([np.asarray(components[k], dtype=complex) for k in self.names]) \
+            if self.names else np.zeros((0,) + self.base.shape, dtype=complex)
+        self.dim = int(round(np.sqrt(self.base.shape[-1])))
+
+    @classmethod
+    def from_operators(cls, h0: np.ndarray, h_components: dict, c_ops=(), rate_components: dict = None):
+        """
+        Compile a model with Hamiltonian H = H0 + sum_k p_k H_k and
+        dissipators sum_c D[c] + sum_k p_k D[c_k].
+
+        Args:
+            h0 (np.ndarray): Parameter-independent Hamiltonian (n, n).
+            h_components (dict): Parameter name -> Hamiltonian component H_k.
+            c_ops (iterable): Fixed collapse operators, rates absorbed.
+            rate_components (dict): Parameter name -> unit collapse operator c_k,
+                                    whose dissipator is scaled by the (rate)
+                                    parameter p_k.
+
+        Returns:
+            AffineLiouvillian
+        """
+        components = {k: -1j * (spre(h) - spost(h)) for k, h in h_components.items()}
+        for k, c_op in (rate_components or {}).items():
+            components[k] = lindblad_dissipator(c_op)
+        return cls(liouvillian(h0, c_ops), components)
+
+    @classmethod
+    def ladder(cls, gamma_eg: float, gamma_re: float, complex_probe: bool = False,
+               linewidths: bool = False):
+        """
+        The g-e-r ladder of exercises/eit_plots.py (see ladder_hamiltonian),
+        with parameters delta_p, delta_c, omega_p and omega_c (rad/us).
+
+        With complex_probe, the probe coupling is (Omega_p |e><g| + h.c.)/2 for
+        complex Omega_p = omega_p + i omega_p_im, as needed once the probe
+        acquires a phase during propagation.
+
+        With linewidths, Lorentzian laser linewidths (FWHM, rad/us) enter as
+        the rate parameters linewidth_p and linewidth_c of the dephasing
+        operators |e><e| + |r><r| (the probe phase is carried by both excited
+        states) and |r><r|. This is the phase-diffusion limit of white
+        frequency noise; it damps rho_eg by linewidth_p / 2 and rho_rg by
+        (linewidth_p + linewidth_c) / 2, leaving rho_re untouched by the
+        probe.
+        """
+        p_e, p_r = projector(3, 1), projector(3, 2)
+        h_components = {
+            'delta_p' : -p_e - p_r,
+            'delta_c' : -p_r,
+            'omega_p' : .5 * (projector(3, 0, 1) + projector(3, 1, 0)),
+            'omega_c' : .5 * (projector(3, 1, 2) + projector(3, 2, 1))}
+        if complex_probe:
+            h_components['omega_p_im'] = .5j * (projector(3, 1, 0) - projector(3, 0, 1))
+        rate_components = {'linewidth_p' : p_e + p_r, 'linewidth_c' : p_r} if linewidths else None
+        return cls.from_operators(np.zeros((3, 3)), h_components,
+                                  ladder_collapse_ops(gamma_eg, gamma_re), rate_components)
+
+    def _param_matrix(self, params: dict) -> np.ndarray:
+        unknown = set(params) - set(self.names)
+        if unknown : raise ValueError(f"Unknown model parameters: {sorted(unknown)}")
+        values = np.broadcast_arrays(*(np.asarray(params.get(k, 0.)) for k in self.names))
+        return np.stack(values, axis=-1) if values else np.zeros((0,))
+
+    def evaluate(self, out: np.ndarray = None, **params) -> np.ndarray:
+        """
+        Evaluate L = L0 + sum_k p_k L_k for a batch of parameter values.
+
+        Args:
+            out (np.ndarray): Optional complex buffer of shape (..., n**2, n**2)
+                              to write into, avoiding any allocation.
+            **params: Parameter values (scalars or arrays, broadcast against
+                      each other); omitted parameters are zero.
+
+        Returns:
+            np.ndarray: Liouvillians of shape (..., n**2, n**2).
+        """
+        coeffs = self._param_matrix(params)
+        if out is None:
+            out = np.empty(coeffs.shape[:-1] + self.base.shape, dtype=complex)
+        np.einsum('...k,kij->...ij', coeffs, self.components, out=out)
+        out += self.base
+        return out
+
+    def apply(self, x: np.ndarray, **params) -> np.ndarray:
+        """
+        Action L x on a batch of column-stacked density matrices, without
+        forming the batch of Liouvillians.
+
+        Args:
+            x (np.ndarray): State vectors of shape (..., n**2).
+            **params: Parameter values broadcastable against x[..., 0].
+
+        Returns:
+            np.ndarray: L x, of shape (..., n**2).
+        """
+        unknown = set(params) - set(self.names)
+        if unknown : raise ValueError(f"Unknown model parameters: {sorted(unknown)}")
+        out = x @ self.base.T
+        for k, comp in zip(self.names, self.components):
+            if k in params : out += np.asarray(params[k])[..., None] * (x @ comp.T)
+        return out
+
+    def component(self, name: str) -> np.ndarray:
+        """ The superoperator L_k multiplying parameter name. """
+        return self.components[self.names.index(name)]
@@ -0,0 +1,183 @@
+import atexit
+import json
+import os
+import sqlite3
+import time
+
+from fns.fns_instrument import count, stage
+
+
+def default_cache_path() -> str:
+    """
+    Location of the ARC cache database, overridable via RYDBERG_MB_CACHE.
+    """
+    return os.environ.get('RYDBERG_MB_CACHE', os.path.join(
+        os.path.expanduser('~'), '.cache', 'rydberg_mb', 'arc_cache.sqlite'))
+
+
+class CachedAtom:
+
+    schema_version = 1
+
+    def __init__(self, species: str = 'Caesium', path: str = None, max_entries: int = 2000000,
+                 atom=None):
+        """
+        An ARC atom whose energies, dipole matrix elements, lifetimes and
+        C6 terms are cached persistently in a SQLite table.
+
+        Results are keyed by species, method name and the full argument list
+        (quantum numbers, polarization, temperature, ...). The table is read
+        lazily into memory on the first lookup, new results are written back
+        on flush() (and at interpreter exit), and the least recently used
+        rows are evicted once the table exceeds max_entries. The table is
+        discarded whenever the schema or the installed ARC version changes.
+        The ARC atom itself is only constructed upon the first cache miss,
+        unless an atom-like object is passed in (e.g. recorded or synthetic
+        data for offline benchmarks).
+
+        """
+        self.species = species
+        self.path = path if path is not None else default_cache_path()
+        self.max_entries = max_entries
+        self._atom = atom
+        self._values = None
+        self._pending = {}
+        self._used = set()
+        atexit.register(self.flush)
+
+    @property
+    def atom(self):
+        """ The underlying ARC atom, constructed on first access. """
+        if self._atom is None:
+            import arc
+            self._atom = getattr(arc, self.species)()
+        return self._atom
+
+    def __getattr__(self, name):
+        # Anything not cached falls through to the ARC atom itself
+        if name.startswith('_') : raise AttributeError(name)
+        return getattr(self.atom, name)
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=60.)
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        version = json.dumps([self.schema_version, self._arc_version()])
+        row = conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != version:
+            conn.execute('DROP TABLE IF EXISTS arc_cache')
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        conn.execute('CREATE TABLE IF NOT EXISTS arc_cache ('
+                     'species TEXT, key TEXT, value, last_used REAL, PRIMARY KEY (species, key))')
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _arc_version() -> str:
+        try:
+            from importlib.metadata import version
+            return version('ARC-Alkali-Rydberg-Calculator')
+        except Exception:
+            return 'unknown'
+
+    def _load(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT key, value FROM arc_cache WHERE species = ?',
+                                (self.species,)).fetchall()
+        finally:
+            conn.close()
+        # NULL values are NaNs stored before these were serialized; they are recomputed
+        self._values = {key: self._decode(value) for key, value in rows if value is not None}
+
+    @staticmethod
+    def _encode(value):
+        # SQLite stores a float NaN as NULL, so tuples and NaN are stored as JSON text
+        return json.dumps(value) if isinstance(value, tuple) or value != value else value
+
+    @staticmethod
+    def _decode(value):
+        if not isinstance(value, str) : return value
+        value = json.loads(value)
+        return tuple(value) if isinstance(value, list) else value
+
+    def call(self, method: str, *args):
+        """
+        Evaluate atom.<method>(*args), consulting the cache first.
+
+        Args:
+            method (str): Name of the ARC atom method.
+            *args: Positional arguments of the method; all must be numeric.
+
+        Returns:
+            float or tuple: The (possibly cached) result.
+        """
+        if self._values is None : self._load()
+        key = method + json.dumps([float(a) for a in args])
+        value = self._values.get(key)
+        if key not in self._values:
+            count('arc_cache.miss')
+            with stage('arc.' + method):
+                value = getattr(self.atom, method)(*args)
+            value = tuple(float(v) for v in value) if isinstance(value, tuple) else float(value)
+            self._values[key] = value
+            self._pending[key] = value
+        else : count('arc_cache.hit')
+        self._used.add(key)
+        return value
+
+    def getEnergy(self, n, l, j, s=.5):
+        return self.call('getEnergy', n, l, j, s)
+
+    def getDipoleMatrixElement(self, n1, l1, j1, mj1, n2, l2, j2, mj2, q, s=.5):
+        return self.call('getDipoleMatrixElement', n1, l1, j1, mj1, n2, l2, j2, mj2, q, s)
+
+    def getStateLifetime(self, n, l, j, temperature=0, includeLevelsUpTo=0, s=.5):
+        return self.call('getStateLifetime', n, l, j, temperature, includeLevelsUpTo, s)
+
+    def getC6term(self, n, l, j, n1, l1, j1, n2, l2, j2, s=.5):
+        return self.call('getC6term', n, l, j, n1, l1, j1, n2, l2, j2, s)
+
+    def flush(self):
+        """
+        Write newly computed values to disk, refresh the access times of
+        used entries and evict the least recently used rows.
+        """
+        if not self._pending and not self._used : return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany(
+                'INSERT OR REPLACE INTO arc_cache VALUES (?, ?, ?, ?)',
+                [(self.species, key, self._encode(value), now) for key, value in self._pending.items()])
+            conn.executemany(
+                'UPDATE arc_cache SET last_used = ? WHERE species = ? AND key = ?',
+                [(now, self.species, key) for key in self._used if key not in self._pending])
+            n_rows = conn.execute('SELECT COUNT(*) FROM arc_cache').fetchone()[0]
+            if n_rows > self.max_entries:
+                conn.execute('DELETE FROM arc_cache WHERE rowid IN (SELECT rowid FROM arc_cache '
+                             'ORDER BY last_used LIMIT ?)', (n_rows - self.max_entries,))
+            conn.commit()
+        finally:
+            conn.close()
+        self._pending.clear()
+        self._used.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+_shared_atoms = {}
+
+
+def shared_atom(species: str = 'Caesium') -> CachedAtom:
+    """
+    Process-wide CachedAtom for a species, created on first request, so that
+    all commands and scripts in one run share a single in-memory cache and
+    at most one ARC atom.
+    """
+    if species not in _shared_atoms : _shared_atoms[species] = CachedAtom(species)
+    return _shared_atoms[species]
@@ -0,0 +1,92 @@
+import numpy as np
+
+from fns.fns_c6 import c6_dtype, load_c6_table
+
+
+class C6Table:
+
+    def __init__(self, table: np.ndarray):
+        """
+        Indexed, interpolating view of a C6 table (see fns_c6.c6_table).
+
+        Rows are grouped by (l, j, mj, phi) into dense (n, theta) grids once,
+        after which a lookup is a binary search plus an interpolation. Along
+        n the interpolation is log-log, following the C6 ~ n**11 scaling,
+        wherever neighbouring values share their sign, and linear across sign
+        changes (near Forster resonances); along theta it is linear.
+
+        """
+        self.table = np.asarray(table, dtype=c6_dtype)
+        self._grids = {}
+        keys = np.stack([self.table[k] for k in ('l', 'j', 'mj', 'phi')], axis=1) \
+            if len(self.table) else np.zeros((0, 4))
+        for key in np.unique(keys, axis=0):
+            rows = self.table[np.all(keys == key, axis=1)]
+            n_grid, n_idx = np.unique(rows['n'], return_inverse=True)
+            t_grid, t_idx = np.unique(rows['theta'], return_inverse=True)
+            values = np.full((n_grid.shape[0], t_grid.shape[0]), np.nan)
+            values[n_idx, t_idx] = rows['c6']
+            self._grids[(int(key[0]), float(key[1]), float(key[2]), float(key[3]))] = (n_grid, t_grid, values)
+
+    @classmethod
+    def load(cls, path: str):
+        """ Table read from a file written by save_c6_table. """
+        return cls(load_c6_table(path))
+
+    def __len__(self):
+        return len(self.table)
+
+    @staticmethod
+    def _interp_n(n, n_grid, values, extrapolate: bool) -> np.ndarray:
+        n = np.atleast_1d(np.asarray(n, dtype=float))
+        if n_grid.shape[0] == 1:
+            if not np.all(n == n_grid[0]) : raise ValueError("Single-n table cannot be interpolated")
+            return np.repeat(values[:1], n.shape[0], axis=0)
+        if not extrapolate and (n.min() < n_grid[0] or n.max() > n_grid[-1]):
+            raise ValueError(f"n outside the tabulated range {n_grid[0]} .. {n_grid[-1]}")
+        i = np.clip(np.searchsorted(n_grid, n) - 1, 0, n_grid.shape[0] - 2)
+        n0, n1 = n_grid[i], n_grid[i + 1]
+        v0, v1 = values[i], values[i + 1]
+        frac = ((n - n0) / (n1 - n0))[:, None]
+        log_frac = (np.log(n / n0) / np.log(n1 / n0))[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            same_sign = (v0 * v1) > 0.
+            loglog = np.sign(v0) * np.exp(np.log(np.abs(v0)) + log_frac * (np.log(np.abs(v1)) - np.log(np.abs(v0))))
+        return np.where(same_sign, loglog, v0 + frac * (v1 - v0))
+
+    def lookup(self, n, l: int, j: float, mj: float = None, theta: float = 0., phi: float = 0.,
+               extrapolate: bool = False):
+        """
+        C6 of the pair state |n l j mj; n l j mj> for one or more n.
+
+        Args:
+            n (int or np.ndarray): Principal quantum number(s), tabulated or not.
+            l (int): Orbital angular momentum.
+            j (float): Total angular momentum.
+            mj (float): Projection; defaults to the stretched state mj = j.
+            theta (float): Polar angle of the interatomic axis (rad).
+            phi (float): Azimuthal angle of the interatomic axis (rad); must be
+                         tabulated.
+            extrapolate (bool): Whether n outside the tabulated range is
+                                extrapolated log-log instead of raising.
+
+        Returns:
+            float or np.ndarray: C6 in GHz um^6, shaped as n.
+
+        Raises:
+            KeyError: If (l, j, mj, phi) is not tabulated.
+            ValueError: If n or theta lie outside the tabulated range.
+        """
+        key = (int(l), float(j), float(j if mj is None else mj), float(phi))
+        if key not in self._grids : raise KeyError(f"No C6 data tabulated for (l, j, mj, phi) = {key}")
+        n_grid, t_grid, values = self._grids[key]
+        along_n = self._interp_n(n, n_grid, values, extrapolate)
+
+        if t_grid.shape[0] == 1:
+            if theta != t_grid[0] : raise ValueError(f"Only theta = {t_grid[0]} is tabulated")
+            out = along_n[:, 0]
+        else:
+            if theta < t_grid[0] or theta > t_grid[-1]:
+                raise ValueError(f"theta outside the tabulated range {t_grid[0]} .. {t_grid[-1]}")
+            out = np.array([np.interp(theta, t_grid, row) for row in along_n])
+        return out.reshape(np.shape(n)) if np.ndim(n) else float(out[0])
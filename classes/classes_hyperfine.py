@@ -0,0 +1,235 @@
+import numpy as np
+import scipy.sparse as sps
+
+from fns.fns_angular import hyperfine_dipole_factor
+from fns.fns_rydberg_mb import parse_spec_state, build_state_str
+
+mu_b_mhz_gauss = 1.39962449     # Bohr magneton / h, MHz / G
+
+
+def _level_key(level) -> tuple:
+    """ (n, l, 2j) of a level given as (n, l, j) or a spectroscopic string. """
+    n, l, j = parse_spec_state(level)[:3] if isinstance(level, str) else level[:3]
+    return int(n), int(l), int(round(2. * j))
+
+
+class HyperfineBasis:
+
+    state_dtype = np.dtype([('n', np.int32), ('l', np.int32), ('j2', np.int32),
+                            ('f2', np.int32), ('mf2', np.int32)])
+
+    def __init__(self, states: np.ndarray, i_nuc: float = 3.5):
+        """
+        A table of hyperfine Zeeman sublevels |n l j F m_F> stored as a
+        structured array of integers (n, l, 2j, 2F, 2m_F), the row index being
+        the basis index, together with the operators needed for
+        optical-pumping models of many sublevels: laser couplings, spontaneous
+        decay (as collapse operators and as a rate matrix), and hyperfine and
+        Zeeman shifts.
+
+        All operators are assembled directly as scipy.sparse matrices from
+        the memoized angular factors of fns_angular, in units of the symmetric
+        reduced element <J||e r||J'> of the fine-structure transition, so
+        that the ARC data needed is one reduced element and one rate per
+        pair of levels. The nuclear spin defaults to that of 133Cs.
+
+        """
+        self.states = np.asarray(states, dtype=self.state_dtype)
+        self.i_nuc = i_nuc
+        self._index = {tuple(s): i for i, s in enumerate(self.states.tolist())}
+
+    @classmethod
+    def from_levels(cls, levels, i_nuc: float = 3.5, f_values: dict = None):
+        """
+        Basis of all sublevels of the given fine-structure levels, e.g.
+        HyperfineBasis.from_levels(['6s0.5', '6p1.5', '34d2.5']).
+
+        Args:
+            levels (iterable): Levels as (n, l, j) tuples or spectroscopic strings.
+            i_nuc (float): Nuclear spin.
+            f_values (dict): Optional level -> allowed F values, restricting
+                             that level to some of its hyperfine manifolds
+                             (e.g. the F' = 5 cycling manifold).
+
+        Returns:
+            HyperfineBasis
+        """
+        allowed = {_level_key(k): {int(round(2. * f)) for f in v} for k, v in (f_values or {}).items()}
+        i2 = int(round(2. * i_nuc))
+        rows = []
+        for level in levels:
+            n, l, j2 = _level_key(level)
+            for f2 in range(abs(j2 - i2), j2 + i2 + 1, 2):
+                if (n, l, j2) in allowed and f2 not in allowed[(n, l, j2)] : continue
+                rows += [(n, l, j2, f2, mf2) for mf2 in range(-f2, f2 + 1, 2)]
+        return cls(np.array(rows, dtype=cls.state_dtype), i_nuc)
+
+    def __len__(self):
+        return self.states.shape[0]
+
+    def __iter__(self):
+        """ Yields (n, l, j, F, m_F) tuples. """
+        for n, l, j2, f2, mf2 in self.states.tolist():
+            yield (n, l, j2 / 2., f2 / 2., mf2 / 2.)
+
+    @property
+    def j(self) -> np.ndarray:
+        return self.states['j2'] / 2.
+
+    @property
+    def f(self) -> np.ndarray:
+        return self.states['f2'] / 2.
+
+    @property
+    def mf(self) -> np.ndarray:
+        return self.states['mf2'] / 2.
+
+    def id_of(self, state: tuple) -> int:
+        """ Basis index of an (n, l, j, F, m_F) tuple; -1 if absent. """
+        n, l, j, f, mf = state
+        key = (int(n), int(l), int(round(2. * j)), int(round(2. * f)), int(round(2. * mf)))
+        return self._index.get(key, -1)
+
+    def ids(self, level, f: float = None) -> np.ndarray:
+        """ Basis indices of all sublevels of a level, or of one of its F manifolds. """
+        n, l, j2 = _level_key(level)
+        mask = (self.states['n'] == n) & (self.states['l'] == l) & (self.states['j2'] == j2)
+        if f is not None : mask &= self.states['f2'] == int(round(2. * f))
+        return np.nonzero(mask)[0]
+
+    def spec_strings(self) -> list:
+        """ Labels such as '6s0.5 F=4 mF=0' of each basis state. """
+        return [f'{build_state_str(n, l, j2 / 2.)} F={f2 / 2.:g} mF={mf2 / 2.:g}'
+                for n, l, j2, f2, mf2 in self.states.tolist()]
+
+    def dipole_operator(self, lower, upper, q: int) -> sps.csr_matrix:
+        """
+        Spherical dipole component driving lower -> upper with polarization
+        q, T_q = sum <b|e r|a> |b><a| over the sublevels a of lower and b of
+        upper with m_F(b) = m_F(a) + q, in units of <J_a||e r||J_b>.
+
+        Args:
+            lower: Lower level, (n, l, j) or spectroscopic string.
+            upper: Upper level.
+            q (int): Polarization (-1, 0, 1 for sigma-, pi, sigma+).
+
+        Returns:
+            scipy.sparse.csr_matrix: (N, N) matrix.
+        """
+        ids_a, ids_b = self.ids(lower), self.ids(upper)
+        by_f_mf = {(int(self.states['f2'][b]), int(self.states['mf2'][b])): b for b in ids_b}
+        f2_b = np.unique(self.states['f2'][ids_b]).tolist()
+        rows, cols, data = [], [], []
+        for a in ids_a:
+            _, _, j2_a, f2_a, mf2_a = self.states[a].tolist()
+            for f2 in f2_b:
+                b = by_f_mf.get((f2, mf2_a + 2 * q))
+                if b is None : continue
+                value = hyperfine_dipole_factor(j2_a / 2., f2_a / 2., mf2_a / 2., self.states['j2'][b] / 2.,
+                                                f2 / 2., mf2_a / 2. + q, q, self.i_nuc)
+                if value != 0.:
+                    rows.append(b)
+                    cols.append(a)
+                    data.append(value)
+        return sps.csr_matrix((data, (rows, cols)), shape=(len(self), len(self)))
+
+    def coupling(self, lower, upper, polarization=0) -> sps.csr_matrix:
+        """
+        Hamiltonian of a laser on the lower -> upper transition per unit
+        reduced Rabi frequency Omega = <J_a||e r||J_b> E / hbar (rad/us), in
+        the rotating-wave approximation,
+            H / Omega = (T + T^dagger) / 2,    T = sum_q eps_q T_q.
+
+        Args:
+            lower: Lower level.
+            upper: Upper level.
+            polarization (int or dict): q for a pure polarization, or
+                                        q -> complex amplitude eps_q of a
+                                        normalized polarization vector.
+
+        Returns:
+            scipy.sparse.csr_matrix: Hermitian (N, N) matrix.
+        """
+        if not isinstance(polarization, dict) : polarization = {polarization: 1.}
+        t_op = sum(amp * self.dipole_operator(lower, upper, q) for q, amp in polarization.items())
+        return (.5 * (t_op + t_op.conj().T)).tocsr()
+
+    def decay_operators(self, upper, lower, gamma: float) -> list:
+        """
+        Collapse operators of spontaneous decay upper -> lower with the total
+        rate gamma of the fine-structure channel, one per polarization,
+            C_q = sqrt(gamma (2J_b + 1)) T_q^dagger,
+        which conserve the Zeeman coherences transferred by the decay. The
+        normalization is the sum rule over all F manifolds of lower, so
+        lower should hold all of them for the trace to be conserved.
+
+        Args:
+            upper: Decaying level.
+            lower: Final level.
+            gamma (float): Decay rate of the channel (rad/us), e.g. from
+                           spontaneous_rates or the inverse lifetime times
+                           the branching ratio.
+
+        Returns:
+            list: Three sparse (N, N) collapse operators.
+        """
+        j2_b = _level_key(upper)[2]
+        scale = np.sqrt(gamma * (j2_b + 1.))
+        return [(scale * self.dipole_operator(lower, upper, q).conj().T).tocsr() for q in (-1, 0, 1)]
+
+    def decay_matrix(self, upper, lower, gamma: float) -> sps.csr_matrix:
+        """
+        Rates Gamma_ab from |b> in upper to |a> in lower (rad/us), the
+        population part of decay_operators, in the convention of
+        PartitionedBlochModel and fns_truncation.
+        """
+        return sum(abs(c).power(2) for c in self.decay_operators(upper, lower, gamma)).tocsr()
+
+    def hyperfine_shifts(self, coefficients) -> np.ndarray:
+        """
+        Hyperfine energy shift of every state,
+            A K / 2 + B (3 K (K + 1) / 2 - 2 I (I + 1) J (J + 1)) / (4 I (2I - 1) J (2J - 1)),
+        with K = F (F + 1) - I (I + 1) - J (J + 1).
+
+        Args:
+            coefficients: Atom with getHFSCoefficients(n, l, j) returning
+                          (A, B) in Hz (e.g. an ARC atom or CachedAtom), or a
+                          dict (n, l, j) -> (A, B) in MHz. Levels without
+                          data (e.g. Rydberg levels in ARC, whose splittings
+                          scale as n**-3) are left unshifted.
+
+        Returns:
+            np.ndarray: Shifts in MHz.
+        """
+        shifts = np.zeros(len(self))
+        i_nuc = self.i_nuc
+        for key in set(map(tuple, np.stack([self.states['n'], self.states['l'], self.states['j2']], axis=1))):
+            n, l, j2 = (int(k) for k in key)
+            j = j2 / 2.
+            if isinstance(coefficients, dict) : a_hfs, b_hfs = coefficients.get((n, l, j), (0., 0.))
+            else:
+                try:
+                    a_hfs, b_hfs = (1e-6 * c for c in coefficients.getHFSCoefficients(n, l, j))
+                except ValueError:
+                    a_hfs, b_hfs = 0., 0.
+            ids = self.ids((n, l, j))
+            f = self.f[ids]
+            k = f * (f + 1.) - i_nuc * (i_nuc + 1.) - j * (j + 1.)
+            shifts[ids] = .5 * a_hfs * k
+            if j > .5 and i_nuc > .5:
+                shifts[ids] += b_hfs * (1.5 * k * (k + 1.) - 2. * i_nuc * (i_nuc + 1.) * j * (j + 1.)) \
+                    / (4. * i_nuc * (2. * i_nuc - 1.) * j * (2. * j - 1.))
+        return shifts
+
+    def zeeman_shifts(self, b_gauss: float) -> np.ndarray:
+        """
+        Linear (weak-field) Zeeman shift g_F m_F mu_B B of every state in MHz,
+        with the Lande g_J (g_S = 2) and the nuclear moment neglected.
+        """
+        l, j, f = self.states['l'].astype(float), self.j, self.f
+        i_nuc = self.i_nuc
+        g_j = 1. + (j * (j + 1.) + .75 - l * (l + 1.)) / (2. * j * (j + 1.))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g_f = np.where(f > 0., g_j * (f * (f + 1.) - i_nuc * (i_nuc + 1.) + j * (j + 1.))
+                           / (2. * f * (f + 1.)), 0.)
+        return g_f * self.mf * mu_b_mhz_gauss * b_gauss
@@ -0,0 +1,176 @@
+import numpy as np
+
+from fns.fns_evolution import rk4_step
+from fns.fns_instrument import count, stage
+
+
+class RydbergMeanField:
+
+    def __init__(self, shape: tuple, spacing_um, c6_ghz_um6: float, r_cut_um: float,
+                 n_near: int = 2, n_sub: int = 6):
+        """
+        Mean-field van der Waals shift of the Rydberg level on a 3D grid of
+        cells,
+            V(x) = sum_y K(x - y) n(y) rho_rr(y),
+            K(r) = C6 / r**6 for r > r_cut, else 0,
+        with n the atomic density and rho_rr the Rydberg population per
+        cell. The cutoff excludes pairs closer than the blockade radius,
+        which are not doubly excited and whose shift the mean field cannot
+        describe.
+
+        The kernel is tabulated once over all cell offsets (averaged over
+        the source cell for the n_near nearest offsets, where C6 / r**6 varies
+        strongly within a cell) and Fourier transformed on the zero-padded
+        grid, such that each evaluation of V is a linear (non-periodic)
+        convolution by FFT in O(M log M) for M cells instead of O(M**2)
+        pairwise sums.
+
+        """
+        self.shape = tuple(int(s) for s in shape)
+        if len(self.shape) != 3 : raise ValueError("A 3D grid shape is required")
+        self.spacing_um = np.broadcast_to(np.asarray(spacing_um, dtype=float), (3,))
+        self.c6_ghz_um6 = c6_ghz_um6
+        self.r_cut_um = r_cut_um
+        self._padded = tuple(2 * s for s in self.shape)
+        with stage('mean_field.kernel'):
+            self._kernel_ft = np.fft.rfftn(self._kernel(n_near, n_sub), self._padded)
+
+    def _kernel(self, n_near: int, n_sub: int) -> np.ndarray:
+        # Offsets in cells, in FFT order on the padded grid
+        axes = [np.fft.fftfreq(p, 1. / p) for p in self._padded]
+        off = np.meshgrid(*axes, indexing='ij')
+        cell_volume = np.prod(self.spacing_um)
+
+        def inv_r6(r2):
+            with np.errstate(divide='ignore'):
+                return np.where(r2 > self.r_cut_um ** 2, 1. / r2 ** 3, 0.)
+
+        r2 = sum((o * d) ** 2 for o, d in zip(off, self.spacing_um))
+        kernel = inv_r6(r2)
+
+        # Source-cell average near the origin
+        sub = (np.arange(n_sub) + .5) / n_sub - .5
+        sub_off = np.stack(np.meshgrid(sub, sub, sub, indexing='ij'), axis=-1).reshape(-1, 3)
+        near = np.nonzero(np.all([np.abs(o) <= n_near for o in off], axis=0))
+        centres = np.stack([o[near] for o in off], axis=-1)
+        pos = (centres[:, None, :] + sub_off[None, :, :]) * self.spacing_um
+        kernel[near] = inv_r6((pos ** 2).sum(axis=-1)).mean(axis=-1)
+
+        # MHz -> rad/us, and GHz um^6 / um^6 -> MHz
+        return 2. * np.pi * 1e3 * self.c6_ghz_um6 * cell_volume * kernel
+
+    def shift(self, rydberg_density_um3: np.ndarray) -> np.ndarray:
+        """
+        Mean-field shift of the Rydberg level.
+
+        Args:
+            rydberg_density_um3 (np.ndarray): Density of Rydberg atoms
+                                              n rho_rr (um^-3) on the grid.
+
+        Returns:
+            np.ndarray: Shift V on the grid (rad/us), positive for C6 > 0.
+        """
+        with stage('mean_field.convolve'):
+            conv = np.fft.irfftn(self._kernel_ft * np.fft.rfftn(rydberg_density_um3, self._padded),
+                                 self._padded)
+        return conv[tuple(slice(0, s) for s in self.shape)]
+
+    def self_consistent(self, solve, density_um3, rho_rr0=None, mixing: float = .5,
+                        tol: float = 1e-6, max_iter: int = 200) -> tuple:
+        """
+        Steady state with the mean-field shift iterated to self-consistency,
+        rho_rr = solve(V(n rho_rr)), by damped fixed-point iteration.
+
+        Args:
+            solve (callable): Maps the shift V on the grid (rad/us) to the
+                              steady-state Rydberg population on the grid,
+                              e.g. a batched ladder solve with
+                              delta_c - V (see ladder_rydberg_population).
+            density_um3 (float or np.ndarray): Atomic density on the grid (um^-3).
+            rho_rr0 (np.ndarray): Initial populations; defaults to solve(0).
+            mixing (float): Fraction of the new populations mixed in per iteration.
+            tol (float): Convergence threshold on the largest population change.
+            max_iter (int): Iteration limit.
+
+        Returns:
+            tuple: (rho_rr, shift, n_iter).
+
+        Raises:
+            RuntimeError: If the iteration does not converge.
+        """
+        density_um3 = np.broadcast_to(np.asarray(density_um3, dtype=float), self.shape)
+        rho_rr = solve(np.zeros(self.shape)) if rho_rr0 is None else np.asarray(rho_rr0, dtype=float)
+        for n_iter in range(1, max_iter + 1):
+            shift = self.shift(density_um3 * rho_rr)
+            update = solve(shift)
+            change = np.max(np.abs(update - rho_rr))
+            rho_rr = rho_rr + mixing * (update - rho_rr)
+            count('mean_field.iterations')
+            if change < tol : return rho_rr, self.shift(density_um3 * rho_rr), n_iter
+        raise RuntimeError(f"Mean-field iteration did not converge in {max_iter} steps "
+                           f"(last change {change:.3e})")
+
+    def evolve(self, model, times: np.ndarray, density_um3, rydberg: int, n_substeps: int = 1,
+               rho0: np.ndarray = None, shift_param: str = 'delta_c', **params) -> np.ndarray:
+        """
+        Time evolution of a compiled model in every grid cell with the
+        mean-field shift recomputed from the instantaneous Rydberg
+        populations at every RK4 stage.
+
+        Args:
+            model (AffineLiouvillian): Compiled model, e.g. AffineLiouvillian.ladder.
+            times (np.ndarray): Uniformly spaced output times (us).
+            density_um3 (float or np.ndarray): Atomic density on the grid (um^-3).
+            rydberg (int): Index of the Rydberg state in the model basis.
+            n_substeps (int): RK4 steps per output interval.
+            rho0 (np.ndarray): Initial density matrix; defaults to |0><0|.
+            shift_param (str): Detuning parameter absorbing the shift with a
+                               negative sign (an upward shift of |r> lowers
+                               the coupling detuning).
+            **params: Model parameter values, broadcastable against the grid.
+
+        Returns:
+            np.ndarray: Density matrices of shape (len(times),) + grid shape + (n, n).
+        """
+        n = model.dim
+        density_um3 = np.broadcast_to(np.asarray(density_um3, dtype=float), self.shape)
+        if rho0 is None:
+            rho0 = np.zeros((n, n), dtype=complex)
+            rho0[0, 0] = 1.
+        x0 = np.asarray(rho0, dtype=complex).reshape(-1, order='F')
+        x = np.broadcast_to(x0, self.shape + (n * n,)).copy()
+        fixed = {k: np.asarray(v) for k, v in params.items()}
+        base_detuning = fixed.pop(shift_param, 0.)
+        idx = rydberg * (n + 1)
+
+        def rhs(t, y):
+            shift = self.shift(density_um3 * y[..., idx].real)
+            return model.apply(y, **fixed, **{shift_param: base_detuning - shift})
+
+        dt = (times[1] - times[0]) / n_substeps if len(times) > 1 else 0.
+        out = np.empty((len(times),) + self.shape + (n, n), dtype=complex)
+        out[0] = np.swapaxes(x.reshape(self.shape + (n, n)), -1, -2)
+        for i in range(1, len(times)):
+            for _ in range(n_substeps):
+                x = rk4_step(rhs, 0., x, dt)
+            out[i] = np.swapaxes(x.reshape(self.shape + (n, n)), -1, -2)
+        return out
+
+
+def ladder_rydberg_population(delta_p, delta_c, omega_p, omega_c, gamma_eg: float, gamma_re: float,
+                              chunk_size: int = 1 << 14):
+    """
+    Solver for RydbergMeanField.self_consistent on the g-e-r ladder: returns
+    a function mapping the shift V (rad/us) on the grid to the steady-state
+    Rydberg population, all grid cells being solved in one batched call.
+    The parameters may vary over the grid, e.g. with the beam profiles.
+    """
+    from classes.classes_affine_liouvillian import AffineLiouvillian
+    from fns.fns_steady_state import sweep_rho
+
+    model = AffineLiouvillian.ladder(gamma_eg, gamma_re)
+
+    def solve(shift):
+        return sweep_rho(model, (2, 2), chunk_size, delta_p=delta_p, delta_c=delta_c - shift,
+                         omega_p=omega_p, omega_c=omega_c).real
+    return solve
@@ -0,0 +1,191 @@
+import numpy as np
+import scipy.sparse as sps
+from scipy.linalg import expm
+from scipy.sparse.linalg import spsolve, expm_multiply
+
+from fns.fns_liouvillian import spre, spost
+
+
+class PartitionedBlochModel:
+
+    def __init__(self, gamma, n_primary: int = 4):
+        """
+        Maxwell-Bloch model of P laser-coupled primary states and N peripheral
+        states exploiting the partition of the master equation in THEORY.md.
+
+        States 0 .. P-1 are the primary states (g, e, r1, r2 by default) and
+        carry the Hamiltonian; states P .. P+N-1 are peripheral and are only
+        reached by decay. gamma[a, b] is the rate Gamma_ab of decay from |b>
+        to |a> (rad/us), dense or scipy.sparse.
+
+        Because the jump operators |a><b| transfer populations only, the
+        master equation splits into
+            + a coupled block of all P**2 primary elements and the N peripheral
+              populations, assembled here as a sparse (P**2 + N)-dimensional
+              system, and
+            + the peripheral coherences, which evolve in closed form:
+              rho_ab decays at (Gamma_a + Gamma_b)/2, and each row rho_a,P
+              obeys du/dt = u (i H_P - diag(Gamma_P)/2) - Gamma_a u / 2, with
+              one P x P propagator shared by all peripheral states.
+        Note that rho_gr and rho_r1r2 are driven by the two-photon process and
+        therefore belong to the coupled block, which thus holds N + 16 rather
+        than the N + 7 unknowns counted in THEORY.md. Memory is linear in N
+        (plus the number of decay channels).
+
+        """
+        gamma = sps.csr_matrix(gamma, dtype=float)
+        gamma.setdiag(0.)
+        gamma.eliminate_zeros()
+        self.gamma = gamma
+        self.n_primary = n_primary
+        self.n_states = gamma.shape[0]
+        self.n_peripheral = self.n_states - n_primary
+        self.gamma_out = np.asarray(gamma.sum(axis=0)).ravel()    # Gamma_b = sum_a Gamma_ab
+        self.size = n_primary * n_primary + self.n_peripheral
+        self._dissipator = self._build_dissipator()
+
+    def pop_index(self, states) -> np.ndarray:
+        """ Position of the population of each state in the coupled-block vector. """
+        states = np.asarray(states)
+        return np.where(states < self.n_primary, states * (self.n_primary + 1),
+                        self.n_primary * self.n_primary + states - self.n_primary)
+
+    def _build_dissipator(self) -> sps.csr_matrix:
+        g_p = self.gamma_out[:self.n_primary]
+
+        # Decay of every coupled element: (Gamma_i + Gamma_j)/2 on rho_ij,
+        #  which is Gamma_a on the peripheral populations
+        decay = np.concatenate([-.5 * (g_p[:, None] + g_p[None, :]).T.ravel(),
+                                -self.gamma_out[self.n_primary:]])
+
+        # Population feed Gamma_ab rho_bb -> rho_aa
+        feed = self.gamma.tocoo()
+        rows = np.concatenate([np.arange(self.size), self.pop_index(feed.row)])
+        cols = np.concatenate([np.arange(self.size), self.pop_index(feed.col)])
+        data = np.concatenate([decay, feed.data]).astype(complex)
+        return sps.csr_matrix((data, (rows, cols)), shape=(self.size, self.size))
+
+    def matrix(self, h_primary: np.ndarray) -> sps.csr_matrix:
+        """
+        Sparse generator A of the coupled block, d x / dt = A x.
+
+        Args:
+            h_primary (np.ndarray): Hamiltonian on the primary states, (P, P).
+
+        Returns:
+            scipy.sparse.csr_matrix: Complex (P**2 + N, P**2 + N) matrix.
+        """
+        coherent = sps.csr_matrix(-1j * (spre(h_primary) - spost(h_primary)))
+        coherent.resize((self.size, self.size))
+        return (self._dissipator + coherent).tocsr()
+
+    def pack(self, rho_primary: np.ndarray, pop_peripheral: np.ndarray) -> np.ndarray:
+        """ Coupled-block vector from the primary density matrix and peripheral populations. """
+        return np.concatenate([np.asarray(rho_primary, dtype=complex).T.ravel(),
+                               np.asarray(pop_peripheral, dtype=complex)])
+
+    def unpack(self, x: np.ndarray) -> tuple:
+        """
+        Split coupled-block vectors (..., P**2 + N) into the primary density
+        matrices (..., P, P) and the peripheral populations (..., N).
+        """
+        p_sq = self.n_primary * self.n_primary
+        rho = np.swapaxes(x[..., :p_sq].reshape(x.shape[:-1] + (self.n_primary, self.n_primary)), -1, -2)
+        return rho, x[..., p_sq:].real
+
+    def steady_state(self, h_primary: np.ndarray) -> tuple:
+        """
+        Steady state of the coupled block by one sparse LU solve, the ground
+        population equation being replaced by the trace condition.
+        The decoupled coherences all vanish in the steady state.
+
+        Args:
+            h_primary (np.ndarray): Hamiltonian on the primary states, (P, P).
+
+        Returns:
+            tuple: (rho_primary (P, P), pop_peripheral (N,)).
+        """
+        trace = sps.csr_matrix((np.ones(self.n_states), (np.zeros(self.n_states, dtype=int),
+                                                        self.pop_index(np.arange(self.n_states)))),
+                               shape=(self.size, self.size))
+        keep = np.ones(self.size)
+        keep[0] = 0.
+        lhs = (sps.diags(keep) @ self.matrix(h_primary) + trace).tocsc()
+        rhs = np.zeros(self.size, dtype=complex)
+        rhs[0] = 1.
+        return self.unpack(spsolve(lhs, rhs))
+
+    def evolve(self, h_primary: np.ndarray, x0: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        Propagate the coupled block, x(t) = exp(A t) x0, with sparse
+        Krylov-type matrix-exponential actions.
+
+        Args:
+            h_primary (np.ndarray): Hamiltonian on the primary states, (P, P).
+            x0 (np.ndarray): Initial coupled-block vector (see pack).
+            times (np.ndarray): Increasing output times (us), starting at or after 0.
+
+        Returns:
+            np.ndarray: Coupled-block vectors of shape (len(times), P**2 + N).
+        """
+        gen = self.matrix(h_primary)
+        out = np.empty((len(times), self.size), dtype=complex)
+        x, t_prev = np.asarray(x0, dtype=complex), 0.
+        for i, t in enumerate(times):
+            if t > t_prev : x = expm_multiply(gen * (t - t_prev), x)
+            out[i], t_prev = x, t
+        return out
+
+    def evolve_coherences(self, h_primary: np.ndarray, coh0: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        Closed-form evolution of the peripheral-primary coherences rho_aP.
+
+        Args:
+            h_primary (np.ndarray): Hamiltonian on the primary states, (P, P).
+            coh0 (np.ndarray): Initial rho_a,alpha for peripheral a and primary
+                               alpha, shape (N, P).
+            times (np.ndarray): Output times (us).
+
+        Returns:
+            np.ndarray: Coherences of shape (len(times), N, P); rho_alpha,a
+                        follows by complex conjugation.
+        """
+        g_p = self.gamma_out[:self.n_primary]
+        gen = 1j * np.asarray(h_primary) - .5 * np.diag(g_p)
+        prop = expm(np.asarray(times)[:, None, None] * gen)
+        decay = np.exp(-.5 * np.outer(times, self.gamma_out[self.n_primary:]))
+        return decay[..., None] * (np.asarray(coh0)[None] @ prop)
+
+    def evolve_peripheral_coherences(self, coh0: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        Closed-form decay of the peripheral-peripheral coherences rho_ab.
+
+        Args:
+            coh0 (np.ndarray): Initial rho_ab among peripheral states, (N, N);
+                               the diagonal is ignored.
+            times (np.ndarray): Output times (us).
+
+        Returns:
+            np.ndarray: Coherences of shape (len(times), N, N), zero on the diagonal.
+        """
+        g_a = self.gamma_out[self.n_primary:]
+        decay = np.exp(-.5 * np.asarray(times)[:, None, None] * (g_a[:, None] + g_a[None, :]))
+        out = decay * np.asarray(coh0)[None]
+        out[:, np.arange(self.n_peripheral), np.arange(self.n_peripheral)] = 0.
+        return out
+
+    def density_matrix(self, x: np.ndarray, coh_primary: np.ndarray = None,
+                       coh_peripheral: np.ndarray = None) -> np.ndarray:
+        """
+        Assemble the full (P+N, P+N) density matrix, e.g. for validation on
+        small bases. Omitted peripheral coherences are taken as zero.
+        """
+        rho_p, pops = self.unpack(np.asarray(x))
+        rho = np.zeros((self.n_states, self.n_states), dtype=complex)
+        rho[:self.n_primary, :self.n_primary] = rho_p
+        if coh_peripheral is not None : rho[self.n_primary:, self.n_primary:] = coh_peripheral
+        rho[np.arange(self.n_primary, self.n_states), np.arange(self.n_primary, self.n_states)] = pops
+        if coh_primary is not None:
+            rho[self.n_primary:, :self.n_primary] = coh_primary
+            rho[:self.n_primary, self.n_primary:] = np.conj(coh_primary).T
+        return rho
@@ -1,3 +1,9 @@
+import numpy as np
+
+from fns.fns_rydberg_mb import parse_spec_state, build_state_str
+from fns.fns_transitions import nlj_levels
+
+
 
 class AtomicNLJMIterator:
 
@@ -42,3 +48,155 @@ class AtomicNLJMIterator:
         
         if self.iter_mj : return tuple(self.nljm)
         else : return tuple(self.nljm[:3])
+
+
+class StateTable:
+
+    state_dtype = np.dtype([('n', np.int32), ('l', np.int32), ('j2', np.int32), ('mj2', np.int32)])
+
+    def __init__(self, states: np.ndarray, with_mj=True):
+        """
+        A compact table of atomic states stored as a structured array of
+        integers (n, l, 2j, 2m_j), the row index being a dense state id.
+
+        Quantum numbers are mapped to ids in O(1) through a dense lookup
+        array, for scalars (id_of) or whole arrays (ids). Without m_j the
+        table holds fine-structure levels (n, l, j) and the mj2 field is
+        unused, mirroring AtomicNLJMIterator(iter_mj=False).
+
+        """
+        self.states = np.asarray(states, dtype=self.state_dtype)
+        self.with_mj = with_mj
+        self._nmax = int(self.states['n'].max(initial=0))
+        self._lmax = int(self.states['l'].max(initial=0))
+        self._j2max = int(self.states['j2'].max(initial=0))
+        self._lookup = np.full(self._key_size(), -1, dtype=np.int64)
+        self._lookup[self._keys(self.states['n'], self.states['l'],
+                                self.states['j2'], self.states['mj2'])] = np.arange(len(self))
+
+    @classmethod
+    def from_range(cls, nmin: int, nmax: int, lmax: int, with_mj=True):
+        """ Table of all states visited by AtomicNLJMIterator(nmin, nmax, lmax, with_mj). """
+        n_lvl, l_lvl, j_lvl = nlj_levels(nmin, nmax, lmax)
+        j2_lvl = np.rint(2. * j_lvl).astype(np.int32)
+        counts = j2_lvl + 1 if with_mj else np.ones_like(j2_lvl)
+        states = np.empty(counts.sum(), dtype=cls.state_dtype)
+        states['n'] = np.repeat(n_lvl, counts)
+        states['l'] = np.repeat(l_lvl, counts)
+        states['j2'] = np.repeat(j2_lvl, counts)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        states['mj2'] = (2 * (np.arange(states.shape[0]) - offsets) - states['j2']) if with_mj else 0
+        return cls(states, with_mj)
+
+    @classmethod
+    def from_tuples(cls, tuples, with_mj=True):
+        """ Table from (n, l, j, m_j) tuples, or (n, l, j) tuples when with_mj is False. """
+        tuples = np.array(list(tuples), dtype=float).reshape(-1, 4 if with_mj else 3)
+        states = np.zeros(tuples.shape[0], dtype=cls.state_dtype)
+        states['n'] = tuples[:, 0]
+        states['l'] = tuples[:, 1]
+        states['j2'] = np.rint(2. * tuples[:, 2])
+        if with_mj : states['mj2'] = np.rint(2. * tuples[:, 3])
+        return cls(states, with_mj)
+
+    @classmethod
+    def from_iterator(cls, iterator: AtomicNLJMIterator):
+        """ Table of the states an AtomicNLJMIterator would produce. """
+        return cls.from_tuples(iterator, iterator.iter_mj)
+
+    @classmethod
+    def from_spec_strings(cls, state_strs):
+        """ Level table from spectroscopic strings, e.g. ['6s0.5', '6p1.5']. """
+        return cls.from_tuples((parse_spec_state(s) for s in state_strs), with_mj=False)
+
+    def __len__(self):
+        return self.states.shape[0]
+
+    def __iter__(self):
+        """ Yields (n, l, j, m_j) tuples, or (n, l, j) without m_j, as AtomicNLJMIterator does. """
+        for n, l, j2, mj2 in self.states.tolist():
+            if self.with_mj : yield (n, l, j2 / 2., mj2 / 2.)
+            else : yield (n, l, j2 / 2.)
+
+    @property
+    def n(self) -> np.ndarray:
+        return self.states['n']
+
+    @property
+    def l(self) -> np.ndarray:
+        return self.states['l']
+
+    @property
+    def j(self) -> np.ndarray:
+        return self.states['j2'] / 2.
+
+    @property
+    def mj(self) -> np.ndarray:
+        return self.states['mj2'] / 2.
+
+    def _key_size(self) -> int:
+        n_mj = self._j2max + 1 if self.with_mj else 1
+        return (self._nmax + 1) * (self._lmax + 1) * (self._j2max + 1) * n_mj
+
+    def _keys(self, n, l, j2, mj2):
+        n_mj = self._j2max + 1 if self.with_mj else 1
+        mj_idx = (np.asarray(mj2) + self._j2max) // 2 if self.with_mj else 0
+        return ((np.asarray(n, dtype=np.int64) * (self._lmax + 1) + l) * (self._j2max + 1) + j2) * n_mj + mj_idx
+
+    def ids(self, n, l, j, mj=None) -> np.ndarray:
+        """
+        Vectorized lookup of state ids from quantum numbers.
+
+        Args:
+            n, l (int or np.ndarray): Principal and orbital quantum numbers.
+            j, mj (float or np.ndarray): Total angular momentum and its projection;
+                                        mj is ignored for level tables.
+
+        Returns:
+            np.ndarray: State ids, -1 where the state is not in the table.
+        """
+        n, l, j2, mj2 = np.broadcast_arrays(
+            np.asarray(n), np.asarray(l), np.rint(2. * np.asarray(j)).astype(np.int64),
+            np.rint(2. * np.asarray(0. if mj is None else mj)).astype(np.int64))
+        valid = ((n >= 0) & (n <= self._nmax) & (l >= 0) & (l <= self._lmax)
+                 & (j2 >= 0) & (j2 <= self._j2max))
+        # m_j must have the parity of j and |m_j| <= j, or (mj2 + j2max) // 2 aliases a neighbouring slot
+        if self.with_mj : valid &= (np.abs(mj2) <= j2) & ((mj2 - j2) % 2 == 0)
+        ids = np.full(n.shape, -1, dtype=np.int64)
+        ids[valid] = self._lookup[self._keys(n[valid], l[valid], j2[valid], mj2[valid])]
+        return ids
+
+    def id_of(self, state: tuple) -> int:
+        """ State id of an (n, l, j, m_j) or (n, l, j) tuple; -1 if absent. """
+        return int(self.ids(*state[:4 if self.with_mj else 3]))
+
+    def levels(self) -> tuple:
+        """
+        The fine-structure level table underlying this table.
+
+        Returns:
+            tuple: (level_table, level_ids) where level_ids[state_id] is the id
+                   of the state's (n, l, j) level in level_table, such that
+                   level_values[level_ids[state_ids]] gathers per-level data
+                   (e.g. energies) for any array of state ids.
+        """
+        lvl_states = self.states.copy()
+        lvl_states['mj2'] = 0
+        # Structured arrays sort field by field, i.e. in iterator order (n, l, j)
+        unique, level_ids = np.unique(lvl_states, return_inverse=True)
+        return StateTable(unique, with_mj=False), level_ids.ravel()
+
+    def transition_ids(self, trans: np.ndarray) -> tuple:
+        """
+        State ids of the lower and upper states of each row of a transition
+        array from dipole_transitions.
+
+        Returns:
+            tuple: (ids_a, ids_b) integer arrays.
+        """
+        return (self.ids(trans['n_a'], trans['l_a'], trans['j_a'], trans['mj_a']),
+                self.ids(trans['n_b'], trans['l_b'], trans['j_b'], trans['mj_b']))
+
+    def spec_strings(self) -> list:
+        """ Spectroscopic strings ('6p1.5', ...) of each state's level. """
+        return [build_state_str(n, l, j2 / 2.) for n, l, j2, _ in self.states.tolist()]
@@ -0,0 +1,84 @@
+import numpy as np
+
+from fns.fns_rydberg_mb import wavelength_to_frequency
+
+
+class SpectralIndex:
+
+    def __init__(self, delta_mhz: np.ndarray, ids_a: np.ndarray = None, ids_b: np.ndarray = None):
+        """
+        Transition frequencies sorted once for nearest-transition queries.
+
+        The absolute transition frequencies |delta| (MHz) are sorted together
+        with their row numbers in the originating transition table and,
+        optionally, the StateTable ids of their lower and upper states.
+        Queries locate each reference frequency by binary search, so a
+        k-nearest or within-window query costs O(log N + k) rather than a
+        full pass and sort of the table as in compare_transitions.
+
+        """
+        delta_mhz = np.abs(np.asarray(delta_mhz, dtype=float))
+        self.rows = np.argsort(delta_mhz, kind='stable')
+        self.freqs = delta_mhz[self.rows]
+        self.ids_a = None if ids_a is None else np.asarray(ids_a)[self.rows]
+        self.ids_b = None if ids_b is None else np.asarray(ids_b)[self.rows]
+
+    def __len__(self):
+        return self.freqs.shape[0]
+
+    def nearest(self, ref_mhz, k: int = 5) -> tuple:
+        """
+        The k transitions nearest to each reference frequency.
+
+        Args:
+            ref_mhz (float or np.ndarray): Reference frequencies (MHz); the sign
+                                           is ignored, as in compare_transitions.
+            k (int): Number of matches per reference.
+
+        Returns:
+            tuple: (rows, diffs), arrays of shape (..., k) holding the table row
+                   numbers of the matches and their absolute frequency
+                   differences, ranked from nearest.
+        """
+        ref_mhz = np.abs(np.asarray(ref_mhz, dtype=float))
+        k = min(k, len(self))
+        pos = np.searchsorted(self.freqs, ref_mhz)
+
+        # The k nearest lie among the k sorted entries either side of pos
+        cand = np.clip(pos[..., None] + np.arange(-k, k), 0, len(self) - 1)
+        diffs = np.abs(self.freqs[cand] - ref_mhz[..., None])
+        dup = np.zeros(cand.shape, dtype=bool)
+        dup[..., 1:] = cand[..., 1:] == cand[..., :-1]
+        diffs = np.where(dup, np.inf, diffs)
+        best = np.argsort(diffs, axis=-1, kind='stable')[..., :k]
+        return (self.rows[np.take_along_axis(cand, best, axis=-1)],
+                np.take_along_axis(diffs, best, axis=-1))
+
+    def within(self, ref_mhz, half_width_mhz) -> list:
+        """
+        All transitions within +/- half_width_mhz of each reference frequency,
+        e.g. within a Doppler width of a laser line.
+
+        Args:
+            ref_mhz (float or np.ndarray): Reference frequencies (MHz).
+            half_width_mhz (float or np.ndarray): Window half-widths (MHz),
+                                                  broadcast against ref_mhz.
+
+        Returns:
+            list: For each reference (flattened), an array of table row numbers
+                  ordered by frequency.
+        """
+        ref_mhz, half_width_mhz = np.broadcast_arrays(np.abs(np.asarray(ref_mhz, dtype=float)),
+                                                      half_width_mhz)
+        lo = np.searchsorted(self.freqs, np.ravel(ref_mhz - half_width_mhz), side='left')
+        hi = np.searchsorted(self.freqs, np.ravel(ref_mhz + half_width_mhz), side='right')
+        return [self.rows[a:b] for a, b in zip(lo, hi)]
+
+    def nearest_wavelength(self, wavelength_nm, k: int = 5) -> tuple:
+        """ As nearest, for reference wavelengths in nm. """
+        return self.nearest(wavelength_to_frequency(np.asarray(wavelength_nm, dtype=float)), k)
+
+    def within_wavelength(self, wavelength_nm, half_width_mhz) -> list:
+        """ As within, for reference wavelengths in nm. """
+        return self.within(wavelength_to_frequency(np.asarray(wavelength_nm, dtype=float)),
+                           half_width_mhz)
@@ -0,0 +1,91 @@
+from functools import lru_cache
+from math import factorial, sqrt
+
+
+def _two(x: float) -> int:
+    """ Doubled angular momentum as an exact integer key. """
+    return int(round(2. * x))
+
+
+def _triangle(a2: int, b2: int, c2: int) -> float:
+    """ Triangle coefficient Delta(a b c) from doubled arguments; 0 if not a triangle. """
+    if (a2 + b2 + c2) % 2 or c2 < abs(a2 - b2) or c2 > a2 + b2 : return 0.
+    return sqrt(factorial((a2 + b2 - c2) // 2) * factorial((a2 - b2 + c2) // 2)
+                * factorial((-a2 + b2 + c2) // 2) / factorial((a2 + b2 + c2) // 2 + 1))
+
+
+@lru_cache(maxsize=None)
+def _wigner_3j(j1: int, j2: int, j3: int, m1: int, m2: int, m3: int) -> float:
+    if m1 + m2 + m3 or abs(m1) > j1 or abs(m2) > j2 or abs(m3) > j3 : return 0.
+    if (j1 + m1) % 2 or (j2 + m2) % 2 or (j3 + m3) % 2 : return 0.
+    tri = _triangle(j1, j2, j3)
+    if tri == 0. : return 0.
+    pre = tri * sqrt(factorial((j1 + m1) // 2) * factorial((j1 - m1) // 2) * factorial((j2 + m2) // 2)
+                     * factorial((j2 - m2) // 2) * factorial((j3 + m3) // 2) * factorial((j3 - m3) // 2))
+    k_min = max(0, (j2 - j3 - m1) // 2, (j1 - j3 + m2) // 2)
+    k_max = min((j1 + j2 - j3) // 2, (j1 - m1) // 2, (j2 + m2) // 2)
+    total = 0.
+    for k in range(k_min, k_max + 1):
+        total += (-1) ** k / (factorial(k) * factorial((j1 + j2 - j3) // 2 - k)
+                              * factorial((j1 - m1) // 2 - k) * factorial((j2 + m2) // 2 - k)
+                              * factorial((j3 - j2 + m1) // 2 + k) * factorial((j3 - j1 - m2) // 2 + k))
+    return (-1) ** ((j1 - j2 - m3) // 2) * pre * total
+
+
+@lru_cache(maxsize=None)
+def _wigner_6j(j1: int, j2: int, j3: int, j4: int, j5: int, j6: int) -> float:
+    triads = ((j1, j2, j3), (j1, j5, j6), (j4, j2, j6), (j4, j5, j3))
+    tris = [_triangle(*t) for t in triads]
+    if 0. in tris : return 0.
+    sums = [sum(t) // 2 for t in triads]
+    quads = ((j1 + j2 + j4 + j5) // 2, (j2 + j3 + j5 + j6) // 2, (j3 + j1 + j6 + j4) // 2)
+    total = 0.
+    for k in range(max(sums), min(quads) + 1):
+        total += (-1) ** k * factorial(k + 1) / (
+            factorial(k - sums[0]) * factorial(k - sums[1]) * factorial(k - sums[2])
+            * factorial(k - sums[3]) * factorial(quads[0] - k) * factorial(quads[1] - k) * factorial(quads[2] - k))
+    return tris[0] * tris[1] * tris[2] * tris[3] * total
+
+
+def wigner_3j(j1: float, j2: float, j3: float, m1: float, m2: float, m3: float) -> float:
+    """
+    Wigner 3j symbol (j1 j2 j3; m1 m2 m3) by the Racah formula, memoized on
+    the doubled (integer) arguments so that repeated basis builds cost one
+    dictionary lookup per coefficient.
+    """
+    return _wigner_3j(_two(j1), _two(j2), _two(j3), _two(m1), _two(m2), _two(m3))
+
+
+def wigner_6j(j1: float, j2: float, j3: float, j4: float, j5: float, j6: float) -> float:
+    """ Wigner 6j symbol {j1 j2 j3; j4 j5 j6}, memoized as wigner_3j. """
+    return _wigner_6j(_two(j1), _two(j2), _two(j3), _two(j4), _two(j5), _two(j6))
+
+
+def clebsch_gordan(j1: float, m1: float, j2: float, m2: float, j: float, m: float) -> float:
+    """ Clebsch-Gordan coefficient <j1 m1; j2 m2 | j m>. """
+    return (-1) ** int(round(j1 - j2 + m)) * sqrt(2. * j + 1.) * wigner_3j(j1, j2, j, m1, m2, -m)
+
+
+def hyperfine_dipole_factor(j: float, f: float, mf: float, j_p: float, f_p: float, mf_p: float,
+                            q: int, i_nuc: float) -> float:
+    """
+    Angular factor of the hyperfine dipole element in the convention of ARC's
+    getDipoleMatrixElementHFS,
+        <J F mF| e r |J' F' mF'> = <J||e r||J'> x factor,
+        factor = (-1)**(F - mF) (F 1 F'; -mF -q mF')
+                 (-1)**(J + I + F' + 1) sqrt((2F + 1)(2F' + 1)) {F 1 F'; J' I J},
+    with <J||e r||J'> the symmetric reduced element of getReducedMatrixElementJ
+    and q the polarization driving |J F mF> to |J' F' mF' = mF + q>.
+
+    Args:
+        j, f, mf (float): Quantum numbers of the first state.
+        j_p, f_p, mf_p (float): Quantum numbers of the second state.
+        q (int): Polarization (-1, 0, 1 for sigma-, pi, sigma+).
+        i_nuc (float): Nuclear spin.
+
+    Returns:
+        float: The angular factor.
+    """
+    return ((-1) ** int(round(f - mf)) * wigner_3j(f, 1., f_p, -mf, -q, mf_p)
+            * (-1) ** int(round(j + i_nuc + f_p + 1.)) * sqrt((2. * f + 1.) * (2. * f_p + 1.))
+            * wigner_6j(f, 1., f_p, j_p, i_nuc, j))
@@ -0,0 +1,110 @@
+import numpy as np
+
+from fns.fns_instrument import timed
+from fns.fns_steady_state import ladder_rho_ge
+from fns.fns_doppler import doppler_rho_ge, m_cs_kg
+
+c_light = 2.99792e8             # m / s
+eps0_si = 8.854187817e-12       # C^2 / (J m)
+
+
+def peak_rabi_frequency(power_w, waist_m, dip_mhz_v_m):
+    """
+    On-axis Rabi frequency of a Gaussian beam, from the peak intensity
+    I0 = 2 P / (pi w**2) and field amplitude E0 = sqrt(2 I0 / (c eps0)).
+
+    Args:
+        power_w (float or np.ndarray): Beam power (W).
+        waist_m (float or np.ndarray): 1/e**2 intensity radius (m).
+        dip_mhz_v_m (float or np.ndarray): Transition dipole in MHz/(V/m),
+                                           as in transition_profiling.py.
+
+    Returns:
+        float or np.ndarray: Peak Rabi frequency (rad/us).
+    """
+    intensity = 2. * np.asarray(power_w) / (np.pi * np.asarray(waist_m) ** 2)
+    e_field = np.sqrt(2. * intensity / (c_light * eps0_si))
+    return 2. * np.pi * np.abs(dip_mhz_v_m) * e_field
+
+
+def radial_nodes(n_nodes: int, waist_p_m: float, waist_c_m: float) -> tuple:
+    """
+    Radial quadrature over the transverse profile of co-axial Gaussian probe
+    and coupling beams.
+
+    With s = 2 r**2 / w_p**2, the probe and coupling amplitudes are
+    exp(-s/2) and exp(-s w_p**2 / (2 w_c**2)) times their on-axis values,
+    and the area element is proportional to ds. The probe-weighted average
+        <f> = int f(s) exp(-s/2) ds / int exp(-s) ds
+            = int exp(-s) [f(s) exp(s/2)] ds
+    is taken by Gauss-Laguerre quadrature, which is exact whenever f scales
+    linearly with the local probe amplitude (the weak-probe regime with a
+    uniform coupling beam), so that only the saturation and light-shift
+    corrections need to be resolved by the nodes.
+
+    Args:
+        n_nodes (int): Number of radial nodes.
+        waist_p_m (float): Probe 1/e**2 intensity radius (m).
+        waist_c_m (float): Coupling 1/e**2 intensity radius (m).
+
+    Returns:
+        tuple: (scale_p, scale_c, weights), each of length n_nodes: the probe
+               and coupling amplitudes relative to on-axis and the weights of
+               the probe-weighted average.
+    """
+    s, w = np.polynomial.laguerre.laggauss(n_nodes)
+    scale_p = np.exp(-.5 * s)
+    scale_c = np.exp(-.5 * s * (waist_p_m / waist_c_m) ** 2)
+    return scale_p, scale_c, w / scale_p
+
+
+@timed('beam.average')
+def beam_averaged_rho_ge(delta_p, delta_c, omega_p0, omega_c0, gamma_eg: float, gamma_re: float,
+                         waist_p_m: float, waist_c_m: float, n_nodes: int = 8,
+                         t_kelvin: float = 0., m_kg: float = m_cs_kg, method: str = 'full',
+                         rtol: float = 1e-3, linewidth_p: float = 0., linewidth_c: float = 0.,
+                         **doppler_kwargs) -> np.ndarray:
+    """
+    Probe coherence of the g-e-r ladder averaged over the transverse profile
+    of Gaussian probe and coupling beams.
+
+    The result is the probe-weighted average int Omega_p(r) rho_ge(r) dA /
+    int Omega_p(r)**2 / Omega_p0 dA, which is the quantity whose imaginary
+    part sets the absorbed probe power, normalized so that it reduces to the
+    on-axis rho_ge of a uniform beam in the weak-probe limit. The radial
+    nodes (see radial_nodes) form a trailing axis of one batched solve, so
+    beam averaging costs a factor n_nodes rather than a nested loop.
+
+    Args:
+        delta_p (float or np.ndarray): Probe detuning (rad/us).
+        delta_c (float or np.ndarray): Coupling detuning (rad/us).
+        omega_p0 (float or np.ndarray): On-axis probe Rabi frequency (rad/us),
+                                        e.g. from peak_rabi_frequency.
+        omega_c0 (float or np.ndarray): On-axis coupling Rabi frequency (rad/us).
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+        waist_p_m (float): Probe 1/e**2 intensity radius (m).
+        waist_c_m (float): Coupling 1/e**2 intensity radius (m).
+        n_nodes (int): Number of radial nodes.
+        t_kelvin (float): Temperature (K); a positive value also averages
+                          over velocity classes (see doppler_rho_ge).
+        m_kg (float): Atomic mass (kg).
+        method (str): Solver per node, see ladder_rho_ge.
+        rtol (float): Relative error accepted from the closed form in 'auto'.
+        linewidth_p (float): Lorentzian probe laser linewidth (FWHM, rad/us).
+        linewidth_c (float): Lorentzian coupling laser linewidth (FWHM, rad/us).
+        **doppler_kwargs: Further arguments of doppler_rho_ge.
+
+    Returns:
+        np.ndarray: Complex array with the broadcast shape of the parameters.
+    """
+    scale_p, scale_c, weights = radial_nodes(n_nodes, waist_p_m, waist_c_m)
+    args = (np.asarray(delta_p)[..., None], np.asarray(delta_c)[..., None],
+            np.asarray(omega_p0)[..., None] * scale_p, np.asarray(omega_c0)[..., None] * scale_c,
+            gamma_eg, gamma_re)
+    solver_kwargs = dict(method=method, rtol=rtol, linewidth_p=linewidth_p, linewidth_c=linewidth_c)
+    if t_kelvin > 0.:
+        rho_ge = doppler_rho_ge(*args, t_kelvin, m_kg, **solver_kwargs, **doppler_kwargs)
+    else:
+        rho_ge = ladder_rho_ge(*args, **solver_kwargs)
+    return np.sum(weights * rho_ge, axis=-1)
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+c6_dtype = np.dtype([('n', np.int32), ('l', np.int32), ('j', np.float64), ('mj', np.float64),
+                     ('theta', np.float64), ('phi', np.float64), ('c6', np.float64)])
+
+# ARC atom of a worker process, built once by _init_worker
+_worker_atom = None
+
+
+def _init_worker(species: str, scratch_dir: str):
+    """
+    Build the worker's ARC atom on a private view of the ARC data folder.
+
+    ARC memoizes into files of its data folder: SQLite databases, the
+    species' dipole and quadrupole element tables (np.save) and the
+    pair-state angular matrices (angularMatrix*.npy). Concurrent workers
+    would lock the databases against each other and overwrite the shared
+    tables mid-write, so each worker gets its own copies of all of these,
+    only the read-only data (level and literature tables, 3j and 6j tables)
+    being linked. What a worker memoizes is discarded with its copies.
+    """
+    global _worker_atom
+    import arc
+    from arc.calculations_atom_pairstate import PairStateInteractions
+
+    atom_cls = getattr(arc, species)
+    source = atom_cls.dataFolder
+    private = tempfile.mkdtemp(dir=scratch_dir)
+    writable = (atom_cls.dipoleMatrixElementFile, atom_cls.quadrupoleMatrixElementFile)
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if not os.path.isfile(path) or name == 'precalculated_pair.db' : continue
+        if name.endswith('.db') or name in writable or name.startswith('angularMatrix'):
+            shutil.copy(path, private)
+        else : os.symlink(path, os.path.join(private, name))
+    atom_cls.dataFolder = private
+    PairStateInteractions.dataFolder = private
+    _worker_atom = atom_cls()
+
+
+def _c6_block(block: tuple) -> np.ndarray:
+    """
+    C6 for a block of neighbouring n at fixed (l, j), evaluated in one worker.
+
+    The perturbative sum over the pair-state basis of each n gives the
+    interaction matrix on the (2j + 1)**2 Zeeman pair states, which depends
+    neither on mj nor on the orientation of the interatomic axis. It is
+    therefore built once per n (by ARC at theta = phi = 0, from its
+    eigendecomposition) and rotated by the Wigner D matrices of each
+    orientation, C6 being the diagonal element of the pair state
+    |mj; mj>, as in getC6perturbatively. Each pair-state basis and its
+    couplings are thus summed once per n instead of once per (mj, angle).
+    """
+    from arc import PairStateInteractions
+    from arc.wigner import WignerDmatrix
+
+    n_values, l, j, mj_values, angles, dn, delta_max_hz = block
+    dim = int(round(2. * j + 1.))
+    rows = []
+    for n in n_values:
+        calculation = PairStateInteractions(_worker_atom, n, l, j, n, l, j, j, j)
+        values, vectors = calculation.getC6perturbatively(0., 0., dn, delta_max_hz, degeneratePerturbation=True)
+        # Eigenvectors are returned as rows
+        interaction = vectors.T @ np.diag(values) @ vectors.conj()
+        for theta, phi in angles:
+            wigner_d = WignerDmatrix(theta, phi).get(j).toarray()
+            rotation = np.kron(wigner_d, wigner_d)
+            rotated = rotation @ interaction @ rotation.conj().T
+            for mj in mj_values:
+                k = int(round(j + mj)) * (dim + 1)
+                rows.append((n, l, j, mj, theta, phi, rotated[k, k].real))
+    return np.array(rows, dtype=c6_dtype)
+
+
+def c6_table(n_values, l: int, j: float, mj_values=None, thetas=(0.,), phis=(0.,),
+             dn: int = 5, delta_max_hz: float = 25e9, species: str = 'Caesium',
+             n_workers: int = None, block_size: int = 4, existing: np.ndarray = None) -> np.ndarray:
+    """
+    Perturbative C6 coefficients of the pair states |n l j mj; n l j mj>
+    over ranges of n, mj and orientations of the interatomic axis, as in
+    scripts/scratch2.py, computed in parallel.
+
+    The n values are split into blocks of block_size neighbouring values,
+    each block evaluated in a worker process holding one ARC atom for its
+    lifetime, and the interaction matrix of each n serves all mj and
+    orientations (see _c6_block). Rows already present in existing (e.g. a
+    previously saved table) are not recomputed.
+
+    Args:
+        n_values (iterable): Principal quantum numbers.
+        l (int): Orbital angular momentum.
+        j (float): Total angular momentum.
+        mj_values (iterable): Projections; defaults to the stretched state mj = j.
+        thetas (iterable): Polar angles of the interatomic axis (rad).
+        phis (iterable): Azimuthal angles of the interatomic axis (rad).
+        dn (int): Range of n of the pair-state basis (n - dn .. n + dn).
+        delta_max_hz (float): Maximum pair-state energy defect (Hz).
+        species (str): ARC atom class name.
+        n_workers (int): Worker processes; None uses all cores.
+        block_size (int): Neighbouring n values per task.
+        existing (np.ndarray): Table of c6_dtype whose rows are reused.
+
+    Returns:
+        np.ndarray: Table of c6_dtype (C6 in GHz um^6), the union of the new
+                    and existing rows, sorted by (l, j, mj, theta, phi, n).
+    """
+    mj_values = [j] if mj_values is None else list(mj_values)
+    angles = [(float(t), float(p)) for t in thetas for p in phis]
+    existing = np.zeros(0, dtype=c6_dtype) if existing is None else np.asarray(existing, dtype=c6_dtype)
+    have = {(int(r['n']), int(r['l']), float(r['j']), float(r['mj']), float(r['theta']), float(r['phi']))
+            for r in existing}
+
+    todo = [int(n) for n in n_values
+            if any((int(n), l, float(j), float(mj), t, p) not in have
+                   for mj in mj_values for t, p in angles)]
+    blocks = [(todo[i:i + block_size], l, j, mj_values, angles, dn, delta_max_hz)
+              for i in range(0, len(todo), block_size)]
+
+    parts = [existing]
+    if blocks:
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(species, scratch_dir)) as pool:
+                parts += list(pool.map(_c6_block, blocks))
+
+    table = np.concatenate(parts)
+    keys = np.stack([table[k].astype(float) for k in ('n', 'l', 'j', 'mj', 'theta', 'phi')])
+    _, first = np.unique(keys, axis=1, return_index=True)
+    table = table[first]
+    return table[np.lexsort([table[k] for k in ('n', 'phi', 'theta', 'mj', 'j', 'l')])]
+
+
+def save_c6_table(path: str, table: np.ndarray):
+    """ Write a C6 table atomically to a .npy file. """
+    tmp = path + '.tmp.npy'
+    np.save(tmp, np.asarray(table, dtype=c6_dtype))
+    os.replace(tmp, path)
+
+
+def load_c6_table(path: str) -> np.ndarray:
+    """ Read a C6 table, or return an empty one if path does not exist. """
+    if not os.path.exists(path) : return np.zeros(0, dtype=c6_dtype)
+    return np.load(path)
@@ -0,0 +1,193 @@
+import numpy as np
+
+from fns.fns_instrument import timed
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from fns.fns_steady_state import ladder_rho_ge, line_sweep_rho, shifted_min_points
+
+k_boltz = 1.3806e-23            # Boltzmann constant (J/K)
+m_cs_kg = 2.21e-25              # Mass of caesium atom in kg
+
+
+def maxwell_boltzmann_1d(v, t_kelvin: float, m_kg: float = m_cs_kg):
+    """
+    One-dimensional Maxwell-Boltzmann distribution of the velocity component
+    along the beam axis, P_v(T) in README.md.
+
+    Args:
+        v (float or np.ndarray): Velocity along the beam axis (m/s).
+        t_kelvin (float): Temperature (K).
+        m_kg (float): Atomic mass (kg).
+
+    Returns:
+        float or np.ndarray: Probability density (s/m).
+    """
+    sigma_sq = k_boltz * t_kelvin / m_kg
+    return np.exp(-.5 * np.square(v) / sigma_sq) / np.sqrt(2. * np.pi * sigma_sq)
+
+
+def wavenumber_rad_us(wavelength_nm: float) -> float:
+    """
+    Doppler shift per unit velocity, k = 2 pi / lambda, in (rad/us) / (m/s).
+
+    Args:
+        wavelength_nm (float): Laser wavelength in nanometers.
+
+    Returns:
+        float: Wavenumber scaled such that k * v is an angular detuning in rad/us.
+    """
+    return 2. * np.pi / (wavelength_nm * 1e-9) * 1e-6
+
+
+def doppler_detunings(delta_p, delta_c, v, wavelength_p_nm: float = 852.,
+                      wavelength_c_nm: float = 509., counter_propagating: bool = True):
+    """
+    Map lab-frame detunings to the rest frame of a velocity class.
+
+    The velocity is measured along the probe propagation direction, such that
+    the probe appears red-shifted by k_p v; a counter-propagating coupling
+    beam appears blue-shifted by k_c v.
+
+    Args:
+        delta_p (float or np.ndarray): Lab-frame probe detuning (rad/us).
+        delta_c (float or np.ndarray): Lab-frame coupling detuning (rad/us).
+        v (float or np.ndarray): Atomic velocity along the probe axis (m/s).
+        wavelength_p_nm (float): Probe wavelength in nanometers.
+        wavelength_c_nm (float): Coupling wavelength in nanometers.
+        counter_propagating (bool): Whether the coupling beam counter-propagates
+                                    the probe.
+
+    Returns:
+        tuple: (delta_p_v, delta_c_v), broadcast over the arguments.
+    """
+    k_p = wavenumber_rad_us(wavelength_p_nm)
+    k_c = wavenumber_rad_us(wavelength_c_nm) * (-1. if counter_propagating else 1.)
+    return delta_p - k_p * v, delta_c - k_c * v
+
+
+def doppler_quadrature(delta_p, delta_c, gamma_eg: float, gamma_re: float,
+                       t_kelvin: float, m_kg: float = m_cs_kg, wavelength_p_nm: float = 852.,
+                       wavelength_c_nm: float = 509., counter_propagating: bool = True,
+                       n_panel: int = 8, n_levels: int = 8, ratio: float = 4., n_sigma: float = 5.):
+    """
+    Velocity nodes and Maxwell-Boltzmann weights adapted to each detuning.
+
+    The thermal profile is several hundred MHz wide while the features to be
+    resolved can be narrower than the natural linewidth, so a single global
+    rule (e.g. Gauss-Hermite) would need thousands of nodes. Instead, the
+    range of [-n_sigma, n_sigma] thermal widths is split into panels graded
+    geometrically about the two resonant velocity classes,
+        one-photon:  Delta_p - k_p v = 0 (narrowest width Gamma_eg / 2), and
+        two-photon:  Delta_p + Delta_c - (k_p -/+ k_c) v = 0 (narrowest width Gamma_re / 2),
+    with breakpoints at v_res +/- w ratio**i for i < n_levels, and each panel
+    receives n_panel Gauss-Legendre nodes. Any Lorentzian feature of width
+    between w and w ratio**n_levels about a resonance is thereby resolved,
+    Autler-Townes and Raman-like lines included.
+
+    Args:
+        delta_p (float or np.ndarray): Lab-frame probe detuning (rad/us).
+        delta_c (float or np.ndarray): Lab-frame coupling detuning (rad/us).
+        gamma_eg (float or np.ndarray): Width of the |e> resonance (rad/us).
+        gamma_re (float or np.ndarray): Width of the two-photon resonance (rad/us).
+        t_kelvin (float): Temperature (K).
+        m_kg (float): Atomic mass (kg).
+        wavelength_p_nm (float): Probe wavelength in nanometers.
+        wavelength_c_nm (float): Coupling wavelength in nanometers.
+        counter_propagating (bool): Whether the coupling beam counter-propagates
+                                    the probe.
+        n_panel (int): Gauss-Legendre nodes per panel.
+        n_levels (int): Number of graded breakpoints on each side of a resonance.
+        ratio (float): Growth factor between successive graded breakpoints.
+        n_sigma (float): Velocity cutoff in units of the thermal width.
+
+    Returns:
+        tuple: (v, weights), each of shape (..., (4 * n_levels + 1) * n_panel),
+               where the leading dimensions are the broadcast shape of delta_p,
+               delta_c and the widths. sum(weights * f(v)) approximates the thermal
+               average of f.
+    """
+    delta_p, delta_c, gamma_eg, gamma_re = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (delta_p, delta_c, gamma_eg, gamma_re)))
+    k_p = wavenumber_rad_us(wavelength_p_nm)
+    k_c = wavenumber_rad_us(wavelength_c_nm) * (-1. if counter_propagating else 1.)
+    v_max = n_sigma * np.sqrt(k_boltz * t_kelvin / m_kg)
+
+    # Resonant velocity classes and the narrowest feature width about each
+    centres = np.stack([delta_p / k_p, (delta_p + delta_c) / (k_p + k_c)], axis=-1)
+    half_widths = np.maximum(np.stack([.5 * gamma_eg / k_p, .5 * gamma_re / abs(k_p + k_c)], axis=-1),
+                             1e-9 * v_max)
+
+    # Panel breakpoints: cutoffs plus graded offsets about both resonances
+    offsets = half_widths[..., None] * ratio ** np.arange(n_levels)
+    offsets = np.concatenate([-offsets, offsets], axis=-1)
+    graded = (centres[..., None] + offsets).reshape(delta_p.shape + (-1,))
+    bounds = np.full(delta_p.shape + (2,), v_max)
+    bounds[..., 0] = -v_max
+    breaks = np.sort(np.concatenate([bounds, np.clip(graded, -v_max, v_max)], axis=-1), axis=-1)
+    lo, hi = breaks[..., :-1, None], breaks[..., 1:, None]
+
+    x_gl, w_gl = np.polynomial.legendre.leggauss(n_panel)
+    v = .5 * (lo + hi) + .5 * (hi - lo) * x_gl
+    weights = .5 * (hi - lo) * w_gl * maxwell_boltzmann_1d(v, t_kelvin, m_kg)
+    shape = delta_p.shape + (-1,)
+    return v.reshape(shape), weights.reshape(shape)
+
+
+@timed('doppler.average')
+def doppler_rho_ge(delta_p, delta_c, omega_p, omega_c, gamma_eg: float, gamma_re: float,
+                   t_kelvin: float, m_kg: float = m_cs_kg, wavelength_p_nm: float = 852.,
+                   wavelength_c_nm: float = 509., counter_propagating: bool = True,
+                   n_panel: int = 8, method: str = 'full', rtol: float = 1e-3,
+                   linewidth_p=0., linewidth_c=0.):
+    """
+    Doppler-averaged steady-state probe coherence of the g-e-r ladder,
+    the integral of rho_ss(v) f(v) dv of README.md.
+
+    Velocity nodes are chosen per detuning by doppler_quadrature and all
+    (detuning x velocity) points are handed to the batched steady-state
+    solver at once. With the full solver and enough nodes, the velocity
+    classes of each detuning are instead solved as one line sweep
+    (line_sweep_rho), both rest-frame detunings being linear in v.
+
+    Args:
+        delta_p (float or np.ndarray): Lab-frame probe detuning (rad/us).
+        delta_c (float or np.ndarray): Lab-frame coupling detuning (rad/us).
+        omega_p (float or np.ndarray): Probe Rabi frequency (rad/us).
+        omega_c (float or np.ndarray): Coupling Rabi frequency (rad/us).
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+        t_kelvin (float): Temperature (K).
+        m_kg (float): Atomic mass (kg).
+        wavelength_p_nm (float): Probe wavelength in nanometers.
+        wavelength_c_nm (float): Coupling wavelength in nanometers.
+        counter_propagating (bool): Whether the coupling beam counter-propagates
+                                    the probe.
+        n_panel (int): Gauss-Legendre nodes per quadrature panel.
+        method (str): Solver per velocity class, see ladder_rho_ge.
+        rtol (float): Relative error accepted from the closed form in 'auto'.
+        linewidth_p (float or np.ndarray): Lorentzian probe laser linewidth (FWHM, rad/us).
+        linewidth_c (float or np.ndarray): Lorentzian coupling laser linewidth (FWHM, rad/us).
+
+    Returns:
+        np.ndarray: Complex array with the broadcast shape of the parameters.
+    """
+    delta_p, delta_c, omega_p, omega_c, linewidth_p, linewidth_c = np.broadcast_arrays(
+        delta_p, delta_c, omega_p, omega_c, linewidth_p, linewidth_c)
+    # The laser linewidths broaden both resonances the quadrature is graded about
+    v, weights = doppler_quadrature(
+        delta_p, delta_c, gamma_eg + linewidth_p, gamma_re + linewidth_p + linewidth_c, t_kelvin, m_kg,
+        wavelength_p_nm, wavelength_c_nm, counter_propagating, n_panel)
+    if method == 'full' and v.shape[-1] >= shifted_min_points:
+        dp_dv, dc_dv = doppler_detunings(0., 0., 1., wavelength_p_nm, wavelength_c_nm, counter_propagating)
+        params = {'delta_p': delta_p, 'delta_c': delta_c, 'omega_p': omega_p, 'omega_c': omega_c}
+        linewidths = np.any(np.asarray(linewidth_p) != 0) or np.any(np.asarray(linewidth_c) != 0)
+        if linewidths : params.update(linewidth_p=linewidth_p, linewidth_c=linewidth_c)
+        rho_ge = line_sweep_rho(AffineLiouvillian.ladder(gamma_eg, gamma_re, linewidths=linewidths), (1, 0),
+                                {'delta_p': dp_dv, 'delta_c': dc_dv}, v, **params)
+        return np.sum(weights * rho_ge, axis=-1)
+    delta_p_v, delta_c_v = doppler_detunings(
+        delta_p[..., None], delta_c[..., None], v,
+        wavelength_p_nm, wavelength_c_nm, counter_propagating)
+    rho_ge = ladder_rho_ge(delta_p_v, delta_c_v, omega_p[..., None], omega_c[..., None],
+                           gamma_eg, gamma_re, method=method, rtol=rtol,
+                           linewidth_p=linewidth_p[..., None], linewidth_c=linewidth_c[..., None])
+    return np.sum(weights * rho_ge, axis=-1)
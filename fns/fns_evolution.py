@@ -0,0 +1,175 @@
+import numpy as np
+
+from fns.fns_instrument import count, stage
+
+
+def rk4_step(rhs, t: float, x: np.ndarray, dt: float) -> np.ndarray:
+    """
+    One classical Runge-Kutta step for a batch of states, dx/dt = rhs(t, x).
+
+    Args:
+        rhs (callable): Right-hand side, mapping (t, x) to an array shaped as x.
+        t (float): Current time.
+        x (np.ndarray): Current states, of any shape.
+        dt (float): Step size.
+
+    Returns:
+        np.ndarray: States at t + dt.
+    """
+    k1 = rhs(t, x)
+    k2 = rhs(t + .5 * dt, x + .5 * dt * k1)
+    k3 = rhs(t + .5 * dt, x + .5 * dt * k2)
+    k4 = rhs(t + dt, x + dt * k3)
+    return x + dt / 6. * (k1 + 2. * k2 + 2. * k3 + k4)
+
+
+# Dormand-Prince 5(4) tableau: nodes, stage coefficients, 5th-order weights
+#  (equal to the last stage row, so the last stage is reused as the next first)
+#  and the difference to the embedded 4th-order weights
+_dp_c = np.array([0., 1. / 5., 3. / 10., 4. / 5., 8. / 9., 1., 1.])
+_dp_a = [[],
+         [1. / 5.],
+         [3. / 40., 9. / 40.],
+         [44. / 45., -56. / 15., 32. / 9.],
+         [19372. / 6561., -25360. / 2187., 64448. / 6561., -212. / 729.],
+         [9017. / 3168., -355. / 33., 46732. / 5247., 49. / 176., -5103. / 18656.],
+         [35. / 384., 0., 500. / 1113., 125. / 192., -2187. / 6784., 11. / 84.]]
+_dp_e = np.array([71. / 57600., 0., -71. / 16695., 71. / 1920., -17253. / 339200., 22. / 525., -1. / 40.])
+
+
+def dopri5_step(rhs, t: float, x: np.ndarray, dt: float, k1: np.ndarray = None) -> tuple:
+    """
+    One Dormand-Prince 5(4) step for a batch of states, dx/dt = rhs(t, x).
+
+    Args:
+        rhs (callable): Right-hand side, mapping (t, x) to an array shaped as x.
+        t (float): Current time.
+        x (np.ndarray): Current states, of any shape.
+        dt (float): Step size.
+        k1 (np.ndarray): rhs(t, x) if already known (first same as last).
+
+    Returns:
+        tuple: (x_new, error, k_last), the 5th-order states at t + dt, the
+               embedded error estimate and rhs(t + dt, x_new).
+    """
+    k = [rhs(t, x) if k1 is None else k1]
+    for i in range(1, 7):
+        x_stage = x + dt * sum(a * k_j for a, k_j in zip(_dp_a[i], k) if a != 0.)
+        k.append(rhs(t + _dp_c[i] * dt, x_stage))
+    return x_stage, dt * sum(e * k_j for e, k_j in zip(_dp_e, k) if e != 0.), k[-1]
+
+
+def evolve_batch(model, times: np.ndarray, observables: dict, rho0: np.ndarray = None,
+                 envelopes: dict = None, method: str = 'dopri5', rtol: float = 1e-6,
+                 atol: float = 1e-9, n_substeps: int = 1, **params) -> dict:
+    """
+    Transient evolution of a whole batch of density matrices sharing the
+    operator structure of one compiled model, e.g. all velocity classes and
+    parameter sets of a switch-on or pulse sequence, recording only the
+    requested observables at the output times.
+
+    The parameters of the batch (detunings, Rabi amplitudes, ...) are
+    arrays broadcast against each other; time-dependent drives multiply them
+    by envelopes sampled on their own time grids. Two integrators advance
+    the batch as one array:
+        'dopri5': adaptive Dormand-Prince 5(4) with L x evaluated through
+                  AffineLiouvillian.apply, one step size being shared by the
+                  batch (the error norm is the largest over the batch);
+        'expm':   exponential integrator with n_substeps steps of fixed
+                  size per output interval, the parameters being held at
+                  their midpoint values. The propagators exp(L dt) are built
+                  from the affine components by one batched expm per step,
+                  or once for the whole run without envelopes, which is
+                  exact for constant drives.
+
+    Args:
+        model (AffineLiouvillian): Compiled model, e.g. AffineLiouvillian.ladder.
+        times (np.ndarray): Increasing output times (us); the evolution starts at times[0].
+        observables (dict): Name -> (i, j), recording rho[i, j], e.g.
+                            {'rho_ge': (1, 0), 'pop_r': (2, 2)}.
+        rho0 (np.ndarray): Initial density matrix (n, n), or a batch thereof;
+                           defaults to |0><0|.
+        envelopes (dict): Parameter name -> (env_times, env_values), the
+                          parameter at time t being its value in params
+                          (1 if absent) times the envelope interpolated
+                          linearly at t.
+        method (str): 'dopri5' or 'expm'.
+        rtol (float): Relative tolerance of 'dopri5'.
+        atol (float): Absolute tolerance of 'dopri5'.
+        n_substeps (int): Steps per output interval of 'expm'.
+        **params: Model parameter values (scalars or arrays), broadcast
+                  against each other to the batch shape.
+
+    Returns:
+        dict: Name -> complex array of shape (len(times),) + batch shape,
+              plus 'rho', the final states (batch shape + (n, n)), and
+              'n_steps', the number of steps taken.
+    """
+    if method not in ('dopri5', 'expm') : raise ValueError(f"Unknown method: {method}")
+    times = np.asarray(times, dtype=float)
+    envelopes = {k: (np.asarray(et, dtype=float), np.asarray(ev))
+                 for k, (et, ev) in (envelopes or {}).items()}
+    n = model.dim
+    if rho0 is None:
+        rho0 = np.zeros((n, n), dtype=complex)
+        rho0[0, 0] = 1.
+    rho0 = np.asarray(rho0, dtype=complex)
+    values = {k: np.asarray(v) for k, v in params.items()}
+    batch = np.broadcast_shapes(rho0.shape[:-2], *(v.shape for v in values.values()))
+    x = np.broadcast_to(np.swapaxes(rho0, -1, -2).reshape(rho0.shape[:-2] + (n * n,)),
+                        batch + (n * n,)).astype(complex)
+    for k in envelopes : values.setdefault(k, np.ones(()))
+
+    def params_at(t):
+        return {k: v * np.interp(t, *envelopes[k]) if k in envelopes else v for k, v in values.items()}
+
+    def rhs(t, y):
+        return model.apply(y, **params_at(t))
+
+    records = {name: np.empty((times.shape[0],) + batch, dtype=complex) for name in observables}
+    idx = {name: i + j * n for name, (i, j) in observables.items()}
+
+    def record(k, y):
+        for name, i in idx.items() : records[name][k] = y[..., i]
+
+    record(0, x)
+    n_steps = 0
+    if method == 'expm':
+        from scipy.linalg import expm
+        propagator, last_dt = None, None
+        for k in range(1, times.shape[0]):
+            dt = (times[k] - times[k - 1]) / n_substeps
+            for s in range(n_substeps):
+                if envelopes or dt != last_dt:
+                    liouv = model.evaluate(**params_at(times[k - 1] + (s + .5) * dt))
+                    with stage('evolution.expm'):
+                        propagator = np.broadcast_to(expm(liouv * dt), batch + liouv.shape[-2:])
+                    last_dt = dt
+                x = np.einsum('...ij,...j->...i', propagator, x)
+                n_steps += 1
+            record(k, x)
+    else:
+        t = times[0]
+        dt = (times[-1] - times[0]) / 100. if times.shape[0] > 1 else 0.
+        k1 = None
+        for k in range(1, times.shape[0]):
+            while t < times[k]:
+                step = min(dt, times[k] - t)
+                with stage('evolution.dopri5'):
+                    x_new, err, k_last = dopri5_step(rhs, t, x, step, k1)
+                scale = atol + rtol * np.maximum(np.abs(x), np.abs(x_new))
+                err_norm = np.sqrt(np.max(np.mean(np.abs(err / scale) ** 2, axis=-1)))
+                factor = min(5., max(.2, .9 * (err_norm + 1e-16) ** -.2))
+                if err_norm <= 1.:
+                    t, x, k1 = (times[k] if step == times[k] - t else t + step), x_new, k_last
+                    n_steps += 1
+                    # A step shortened to land on an output time does not shrink the next one
+                    dt = max(dt, step * factor)
+                else:
+                    dt = step * factor
+            record(k, x)
+    count('evolution.steps', n_steps)
+
+    records['rho'] = np.swapaxes(x.reshape(batch + (n, n)), -1, -2)
+    records['n_steps'] = n_steps
+    return records
@@ -0,0 +1,189 @@
+from functools import lru_cache
+
+import numpy as np
+
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from fns.fns_instrument import count, stage
+from fns.fns_steady_state import trace_row
+
+# Parameters of the observable y = amplitude * part(rho_ij) + offset rather than of the model
+_linear_names = ('amplitude', 'offset')
+
+
+def steady_state_jacobian(model: AffineLiouvillian, element: tuple, wrt, chunk_size: int = 1 << 12,
+                          **params) -> tuple:
+    """
+    Steady-state density-matrix element and its derivatives with respect to
+    model parameters over a batch of parameter values.
+
+    With the trace-augmented system A x = b of steady_state, differentiating
+    gives A dx/dp_k = -(dA/dp_k) x, where dA/dp_k is the component L_k with
+    its trace row zeroed. Each point is therefore factorized once (here as a
+    batched inverse of the small system) and the derivatives cost one
+    matrix-vector product each, instead of one extra solve per parameter and
+    finite-difference step.
+
+    Args:
+        model (AffineLiouvillian): Compiled model.
+        element (tuple): (i, j) such that rho[i, j] is returned.
+        wrt (iterable): Names of the model parameters to differentiate by.
+        chunk_size (int): Maximum number of points factorized per batched call.
+        **params: Model parameter values, broadcast against each other.
+
+    Returns:
+        tuple: (rho_el, d_rho_el), complex arrays of the broadcast shape of
+               the parameters and of shape (len(wrt),) + that shape.
+    """
+    wrt = list(wrt)
+    n = model.dim
+    idx = element[0] + element[1] * n
+    d_lhs = np.stack([model.component(k) for k in wrt]) if wrt else np.zeros((0,) + model.base.shape)
+    d_lhs = d_lhs.copy()
+    d_lhs[:, 0, :] = 0.
+
+    names = list(params)
+    values = np.broadcast_arrays(*(np.asarray(params[k]) for k in names))
+    shape = values[0].shape if values else ()
+    flat = [np.ravel(x) for x in values]
+    n_points = int(np.prod(shape))
+
+    rho_el = np.empty(n_points, dtype=complex)
+    d_rho_el = np.empty((len(wrt), n_points), dtype=complex)
+    for start in range(0, n_points, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        with stage('liouvillian.assemble'):
+            lhs = model.evaluate(**{k: x[chunk] for k, x in zip(names, flat)})
+        lhs[:, 0, :] = trace_row(n)
+        with stage('steady_state.factorize'):
+            inv = np.linalg.inv(lhs)
+        x = inv[:, :, 0]
+        rho_el[chunk] = x[:, idx]
+        # dx_k = -A^-1 (dA_k x), only the row idx of A^-1 being needed
+        d_rho_el[:, chunk] = -np.einsum('pj,kji,pi->kp', inv[:, idx, :], d_lhs, x)
+    count('steady_state.factorizations', n_points)
+    return rho_el.reshape(shape), d_rho_el.reshape((len(wrt),) + shape)
+
+
+def fit_steady_state(model: AffineLiouvillian, element: tuple, sweep: str, values, data, p0: dict,
+                     fixed: dict = None, scales: dict = None, part: str = 'imag', sigma=None,
+                     bounds: dict = None, cache_size: int = 64, **least_squares_kwargs) -> dict:
+    """
+    Least-squares fit of a steady-state spectrum,
+        y(s) = amplitude * part(rho_ij(s; p)) + offset,
+    measured along the sweep parameter s (e.g. the probe detuning), to data.
+
+    The residuals and their analytic Jacobian (steady_state_jacobian) come
+    from a single batched factorization per parameter vector, which is
+    memoized, as scipy.optimize.least_squares requests residuals and
+    Jacobian at the same point in separate calls. A fit then costs one
+    factorization of the spectrum per iteration instead of one per
+    finite-difference step.
+
+    Args:
+        model (AffineLiouvillian): Compiled model, e.g. AffineLiouvillian.ladder.
+        element (tuple): (i, j) such that rho[i, j] is fitted.
+        sweep (str): Name of the swept model parameter.
+        values (np.ndarray): Sweep values at which data was taken.
+        data (np.ndarray): Measured spectrum.
+        p0 (dict): Fitted parameters and their initial values: model
+                   parameters (fitting the sweep parameter itself fits an
+                   offset of the sweep axis), keys of scales, 'amplitude'
+                   and 'offset'.
+        fixed (dict): Values of the other model parameters.
+        scales (dict): Fitted name -> (model parameter, factor) for fitting
+                       a quantity proportional to a model parameter, e.g.
+                       {'e_field': ('omega_c', 2 pi dip)} to fit the field in
+                       V/m instead of the Rabi frequency.
+        part (str): 'real', 'imag' or 'absorption' (= -imag) of rho_ij.
+        sigma (np.ndarray): Uncertainties of data, weighting the residuals.
+        bounds (dict): Fitted name -> (lower, upper).
+        cache_size (int): Number of parameter vectors memoized.
+        **least_squares_kwargs: Passed on to scipy.optimize.least_squares.
+
+    Returns:
+        dict: 'params' (fitted values), 'errors' (standard errors from the
+              Jacobian at the optimum), 'cost', 'n_evaluations' (distinct
+              factorizations of the spectrum) and 'result' (the
+              least_squares result).
+    """
+    from scipy.optimize import least_squares
+
+    fit_names = list(p0)
+    scales = dict(scales or {})
+    fixed = dict(fixed or {})
+    values = np.asarray(values, dtype=float)
+    data = np.asarray(data, dtype=float)
+    weight = 1. / np.asarray(sigma, dtype=float) if sigma is not None else np.ones_like(data)
+    sign = {'real': 1., 'imag': 1., 'absorption': -1.}[part]
+    take = np.real if part == 'real' else np.imag
+
+    # Model parameter and factor of each fitted name; amplitude and offset enter linearly
+    targets = {k: scales.get(k, (k, 1.)) for k in fit_names if k not in _linear_names}
+    wrt = sorted({name for name, _ in targets.values()})
+    unknown = set(wrt) - set(model.names)
+    if unknown : raise ValueError(f"Unknown model parameters: {sorted(unknown)}")
+
+    @lru_cache(maxsize=cache_size)
+    def evaluate(theta: tuple) -> tuple:
+        p = dict(zip(fit_names, theta))
+        params = dict(fixed)
+        params.setdefault(sweep, 0.)
+        for k, (name, factor) in targets.items():
+            params[name] = params.get(name, 0.) + factor * p[k] if name == sweep else factor * p[k]
+        params[sweep] = params[sweep] + values
+        rho_el, d_rho_el = steady_state_jacobian(model, element, wrt, **params)
+        amplitude = p.get('amplitude', 1.)
+        shape_y = sign * take(rho_el)
+        residuals = weight * (amplitude * shape_y + p.get('offset', 0.) - data)
+        jac = np.empty((data.shape[0], len(fit_names)))
+        for col, k in enumerate(fit_names):
+            if k == 'amplitude' : jac[:, col] = weight * shape_y
+            elif k == 'offset' : jac[:, col] = weight
+            else:
+                name, factor = targets[k]
+                jac[:, col] = weight * amplitude * factor * sign * take(d_rho_el[wrt.index(name)])
+        return residuals, jac
+
+    lower = [(bounds or {}).get(k, (-np.inf, np.inf))[0] for k in fit_names]
+    upper = [(bounds or {}).get(k, (-np.inf, np.inf))[1] for k in fit_names]
+    with stage('fit.least_squares'):
+        result = least_squares(lambda x: evaluate(tuple(x))[0], [p0[k] for k in fit_names],
+                               jac=lambda x: evaluate(tuple(x))[1], bounds=(lower, upper),
+                               **least_squares_kwargs)
+
+    # Standard errors from the Gauss-Newton covariance, scaled by the reduced chi-square
+    dof = max(data.shape[0] - len(fit_names), 1)
+    cov = np.linalg.pinv(result.jac.T @ result.jac) * (2. * result.cost / dof if sigma is None else 1.)
+    return {'params': dict(zip(fit_names, result.x)),
+            'errors': dict(zip(fit_names, np.sqrt(np.abs(np.diag(cov))))),
+            'cost': result.cost,
+            'n_evaluations': evaluate.cache_info().misses,
+            'result': result}
+
+
+def fit_ladder_spectrum(delta_p, absorption, gamma_eg: float, gamma_re: float, p0: dict,
+                        fixed: dict = None, **kwargs) -> dict:
+    """
+    Fit a probe absorption spectrum of the g-e-r ladder (see ladder_rho_ge),
+    e.g. to extract Rabi frequencies, the coupling detuning and laser
+    linewidths during acquisition.
+
+    Args:
+        delta_p (np.ndarray): Probe detunings of the data (rad/us).
+        absorption (np.ndarray): Measured absorption, i.e. proportional to -Im rho_ge.
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+        p0 (dict): Initial values of the fitted parameters, e.g.
+                   {'omega_c': ..., 'delta_c': ..., 'amplitude': ...}; see
+                   fit_steady_state.
+        fixed (dict): Values of the other ladder parameters, e.g. omega_p.
+        **kwargs: Further arguments of fit_steady_state.
+
+    Returns:
+        dict: As fit_steady_state.
+    """
+    fixed = dict(fixed or {})
+    linewidths = any(k.startswith('linewidth') for k in list(p0) + list(fixed))
+    model = AffineLiouvillian.ladder(gamma_eg, gamma_re, linewidths=linewidths)
+    return fit_steady_state(model, (1, 0), 'delta_p', delta_p, absorption, p0, fixed,
+                            part='absorption', **kwargs)
@@ -0,0 +1,162 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+# Per-stage [calls, total seconds] and event counters, filled only while enabled
+_stages = {}
+_counters = {}
+_enabled = False
+# JSON files written by the summary at exit, None until it is registered
+_exit_json_paths = None
+
+
+class _Stage:
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        entry = _stages.get(self.name)
+        if entry is None : _stages[self.name] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+class _NullStage:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_null_stage = _NullStage()
+
+
+def enable(flag: bool = True):
+    """ Switch the instrumentation on or off (see also RYDBERG_MB_PROFILE). """
+    global _enabled
+    _enabled = bool(flag)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """ Discard all recorded timings and counts. """
+    _stages.clear()
+    _counters.clear()
+
+
+def stage(name: str):
+    """
+    Context manager timing one pass through a named stage. Stages may nest,
+    each recording its inclusive time; when disabled a shared no-op object
+    is returned.
+    """
+    return _Stage(name) if _enabled else _null_stage
+
+
+def timed(name: str):
+    """ Decorator timing every call of a function as the stage name. """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled : return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, n: int = 1):
+    """
+    Increment a named counter. Counters named '<prefix>.hit' and
+    '<prefix>.miss' are reported together as the hit rate of <prefix>.
+    """
+    if _enabled : _counters[name] = _counters.get(name, 0) + n
+
+
+def report() -> dict:
+    """
+    Recorded data as a JSON-serializable dict with keys 'stages' (calls,
+    total_s and mean_s per stage), 'counters' and 'hit_rates'.
+    """
+    stages = {name: {'calls': calls, 'total_s': total, 'mean_s': total / calls}
+              for name, (calls, total) in _stages.items()}
+    hit_rates = {}
+    for name in _counters:
+        if not name.endswith('.hit') : continue
+        prefix = name[:-len('.hit')]
+        hits, misses = _counters[name], _counters.get(prefix + '.miss', 0)
+        hit_rates[prefix] = hits / (hits + misses)
+    for name in _counters:
+        prefix = name[:-len('.miss')]
+        if name.endswith('.miss') and prefix not in hit_rates : hit_rates[prefix] = 0.
+    return {'stages': stages, 'counters': dict(_counters), 'hit_rates': hit_rates}
+
+
+def summary() -> str:
+    """ Per-stage table of call counts, total and mean times, then counters and hit rates. """
+    data = report()
+    lines = [f"{'stage':<32} {'calls':>9} {'total (s)':>11} {'mean (ms)':>11}"]
+    for name, s in sorted(data['stages'].items(), key=lambda item: -item[1]['total_s']):
+        lines.append(f"{name:<32} {s['calls']:>9d} {s['total_s']:>11.4f} {1e3 * s['mean_s']:>11.4f}")
+    if data['counters']:
+        lines.append('')
+        lines.append(f"{'counter':<32} {'count':>9}")
+        for name, n in sorted(data['counters'].items()):
+            lines.append(f"{name:<32} {n:>9d}")
+    if data['hit_rates']:
+        lines.append('')
+        for name, rate in sorted(data['hit_rates'].items()):
+            lines.append(f"{name + ' hit rate':<32} {100. * rate:>8.1f}%")
+    return '\n'.join(lines)
+
+
+def export_json(path: str):
+    """ Write report() to a JSON file, e.g. for comparing runs. """
+    with open(path, 'w') as f:
+        json.dump(report(), f, indent=2, sort_keys=True)
+
+
+def _report_at_exit():
+    # An empty summary is not printed, but a requested JSON report is always written
+    if _stages or _counters : print(summary(), file=sys.stderr)
+    for path in _exit_json_paths : export_json(path)
+
+
+def report_at_exit(json_path: str = None):
+    """
+    Print the summary to stderr when the interpreter exits (once, however
+    often this is called, and only if anything was recorded) and optionally
+    export it to json_path, empty or not.
+    """
+    global _exit_json_paths
+    if _exit_json_paths is None:
+        _exit_json_paths = []
+        atexit.register(_report_at_exit)
+    if json_path : _exit_json_paths.append(json_path)
+
+
+# RYDBERG_MB_PROFILE=1 enables the instrumentation for the whole run and
+#  prints the summary at exit; a value ending in .json also exports it there
+_env = os.environ.get('RYDBERG_MB_PROFILE', '')
+if _env and _env != '0':
+    enable()
+    report_at_exit(_env if _env.endswith('.json') else None)
@@ -0,0 +1,203 @@
+import numpy as np
+import scipy.sparse as sps
+
+
+def projector(dim: int, a: int, b: int = None) -> np.ndarray:
+    """
+    Construct the outer product |a><b| in a dim-level basis.
+
+    Args:
+        dim (int): Hilbert space dimension.
+        a (int): Index of the ket.
+        b (int): Index of the bra; defaults to a (population projector).
+
+    Returns:
+        np.ndarray: Complex (dim, dim) array.
+    """
+    if b is None : b = a
+    op = np.zeros((dim, dim), dtype=complex)
+    op[a, b] = 1.
+    return op
+
+
+def sprepost(op_left: np.ndarray, op_right: np.ndarray) -> np.ndarray:
+    """
+    Superoperator of rho -> A rho B acting on column-stacked density matrices.
+
+    The column-stacking convention (vec index i + j*n for element (i, j)) is the
+    same as QuTiP's, so the superoperators built here may be compared directly
+    against qutip.liouvillian.
+
+    Args:
+        op_left (np.ndarray): Operator A of shape (..., n, n).
+        op_right (np.ndarray): Operator B of shape (..., n, n).
+
+    Returns:
+        np.ndarray: Superoperator of shape (..., n**2, n**2); leading batch
+                    dimensions of A and B are broadcast.
+    """
+    op_left = np.asarray(op_left)
+    op_right = np.asarray(op_right)
+    n = op_left.shape[-1]
+    sup = np.einsum('...ik,...lj->...jilk', op_left, op_right)
+    return sup.reshape(sup.shape[:-4] + (n * n, n * n))
+
+
+def spre(op: np.ndarray) -> np.ndarray:
+    """
+    Superoperator of left multiplication, rho -> A rho.
+
+    Args:
+        op (np.ndarray): Operator of shape (..., n, n).
+
+    Returns:
+        np.ndarray: Superoperator of shape (..., n**2, n**2).
+    """
+    return sprepost(op, np.eye(np.shape(op)[-1]))
+
+
+def spost(op: np.ndarray) -> np.ndarray:
+    """
+    Superoperator of right multiplication, rho -> rho A.
+
+    Args:
+        op (np.ndarray): Operator of shape (..., n, n).
+
+    Returns:
+        np.ndarray: Superoperator of shape (..., n**2, n**2).
+    """
+    return sprepost(np.eye(np.shape(op)[-1]), op)
+
+
+def lindblad_dissipator(c_op: np.ndarray) -> np.ndarray:
+    """
+    Superoperator of the dissipator D[c] defined in THEORY.md,
+    D[c] rho = c rho c^dag - (c^dag c rho + rho c^dag c) / 2.
+
+    Args:
+        c_op (np.ndarray): Collapse operator of shape (..., n, n); any rate
+                           is assumed to be absorbed into it (sqrt(Gamma) L).
+
+    Returns:
+        np.ndarray: Superoperator of shape (..., n**2, n**2).
+    """
+    c_op = np.asarray(c_op)
+    c_dag = np.conj(np.swapaxes(c_op, -1, -2))
+    cdc = c_dag @ c_op
+    return sprepost(c_op, c_dag) - .5 * spre(cdc) - .5 * spost(cdc)
+
+
+def liouvillian(hamiltonian: np.ndarray, c_ops=()) -> np.ndarray:
+    """
+    Assemble the Liouvillian of the master equation in THEORY.md,
+    d rho / dt = -i [H, rho] + sum_k D[c_k] rho.
+
+    Args:
+        hamiltonian (np.ndarray): Hamiltonian of shape (..., n, n), in angular
+                                  units (rad/us).
+        c_ops (iterable): Collapse operators, each of shape (n, n) or
+                          broadcastable against the Hamiltonian batch.
+
+    Returns:
+        np.ndarray: Liouvillian of shape (..., n**2, n**2).
+    """
+    hamiltonian = np.asarray(hamiltonian, dtype=complex)
+    liouv = -1j * (spre(hamiltonian) - spost(hamiltonian))
+    for c_op in c_ops:
+        liouv = liouv + lindblad_dissipator(c_op)
+    return liouv
+
+
+def sparse_liouvillian(hamiltonian, c_ops=()) -> sps.csr_matrix:
+    """
+    Sparse counterpart of liouvillian for large bases (e.g. HyperfineBasis),
+    in the same column-stacked convention, vec(A rho B) = (B^T kron A) vec(rho).
+    Being linear in H, it also maps Hamiltonian components to Liouvillian
+    components of an affine parameter sweep.
+
+    Args:
+        hamiltonian (sparse or np.ndarray): Hamiltonian (n, n) in rad/us.
+        c_ops (iterable): Sparse or dense (n, n) collapse operators.
+
+    Returns:
+        scipy.sparse.csr_matrix: Complex (n**2, n**2) Liouvillian.
+    """
+    hamiltonian = sps.csr_matrix(hamiltonian, dtype=complex)
+    eye = sps.identity(hamiltonian.shape[0], dtype=complex, format='csr')
+    liouv = -1j * (sps.kron(eye, hamiltonian) - sps.kron(hamiltonian.T, eye))
+    for c_op in c_ops:
+        c_op = sps.csr_matrix(c_op, dtype=complex)
+        cdc = c_op.conj().T @ c_op
+        liouv = liouv + sps.kron(c_op.conj(), c_op) - .5 * (sps.kron(eye, cdc) + sps.kron(cdc.T, eye))
+    return liouv.tocsr()
+
+
+def ladder_hamiltonian(delta_p, delta_c, omega_p, omega_c) -> np.ndarray:
+    """
+    Rotating-frame Hamiltonian of the g-e-r ladder used in exercises/eit_plots.py,
+    H = Omega_p/2 sigma^x_ge + Omega_c/2 sigma^x_er - Delta_p |e><e| - (Delta_p + Delta_c) |r><r|,
+    with basis ordering (g, e, r).
+
+    Args:
+        delta_p (float or np.ndarray): Probe detuning (rad/us).
+        delta_c (float or np.ndarray): Coupling detuning (rad/us).
+        omega_p (float or np.ndarray): Probe Rabi frequency (rad/us).
+        omega_c (float or np.ndarray): Coupling Rabi frequency (rad/us).
+
+    Returns:
+        np.ndarray: Complex array of shape (..., 3, 3), the leading dimensions
+                    being the broadcast shape of the four parameters.
+    """
+    delta_p, delta_c, omega_p, omega_c = np.broadcast_arrays(delta_p, delta_c, omega_p, omega_c)
+    ham = np.zeros(delta_p.shape + (3, 3), dtype=complex)
+    ham[..., 0, 1] = ham[..., 1, 0] = .5 * omega_p
+    ham[..., 1, 2] = ham[..., 2, 1] = .5 * omega_c
+    ham[..., 1, 1] = -delta_p
+    ham[..., 2, 2] = -(delta_p + delta_c)
+    return ham
+
+
+def ladder_collapse_ops(gamma_eg: float, gamma_re: float) -> list:
+    """
+    Collapse operators of the g-e-r ladder: decay |e> -> |g> and |r> -> |e>.
+
+    Args:
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+
+    Returns:
+        list: Two (3, 3) collapse operators sqrt(Gamma) |a><b|.
+    """
+    return [np.sqrt(gamma_eg) * projector(3, 0, 1),
+            np.sqrt(gamma_re) * projector(3, 1, 2)]
+
+
+def primary_hamiltonian(delta_p, delta_r1, delta_r2, omega_p, omega_c1, omega_c2) -> np.ndarray:
+    """
+    Rotating-frame Hamiltonian H' of THEORY.md on the primary states, with
+    basis ordering (g, e, r1, r2),
+    H' = -delta_p |e><e| - delta_r1 |r1><r1| - delta_r2 |r2><r2|
+         + Omega_ge,p/2 sigma^x_ge + Omega_er1,c/2 sigma^x_er1 + Omega_er2,c/2 sigma^x_er2.
+
+    Args:
+        delta_p (float or np.ndarray): Probe detuning delta_p (rad/us).
+        delta_r1 (float or np.ndarray): Rotating-frame detuning of |r1> (rad/us);
+                                        Delta_p + Delta_c in the ladder convention.
+        delta_r2 (float or np.ndarray): Rotating-frame detuning of |r2> (rad/us).
+        omega_p (float or np.ndarray): Probe Rabi frequency on g-e (rad/us).
+        omega_c1 (float or np.ndarray): Coupling Rabi frequency on e-r1 (rad/us).
+        omega_c2 (float or np.ndarray): Coupling Rabi frequency on e-r2 (rad/us).
+
+    Returns:
+        np.ndarray: Complex array of shape (..., 4, 4).
+    """
+    params = np.broadcast_arrays(delta_p, delta_r1, delta_r2, omega_p, omega_c1, omega_c2)
+    delta_p, delta_r1, delta_r2, omega_p, omega_c1, omega_c2 = params
+    ham = np.zeros(delta_p.shape + (4, 4), dtype=complex)
+    ham[..., 0, 1] = ham[..., 1, 0] = .5 * omega_p
+    ham[..., 1, 2] = ham[..., 2, 1] = .5 * omega_c1
+    ham[..., 1, 3] = ham[..., 3, 1] = .5 * omega_c2
+    ham[..., 1, 1] = -delta_p
+    ham[..., 2, 2] = -delta_r1
+    ham[..., 3, 3] = -delta_r2
+    return ham
@@ -0,0 +1,140 @@
+import numpy as np
+
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from fns.fns_evolution import rk4_step
+from fns.fns_instrument import timed
+
+
+def white_frequency_noise(linewidth: float):
+    """
+    One-sided power spectral density of white frequency noise producing a
+    Lorentzian line of the given FWHM, S(f) = FWHM_MHz / pi, as a callable for
+    frequency_noise. Its trajectory average reproduces the linewidth_p /
+    linewidth_c dephasing of AffineLiouvillian.ladder.
+
+    Args:
+        linewidth (float): Lorentzian laser linewidth (FWHM, rad/us).
+
+    Returns:
+        callable: f (MHz) -> S(f) (MHz**2 / MHz).
+    """
+    level = linewidth / (2. * np.pi ** 2)
+    return lambda f: np.full(np.shape(f), level)
+
+
+def frequency_noise(psd, n_samples: int, dt: float, n_traj: int, rng=None) -> np.ndarray:
+    """
+    Realizations of stationary Gaussian laser frequency noise with an
+    arbitrary spectrum, e.g. servo bumps or 1/f flicker noise, generated by
+    spectrally shaping white noise. Unlike the sum of randomly phased
+    exponentials in scripts/scratch.py, all realizations are drawn in one
+    FFT.
+
+    The noise is generated on twice the requested duration T and truncated,
+    so that the periodicity of the FFT does not correlate its beginning and
+    end. The real DC and Nyquist bins carry the full variance of their
+    frequency, so white noise is independent from sample to sample and its
+    accumulated phase variance grows as 2 pi**2 S t over the whole run.
+    Frequencies below the resolution 1 / (2T) are not represented: for a
+    spectrum diverging at f = 0, such as 1/f flicker noise, the DC bin is
+    dropped, which acts as a low-frequency cutoff at 1 / (2T), and
+    n_samples sets how much of the low-frequency noise is included.
+
+    Args:
+        psd (callable): One-sided PSD of the frequency excursion, f (MHz) ->
+                        S(f) (MHz**2 / MHz).
+        n_samples (int): Number of time samples.
+        dt (float): Sample spacing (us); the noise is constant over a sample.
+        n_traj (int): Number of realizations.
+        rng (np.random.Generator): Random number generator.
+
+    Returns:
+        np.ndarray: Angular frequency excursions (rad/us), (n_traj, n_samples).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n_fft = 2 * n_samples
+    f = np.fft.rfftfreq(n_fft, dt)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level = np.asarray(psd(f), dtype=float)
+    level[0] = level[0] if np.isfinite(level[0]) else 0.
+    sigma = np.sqrt(level * n_fft / (4. * dt))
+    # irfft keeps only the real part of the DC and Nyquist bins, which must hold all of their variance
+    sigma[0] *= np.sqrt(2.)
+    sigma[-1] *= np.sqrt(2.)
+    coeffs = sigma * (rng.standard_normal((n_traj, f.shape[0])) + 1j * rng.standard_normal((n_traj, f.shape[0])))
+    return 2. * np.pi * np.fft.irfft(coeffs, n=n_fft, axis=-1)[:, :n_samples]
+
+
+@timed('phase_noise.trajectories')
+def stochastic_rho(model: AffineLiouvillian, times: np.ndarray, element: tuple, noise: dict,
+                   n_traj: int, batch_size: int = 256, n_substeps: int = 1, rho0: np.ndarray = None,
+                   rng=None, **params) -> tuple:
+    """
+    Trajectory-averaged density-matrix element of a compiled model driven by
+    lasers with frequency noise, for spectra that a Lorentzian dephasing
+    rate cannot describe.
+
+    A frequency excursion of a laser is an added detuning, so each noise
+    source perturbs one detuning parameter of the model. The realizations of
+    a batch form one trailing axis of the state array, next to any parameter
+    axes, and are propagated together by RK4 with L x evaluated through
+    AffineLiouvillian.apply; the mean and variance are accumulated batch by
+    batch, so memory does not grow with n_traj.
+
+    Args:
+        model (AffineLiouvillian): Compiled model, e.g. AffineLiouvillian.ladder.
+        times (np.ndarray): Uniformly spaced output times (us).
+        element (tuple): (i, j) such that rho[i, j] is returned.
+        noise (dict): Parameter name -> PSD callable (see frequency_noise),
+                      e.g. {'delta_p': psd_p, 'delta_c': psd_c}.
+        n_traj (int): Number of noise realizations.
+        batch_size (int): Realizations propagated together.
+        n_substeps (int): RK4 steps per output interval, and noise samples
+                          per interval.
+        rho0 (np.ndarray): Initial density matrix; defaults to |0><0|.
+        rng (np.random.Generator): Random number generator.
+        **params: Model parameter values (scalars or arrays, broadcast against
+                  each other), the noiseless detunings among them.
+
+    Returns:
+        tuple: (mean, stderr), complex arrays of shape
+               (broadcast shape of params) + (len(times),), the trajectory
+               average of rho[i, j](t) and its standard error.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    times = np.asarray(times, dtype=float)
+    dt = (times[1] - times[0]) / n_substeps if times.shape[0] > 1 else 0.
+    n_steps = (times.shape[0] - 1) * n_substeps
+    n = model.dim
+    if rho0 is None:
+        rho0 = np.zeros((n, n), dtype=complex)
+        rho0[0, 0] = 1.
+    x0 = np.asarray(rho0, dtype=complex).reshape(-1, order='F')
+    idx = element[0] + element[1] * n
+
+    names = list(params)
+    values = np.broadcast_arrays(*(np.asarray(params[k], dtype=float) for k in names))
+    shape = values[0].shape if values else ()
+    fixed = {k: x[..., None] for k, x in zip(names, values)}
+    for k in noise:
+        if k not in fixed : fixed[k] = np.zeros(shape + (1,))
+
+    total = np.zeros(shape + (times.shape[0],), dtype=complex)
+    total_sq = np.zeros(shape + (times.shape[0],))
+    for start in range(0, n_traj, batch_size):
+        n_batch = min(batch_size, n_traj - start)
+        excursions = {k: frequency_noise(psd, max(n_steps, 1), dt, n_batch, rng) for k, psd in noise.items()}
+        x = np.broadcast_to(x0, shape + (n_batch, n ** 2)).copy()
+        record = np.empty(shape + (n_batch, times.shape[0]), dtype=complex)
+        record[..., 0] = x[..., idx]
+        for step in range(n_steps):
+            step_params = dict(fixed)
+            for k, dw in excursions.items() : step_params[k] = fixed[k] + dw[:, step]
+            x = rk4_step(lambda t, y: model.apply(y, **step_params), 0., x, dt)
+            if (step + 1) % n_substeps == 0 : record[..., (step + 1) // n_substeps] = x[..., idx]
+        total += record.sum(axis=-2)
+        total_sq += (np.abs(record) ** 2).sum(axis=-2)
+
+    mean = total / n_traj
+    var = np.maximum(total_sq / n_traj - np.abs(mean) ** 2, 0.)
+    return mean, np.sqrt(var / max(n_traj - 1, 1))
@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from fns.fns_doppler import doppler_detunings, wavenumber_rad_us
+from fns.fns_evolution import rk4_step
+
+h_planck = 6.62607e-34          # SI, J / Hz
+hbar_planck = h_planck / (2. * np.pi)   # SI, J / (rad/s)
+eps0_si = 8.854187817e-12       # C^2 / (J m)
+
+
+def propagation_coupling(density_m3: float, dip_mhz_v_m: float, wavelength_nm: float = 852.) -> float:
+    """
+    Coupling constant kappa of the probe field equation
+    d Omega_p / dz = -i kappa <rho_eg>, kappa = k N d**2 / (eps0 hbar).
+
+    In the weak-probe two-level limit the field decays as
+    exp(-kappa z / Gamma_eg) on resonance.
+
+    Args:
+        density_m3 (float): Atomic number density (m^-3).
+        dip_mhz_v_m (float): Probe transition dipole in MHz/(V/m), the unit
+                             used in transition_profiling.py.
+        wavelength_nm (float): Probe wavelength in nanometers.
+
+    Returns:
+        float: kappa in (rad/us) per metre.
+    """
+    dip_si = dip_mhz_v_m * 1e6 * h_planck
+    k_si = wavenumber_rad_us(wavelength_nm) * 1e6
+    return 1e-6 * k_si * density_m3 * dip_si ** 2 / (eps0_si * hbar_planck)
+
+
+def _interp_complex(t: float, times: np.ndarray, values: np.ndarray) -> complex:
+    values = np.asarray(values)
+    return np.interp(t, times, values.real) + 1j * np.interp(t, times, np.imag(values))
+
+
+def _open_output(out_dir: str, name: str, shape: tuple, dtype) -> np.ndarray:
+    if out_dir is None : return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(os.path.join(out_dir, name + '.npy'), mode='w+',
+                                     dtype=dtype, shape=shape)
+
+
+def propagate_probe(times: np.ndarray, omega_p_in: np.ndarray, omega_c_in: np.ndarray,
+                    z: np.ndarray, kappa: float, gamma_eg: float, gamma_re: float,
+                    delta_p: float = 0., delta_c: float = 0., velocities=(0.,), weights=(1.,),
+                    wavelength_p_nm: float = 852., wavelength_c_nm: float = 509.,
+                    counter_propagating: bool = True, n_substeps: int = 1,
+                    out_dir: str = None, chunk_size: int = 256, rho0: np.ndarray = None) -> dict:
+    """
+    Propagate a probe field through the vapour cell with the Maxwell-Bloch
+    equations of the g-e-r ladder, in the retarded time tau = t - z/c,
+        d rho(z, v) / d tau = L(Omega_p(z), Omega_c, Delta_p(v), Delta_c(v)) rho(z, v),
+        d Omega_p / dz = -i kappa sum_v w_v rho_eg(z, v).
+
+    All z-slices and velocity classes form one batched state array which is
+    advanced by RK4. At every stage the probe Rabi frequency along the cell
+    is obtained from the input field by a cumulative trapezoid over z, and
+    the Liouvillian action is taken from the compiled ladder template, so
+    no per-slice operators are ever built. The coupling field is taken as
+    undepleted.
+
+    Records are accumulated in chunks of chunk_size time samples and written
+    to .npy memory maps in out_dir (times, transmitted, populations), so
+    memory stays bounded for long pulses and fine z/t grids.
+
+    Args:
+        times (np.ndarray): Retarded-time samples (us) of the inputs and outputs.
+        omega_p_in (np.ndarray): Complex probe Rabi frequency entering the cell
+                                 at each sample (rad/us).
+        omega_c_in (np.ndarray): Coupling Rabi frequency at each sample (rad/us).
+        z (np.ndarray): Positions of the z-slices (m), starting at the entrance.
+        kappa (float): Field coupling constant (see propagation_coupling).
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+        delta_p (float): Lab-frame probe detuning (rad/us).
+        delta_c (float): Lab-frame coupling detuning (rad/us).
+        velocities (np.ndarray): Velocity classes (m/s), e.g. from doppler_quadrature.
+        weights (np.ndarray): Quadrature weights of the velocity classes.
+        wavelength_p_nm (float): Probe wavelength in nanometers.
+        wavelength_c_nm (float): Coupling wavelength in nanometers.
+        counter_propagating (bool): Whether the coupling beam counter-propagates
+                                    the probe.
+        n_substeps (int): RK4 steps between successive time samples.
+        out_dir (str): Directory receiving the streamed records; None keeps
+                       them in memory.
+        chunk_size (int): Time samples buffered between writes.
+        rho0 (np.ndarray): Initial column-stacked states (len(z), len(v), 9);
+                           defaults to all atoms in |g>.
+
+    Returns:
+        dict: 'times', 'transmitted' (complex Omega_p at the last slice) and
+              'populations' (velocity-averaged g, e, r populations per slice,
+              shape (len(times), len(z), 3)), as arrays or memory maps, plus
+              the final state 'rho' for continuation.
+    """
+    times = np.asarray(times, dtype=float)
+    z = np.asarray(z, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    model = AffineLiouvillian.ladder(gamma_eg, gamma_re, complex_probe=True)
+    delta_p_v, delta_c_v = doppler_detunings(delta_p, delta_c, velocities, wavelength_p_nm,
+                                             wavelength_c_nm, counter_propagating)
+    dz = np.diff(z)
+
+    def probe_field(t, x):
+        polarization = x[..., 1] @ weights
+        cumulative = np.concatenate([[0.], np.cumsum(.5 * (polarization[1:] + polarization[:-1]) * dz)])
+        return _interp_complex(t, times, omega_p_in) - 1j * kappa * cumulative
+
+    def rhs(t, x):
+        omega_p = probe_field(t, x)[:, None]
+        return model.apply(x, delta_p=delta_p_v, delta_c=delta_c_v, omega_p=omega_p.real,
+                           omega_p_im=omega_p.imag, omega_c=np.interp(t, times, np.real(omega_c_in)))
+
+    if rho0 is None:
+        rho0 = np.zeros((z.shape[0], velocities.shape[0], 9), dtype=complex)
+        rho0[..., 0] = 1.
+    x = np.array(rho0, dtype=complex)
+
+    if out_dir is not None : os.makedirs(out_dir, exist_ok=True)
+    n_t = times.shape[0]
+    out_times = _open_output(out_dir, 'times', (n_t,), float)
+    out_trans = _open_output(out_dir, 'transmitted', (n_t,), complex)
+    out_pops = _open_output(out_dir, 'populations', (n_t, z.shape[0], 3), float)
+    out_times[:] = times
+    buf_trans = np.empty(chunk_size, dtype=complex)
+    buf_pops = np.empty((chunk_size, z.shape[0], 3))
+
+    for n in range(n_t):
+        if n > 0:
+            dt = (times[n] - times[n - 1]) / n_substeps
+            for k in range(n_substeps):
+                x = rk4_step(rhs, times[n - 1] + k * dt, x, dt)
+        i_buf = n % chunk_size
+        buf_trans[i_buf] = probe_field(times[n], x)[-1]
+        buf_pops[i_buf] = np.einsum('zvk,v->zk', x[..., [0, 4, 8]].real, weights)
+        if i_buf == chunk_size - 1 or n == n_t - 1:
+            start = n - i_buf
+            out_trans[start:n + 1] = buf_trans[:i_buf + 1]
+            out_pops[start:n + 1] = buf_pops[:i_buf + 1]
+            for arr in (out_times, out_trans, out_pops):
+                if isinstance(arr, np.memmap) : arr.flush()
+
+    return {'times' : out_times, 'transmitted' : out_trans, 'populations' : out_pops, 'rho' : x}
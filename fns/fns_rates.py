@@ -0,0 +1,83 @@
+import numpy as np
+import scipy.sparse as sps
+
+c_light = 2.99792e8             # m / s
+h_planck = 6.62607e-34          # SI, J / Hz
+hbar_planck = h_planck / (2. * np.pi)   # SI, J / (rad/s)
+eps0_si = 8.854187817e-12       # C^2 / (J m)
+k_boltz = 1.3806e-23            # Boltzmann constant (J/K)
+
+joules_to_mhz = 1e-6 / h_planck
+
+
+def spontaneous_rates(delta_mhz, dip_mhz_v_m) -> np.ndarray:
+    """
+    Spontaneous emission rates omega**3 d**2 / (3 pi eps0 hbar c**3) of
+    dipole transitions, as computed row by row in transition_profiling.py.
+
+    Args:
+        delta_mhz (np.ndarray): Transition frequencies in MHz (either sign).
+        dip_mhz_v_m (np.ndarray): Dipole elements in MHz/(V/m).
+
+    Returns:
+        np.ndarray: Rates in us^-1.
+    """
+    omega_si = np.abs(np.asarray(delta_mhz, dtype=float)) * 1e6 * 2. * np.pi
+    dip_si = np.asarray(dip_mhz_v_m, dtype=float) / joules_to_mhz
+    return 1e-6 * omega_si ** 3 * dip_si ** 2 / (3. * np.pi * eps0_si * hbar_planck * c_light ** 3)
+
+
+def blackbody_occupation(delta_mhz, t_kelvin: float) -> np.ndarray:
+    """
+    Mean photon number 1 / (exp(h nu / k T) - 1) of the blackbody field at
+    the transition frequencies; zero at T = 0.
+
+    Args:
+        delta_mhz (np.ndarray): Transition frequencies in MHz (either sign).
+        t_kelvin (float): Temperature (K).
+
+    Returns:
+        np.ndarray: Occupation numbers.
+    """
+    delta_mhz = np.abs(np.asarray(delta_mhz, dtype=float))
+    if t_kelvin <= 0. : return np.zeros(delta_mhz.shape)
+    x = h_planck * delta_mhz * 1e6 / (k_boltz * t_kelvin)
+    with np.errstate(divide='ignore', over='ignore'):
+        return 1. / np.expm1(x)
+
+
+def rate_matrix(ids_a, ids_b, delta_mhz, dip_mhz_v_m, n_states: int,
+                t_kelvin: float = 0.) -> sps.csr_matrix:
+    """
+    Sparse decay matrix Gamma_ab (rate from |b> to |a>, us^-1) of the
+    Lindblad dissipator in THEORY.md, from spontaneous emission and, at
+    finite temperature, blackbody-stimulated emission and absorption.
+
+    For each transition between a lower state l and an upper state u with
+    spontaneous rate A and blackbody occupation n,
+        Gamma_lu = A (1 + n),    Gamma_ul = A n.
+    Transitions listed more than once (e.g. per polarization) add up.
+
+    Args:
+        ids_a (np.ndarray): State index of the first state of each transition,
+                            e.g. from StateTable.transition_ids.
+        ids_b (np.ndarray): State index of the second state of each transition.
+        delta_mhz (np.ndarray): E_b - E_a in MHz.
+        dip_mhz_v_m (np.ndarray): Dipole elements in MHz/(V/m).
+        n_states (int): Number of states N.
+        t_kelvin (float): Temperature of the blackbody field (K).
+
+    Returns:
+        scipy.sparse.csr_matrix: (N, N) matrix of rates, zero diagonal.
+    """
+    ids_a, ids_b = np.asarray(ids_a), np.asarray(ids_b)
+    delta_mhz = np.asarray(delta_mhz, dtype=float)
+    spont = spontaneous_rates(delta_mhz, dip_mhz_v_m)
+    occ = blackbody_occupation(delta_mhz, t_kelvin)
+    upper = np.where(delta_mhz > 0., ids_b, ids_a)
+    lower = np.where(delta_mhz > 0., ids_a, ids_b)
+    rows = np.concatenate([lower, upper])
+    cols = np.concatenate([upper, lower])
+    data = np.concatenate([spont * (1. + occ), spont * occ])
+    keep = data > 0.
+    return sps.csr_matrix((data[keep], (rows[keep], cols[keep])), shape=(n_states, n_states))
@@ -1,8 +1,5 @@
 import numpy as np
-import scipy as sp
-import qutip as qtp
 import re
-import pandas as pd
 
 def parse_spec_state(state_str):
     """
@@ -82,7 +79,7 @@ def dip_trans_type(state_a:tuple, state_b:tuple) -> tuple:
     else : return (True, int(mb - ma))
 
 
-def compare_transitions(ref_delta: float, trans_df: pd.DataFrame):
+def compare_transitions(ref_delta: float, trans_df):
     """
     Compare the transition differences between a reference energy delta and all other transitions in a DataFrame.
     Parameters:
@@ -91,13 +88,12 @@ def compare_transitions(ref_delta: float, trans_df: pd.DataFrame):
     Returns:
     pd.DataFrame: A DataFrame sorted by the absolute differences in 'delta' values between the reference transition and all other transitions.
     """
+    import pandas as pd
 
     ref_delta_abs = abs(ref_delta)
-    trans_diff_list = []
-    for _, row in trans_df.iterrows():
-        trans_diff_list.append(abs(abs(row['delta']) - ref_delta_abs))
+    trans_diff = np.abs(np.abs(trans_df['delta'].to_numpy()) - ref_delta_abs)
 
-    trans_diff_df = pd.DataFrame(trans_diff_list, index=trans_df.index, columns=['trans_diff'])
+    trans_diff_df = pd.DataFrame(trans_diff, index=trans_df.index, columns=['trans_diff'])
     return trans_diff_df.sort_values(by='trans_diff')
 
 
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def adaptive_spectrum(fn, x_min: float, x_max: float, atol: float = 0., rtol: float = 1e-3,
+                      n_initial: int = 65, seeds=(), max_points: int = 100000,
+                      min_width: float = None) -> tuple:
+    """
+    Sample a spectrum on a non-uniform grid refined only where needed.
+
+    Starting from a coarse uniform grid (plus any seed points, e.g. the
+    two-photon resonance of a narrow EIT window), the midpoint of every
+    interval still under test is evaluated, all in one batched call of fn
+    per pass. An interval is split further while its midpoint deviates from
+    the linear interpolant of its end points by more than
+    max(atol, rtol * max|y|), i.e. while the local curvature is unresolved
+    at the target tolerance. Refinement stops when all intervals pass, when
+    intervals reach min_width, or when max_points have been evaluated.
+
+    Features narrower than the initial spacing can only be found if they
+    straddle a sample, so n_initial or seeds should place at least one
+    point within each feature of interest.
+
+    Args:
+        fn (callable): Vectorized spectrum, mapping an array of abscissae to
+                       an array of (real or complex) values, e.g.
+                       lambda d: ladder_rho_ge(d, ...).imag.
+        x_min (float): Lower end of the sampled range.
+        x_max (float): Upper end of the sampled range.
+        atol (float): Absolute interpolation tolerance.
+        rtol (float): Interpolation tolerance relative to the peak |y|.
+        n_initial (int): Points of the initial uniform grid.
+        seeds (iterable): Additional initial abscissae.
+        max_points (int): Budget of function evaluations.
+        min_width (float): Narrowest interval that is split further; defaults
+                           to 1e-9 of the range.
+
+    Returns:
+        tuple: (x, y, n_solves) with the sorted non-uniform grid, the spectrum
+               values on it, and the number of points evaluated by fn.
+    """
+    if min_width is None : min_width = 1e-9 * (x_max - x_min)
+    seeds = np.asarray(seeds, dtype=float).ravel()
+    x = np.unique(np.concatenate([np.linspace(x_min, x_max, n_initial),
+                                  seeds[(seeds > x_min) & (seeds < x_max)]]))
+    y = np.asarray(fn(x))
+    n_solves = x.shape[0]
+
+    # active[i] flags the interval (x[i], x[i+1]) as still under test
+    active = np.ones(x.shape[0] - 1, dtype=bool)
+    while np.any(active) and n_solves < max_points:
+        idx = np.nonzero(active)[0][:max_points - n_solves]
+        mid = .5 * (x[idx] + x[idx + 1])
+        y_mid = np.asarray(fn(mid))
+        n_solves += mid.shape[0]
+
+        y_lin = .5 * (y[idx] + y[idx + 1])
+        tol = max(atol, rtol * max(np.abs(y).max(), np.abs(y_mid).max()))
+        split = (np.abs(y_mid - y_lin) > tol) & (x[idx + 1] - x[idx] > 2. * min_width)
+
+        # Both halves of a split interval remain under test
+        flags = np.zeros(x.shape[0], dtype=bool)
+        flags[idx] = split
+        x = np.concatenate([x, mid])
+        y = np.concatenate([y, y_mid])
+        flags = np.concatenate([flags, split])
+        order = np.argsort(x, kind='stable')
+        x, y, active = x[order], y[order], flags[order][:-1]
+
+    return x, y, n_solves
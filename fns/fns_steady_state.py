@@ -0,0 +1,328 @@
+import numpy as np
+import scipy.sparse as sps
+from scipy.sparse.linalg import spsolve
+
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from fns.fns_instrument import count, stage
+
+# Sweep length from which a 1D sweep is solved by the QZ-reduced shifted solver
+#  rather than by direct solves (the crossover is near 100 points for the ladder)
+shifted_min_points = 128
+
+
+def trace_row(dim: int) -> np.ndarray:
+    """
+    Row vector picking out Tr[rho] from a column-stacked density matrix.
+
+    Args:
+        dim (int): Hilbert space dimension n.
+
+    Returns:
+        np.ndarray: Real array of length n**2 with ones at the diagonal entries.
+    """
+    row = np.zeros(dim * dim)
+    row[::dim + 1] = 1.
+    return row
+
+
+def steady_state(liouv: np.ndarray) -> np.ndarray:
+    """
+    Solve a batch of steady-state problems L rho = 0, Tr[rho] = 1.
+
+    Following THEORY.md ("Steady-state solution"), the redundant population
+    equation for the first basis state is replaced by the trace condition,
+    leaving a square system which is solved by a single batched dense solve.
+
+    Args:
+        liouv (np.ndarray): Liouvillians of shape (..., n**2, n**2).
+
+    Returns:
+        np.ndarray: Steady-state density matrices of shape (..., n, n).
+    """
+    liouv = np.asarray(liouv, dtype=complex)
+    m = liouv.shape[-1]
+    n = int(round(np.sqrt(m)))
+    lhs = liouv.copy()
+    lhs[..., 0, :] = trace_row(n)
+    rhs = np.zeros(lhs.shape[:-1] + (1,), dtype=complex)
+    rhs[..., 0, 0] = 1.
+    vec = np.linalg.solve(lhs, rhs)[..., 0]
+    return np.swapaxes(vec.reshape(vec.shape[:-1] + (n, n)), -1, -2)
+
+
+def sparse_steady_state(liouv) -> np.ndarray:
+    """
+    Steady state of a single sparse Liouvillian (see sparse_liouvillian) by
+    one sparse LU solve, the first population equation being replaced by the
+    trace condition as in steady_state.
+
+    Args:
+        liouv (scipy.sparse matrix): Liouvillian of shape (n**2, n**2).
+
+    Returns:
+        np.ndarray: Steady-state density matrix of shape (n, n).
+    """
+    liouv = sps.csr_matrix(liouv, dtype=complex)
+    m = liouv.shape[-1]
+    n = int(round(np.sqrt(m)))
+    keep = np.ones(m)
+    keep[0] = 0.
+    trace = sps.csr_matrix((np.ones(n), (np.zeros(n, dtype=int), np.arange(n) * (n + 1))), shape=(m, m))
+    rhs = np.zeros(m, dtype=complex)
+    rhs[0] = 1.
+    with stage('steady_state.sparse_solve'):
+        vec = spsolve((sps.diags(keep) @ liouv + trace).tocsc(), rhs)
+    return vec.reshape(n, n).T
+
+
+def ladder_rho_ge(delta_p, delta_c, omega_p, omega_c, gamma_eg: float, gamma_re: float,
+                  chunk_size: int = 1 << 14, method: str = 'full', rtol: float = 1e-3,
+                  linewidth_p=0., linewidth_c=0.) -> np.ndarray:
+    """
+    Steady-state probe coherence of the g-e-r ladder for a batch of parameters.
+
+    All parameter arguments are broadcast against each other, so a probe sweep
+    for several Rabi-frequency sets is obtained by passing e.g.
+    omega_p[:, None] and delta_p[None, :]. The returned quantity is
+    Tr[rho sigma_ge] = <e|rho|g>, whose imaginary part is the probe absorption
+    plotted in exercises/eit_plots.py.
+
+    Args:
+        delta_p (float or np.ndarray): Probe detuning (rad/us).
+        delta_c (float or np.ndarray): Coupling detuning (rad/us).
+        omega_p (float or np.ndarray): Probe Rabi frequency (rad/us).
+        omega_c (float or np.ndarray): Coupling Rabi frequency (rad/us).
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+        chunk_size (int): Maximum number of points solved per batched call,
+                          bounding the memory held in stacked Liouvillians.
+        method (str): 'full' for the numerical steady state, 'analytic' for the
+                      weak-probe closed form (see weak_probe_rho_ge), or 'auto'
+                      for the closed form wherever its estimated relative error
+                      is below rtol and the full solution elsewhere.
+        rtol (float): Relative error accepted from the closed form in 'auto'.
+        linewidth_p (float or np.ndarray): Lorentzian probe laser linewidth (FWHM, rad/us).
+        linewidth_c (float or np.ndarray): Lorentzian coupling laser linewidth (FWHM, rad/us).
+
+    Returns:
+        np.ndarray: Complex array with the broadcast shape of the parameters.
+    """
+    if method not in ('full', 'analytic', 'auto') : raise ValueError(f"Unknown method: {method}")
+    params = {'delta_p': delta_p, 'delta_c': delta_c, 'omega_p': omega_p, 'omega_c': omega_c}
+    linewidths = np.any(linewidth_p) or np.any(linewidth_c)
+    if linewidths : params.update(linewidth_p=linewidth_p, linewidth_c=linewidth_c)
+    if method == 'full':
+        return sweep_rho(AffineLiouvillian.ladder(gamma_eg, gamma_re, linewidths=linewidths), (1, 0),
+                         chunk_size, **params)
+
+    rho_ge, rel_err = weak_probe_rho_ge(delta_p, delta_c, omega_p, omega_c, gamma_eg, gamma_re,
+                                        linewidth_p, linewidth_c)
+    count('weak_probe.points', rho_ge.size)
+    if method == 'auto':
+        redo = rel_err > rtol
+        count('weak_probe.fallback', int(np.count_nonzero(redo)))
+        if np.any(redo):
+            values = np.broadcast_arrays(*(np.asarray(x) for x in params.values()))
+            rho_ge[redo] = sweep_rho(AffineLiouvillian.ladder(gamma_eg, gamma_re, linewidths=linewidths),
+                                     (1, 0), chunk_size, **{k: x[redo] for k, x in zip(params, values)})
+    return rho_ge
+
+
+def weak_probe_rho_ge(delta_p, delta_c, omega_p, omega_c, gamma_eg: float, gamma_re: float,
+                      linewidth_p=0., linewidth_c=0.) -> tuple:
+    """
+    Closed-form probe coherence of the g-e-r ladder to first order in the
+    probe, with all population in |g> (see THEORY.md),
+        rho_eg = -i (Omega_p/2) / (Gamma_eg/2 - i Delta_p
+                                   + (Omega_c/2)**2 / (Gamma_re/2 - i (Delta_p + Delta_c))),
+        rho_rg = -i (Omega_c/2) rho_eg / (Gamma_re/2 - i (Delta_p + Delta_c)).
+
+    The leading correction is the saturation of the probe transition by the
+    second-order populations of |e> and |r>, which equal |rho_eg|**2 and
+    |rho_rg|**2 in the weak-probe limit; the relative error of rho_eg is
+    estimated as 2 (|rho_eg|**2 + |rho_rg|**2). Lorentzian laser linewidths
+    add to the coherence damping as in AffineLiouvillian.ladder, i.e.
+    Gamma_eg -> Gamma_eg + linewidth_p and
+    Gamma_re -> Gamma_re + linewidth_p + linewidth_c.
+
+    Args:
+        delta_p (float or np.ndarray): Probe detuning (rad/us).
+        delta_c (float or np.ndarray): Coupling detuning (rad/us).
+        omega_p (float or np.ndarray): Probe Rabi frequency (rad/us).
+        omega_c (float or np.ndarray): Coupling Rabi frequency (rad/us).
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (float): Decay rate from |r> to |e> (rad/us).
+        linewidth_p (float or np.ndarray): Lorentzian probe laser linewidth (FWHM, rad/us).
+        linewidth_c (float or np.ndarray): Lorentzian coupling laser linewidth (FWHM, rad/us).
+
+    Returns:
+        tuple: (rho_ge, rel_err), complex coherences and their estimated
+               relative errors, with the broadcast shape of the parameters.
+    """
+    delta_p, delta_c, omega_p, omega_c = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in
+                                                               (delta_p, delta_c, omega_p, omega_c)))
+    two_photon = .5 * (gamma_re + linewidth_p + linewidth_c) - 1j * (delta_p + delta_c)
+    one_photon = .5 * (gamma_eg + linewidth_p) - 1j * delta_p
+    rho_eg = -.5j * omega_p / (one_photon + (.5 * omega_c) ** 2 / two_photon)
+    rho_rg = -.5j * omega_c * rho_eg / two_photon
+    return np.asarray(rho_eg), np.asarray(2. * (np.abs(rho_eg) ** 2 + np.abs(rho_rg) ** 2))
+
+
+def sweep_rho(model: AffineLiouvillian, element: tuple, chunk_size: int = 1 << 14, **params) -> np.ndarray:
+    """
+    Steady-state density-matrix element of a compiled model over a batch of
+    parameter values.
+
+    Liouvillians are evaluated chunk by chunk into one reused buffer and
+    each chunk is solved by a single batched dense solve. Where the batch
+    holds one-dimensional sweeps of a single parameter, i.e. an axis of at
+    least shifted_min_points values along which no other parameter varies
+    (e.g. delta_p[None, :] against omega_p[:, None]), each sweep is instead
+    solved by line_sweep_rho, which falls back to direct solves itself
+    where needed.
+
+    Args:
+        model (AffineLiouvillian): Compiled model.
+        element (tuple): (i, j) such that rho[i, j] is returned.
+        chunk_size (int): Maximum number of points solved per batched call,
+                          bounding the memory held in stacked Liouvillians.
+        **params: Model parameter values, broadcast against each other.
+
+    Returns:
+        np.ndarray: Complex array with the broadcast shape of the parameters.
+    """
+    names = list(params)
+    values = np.broadcast_arrays(*(np.asarray(params[k]) for k in names))
+    shape = values[0].shape if values else ()
+    sweep = _sweep_axis([np.shape(params[k]) for k in names], shape)
+    if sweep is not None:
+        index, axis = sweep
+        moved = [np.moveaxis(x, axis, -1) for x in values]
+        lines = {k: (0. if i == index else x[..., 0]) for i, (k, x) in enumerate(zip(names, moved))}
+        return np.moveaxis(line_sweep_rho(model, element, names[index], moved[index], **lines), -1, axis)
+    flat = [np.ravel(x) for x in values]
+    n_points = int(np.prod(shape))
+
+    rho_el = np.empty(n_points, dtype=complex)
+    buf = np.empty((min(chunk_size, n_points),) + model.base.shape, dtype=complex)
+    for start in range(0, n_points, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        n_chunk = min(chunk_size, n_points - start)
+        with stage('liouvillian.assemble'):
+            liouv = model.evaluate(out=buf[:n_chunk], **{k: x[chunk] for k, x in zip(names, flat)})
+        with stage('steady_state.solve'):
+            rho_el[chunk] = steady_state(liouv)[:, element[0], element[1]]
+    count('steady_state.points', n_points)
+
+    return rho_el.reshape(shape)
+
+
+def _sweep_axis(shapes: list, shape: tuple):
+    """
+    (parameter index, axis) of the longest axis of the broadcast shape along
+    which a single parameter varies, if it has at least shifted_min_points
+    values; None otherwise.
+    """
+    best = None
+    for axis in range(len(shape)):
+        if shape[axis] < shifted_min_points : continue
+        varying = [i for i, s in enumerate(shapes)
+                   if len(shape) - axis <= len(s) and s[axis - len(shape)] > 1]
+        if len(varying) == 1 and (best is None or shape[axis] > shape[best[1]]):
+            best = (varying[0], axis)
+    return best
+
+
+def line_sweep_rho(model: AffineLiouvillian, element: tuple, direction, values, **params) -> np.ndarray:
+    """
+    Steady-state density-matrix element along lines in parameter space,
+    p + s d for the sweep values s of each line, e.g. the velocity classes
+    of a Doppler average, along which both detunings shift linearly in v.
+    Every line is solved by shifted_steady_state.
+
+    Args:
+        model (AffineLiouvillian): Compiled model.
+        element (tuple): (i, j) such that rho[i, j] is returned.
+        direction (str or dict): Swept parameter, or parameter name ->
+                                 coefficient d_k of the direction.
+        values (np.ndarray): Sweep values s, of shape (..., n_values), the
+                             leading axes broadcast against the parameters.
+        **params: Model parameter values p at s = 0, one set per line.
+
+    Returns:
+        np.ndarray: Complex array of shape (broadcast line shape) + (n_values,).
+    """
+    values = np.asarray(values, dtype=float)
+    names = list(params)
+    arrays = np.broadcast_arrays(values[..., 0], *(np.asarray(params[k]) for k in names))
+    shape = arrays[0].shape
+    sweeps = np.broadcast_to(values, shape + values.shape[-1:]).reshape(-1, values.shape[-1])
+    lines = [x.ravel() for x in arrays[1:]]
+    rho_el = np.empty(sweeps.shape, dtype=complex)
+    with stage('steady_state.shifted'):
+        for g in range(sweeps.shape[0]):
+            rho = shifted_steady_state(model, direction, sweeps[g], **{k: x[g] for k, x in zip(names, lines)})
+            rho_el[g] = rho[:, element[0], element[1]]
+    count('steady_state.shifted_points', rho_el.size)
+    return rho_el.reshape(shape + values.shape[-1:])
+
+
+def shifted_steady_state(model: AffineLiouvillian, sweep, values, rtol: float = 1e-9,
+                         **fixed) -> np.ndarray:
+    """
+    Steady states along a one-dimensional sweep of a single model parameter,
+    or along a line p + s d in parameter space.
+
+    With the remaining parameters fixed, the trace-augmented steady-state
+    system is (A + s B) x = b for every sweep value s, B = sum_k d_k L_k. The pencil (A, B) is
+    reduced once by a complex generalized Schur (QZ) decomposition,
+    A = Q S Z^H and B = Q T Z^H with S and T upper triangular, after which
+    each point costs a single triangular solve (S + s T) y = Q^H b, x = Z y,
+    i.e. O(n**2) instead of the O(n**3) of a fresh factorization. All points
+    are back-substituted together. Points whose residual exceeds rtol
+    (relative), where the shifted triangle is poorly conditioned, fall back
+    to direct solves.
+
+    Args:
+        model (AffineLiouvillian): Compiled model.
+        sweep (str or dict): Name of the swept parameter, e.g. 'delta_p', or
+                             parameter name -> coefficient d_k of the direction.
+        values (np.ndarray): Sweep values, one-dimensional.
+        rtol (float): Relative residual above which a point is re-solved directly.
+        **fixed: Scalar values of the other model parameters (of all
+                 parameters at s = 0 for a direction).
+
+    Returns:
+        np.ndarray: Steady-state density matrices of shape (len(values), n, n).
+    """
+    from scipy.linalg import qz
+
+    values = np.asarray(values, dtype=float).ravel()
+    n = model.dim
+    lhs = model.evaluate(**fixed).copy()
+    if not isinstance(sweep, dict) : sweep = {sweep: 1.}
+    shift = sum(d * model.component(k) for k, d in sweep.items()).astype(complex)
+    lhs[0, :] = trace_row(n)
+    shift[0, :] = 0.
+    rhs = np.zeros(n * n, dtype=complex)
+    rhs[0] = 1.
+
+    s_tri, t_tri, q_mat, z_mat = qz(lhs, shift, output='complex')
+    c_vec = q_mat.conj().T @ rhs
+
+    # Batched back-substitution of (S + s T) y = c over all sweep values
+    y = np.zeros((values.shape[0], n * n), dtype=complex)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(n * n - 1, -1, -1):
+            row = s_tri[i, i + 1:] + values[:, None] * t_tri[i, i + 1:]
+            y[:, i] = (c_vec[i] - np.sum(row * y[:, i + 1:], axis=1)) / (s_tri[i, i] + values * t_tri[i, i])
+        x = y @ z_mat.T
+
+        # Fall back to direct solves where the reduced system was ill-conditioned
+        resid = x @ lhs.T + values[:, None] * (x @ shift.T) - rhs
+        scale = (np.linalg.norm(lhs) + np.abs(values) * np.linalg.norm(shift)) * np.linalg.norm(x, axis=1)
+        bad = ~(np.linalg.norm(resid, axis=1) <= rtol * scale)
+    if np.any(bad):
+        x[bad] = np.linalg.solve(lhs + values[bad, None, None] * shift, rhs[None, :, None].repeat(bad.sum(), 0))[..., 0]
+
+    return np.swapaxes(x.reshape(-1, n, n), -1, -2)
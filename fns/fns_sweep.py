@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def parameter_grid(**axes) -> dict:
+    """
+    Flatten the outer product of named parameter axes into columns.
+
+    Args:
+        **axes: Parameter name -> 1-D sequence of values (numbers or strings,
+                e.g. Rydberg level labels).
+
+    Returns:
+        dict: Parameter name -> 1-D array of length prod(len(axis)), in C
+              order of the axes as given.
+    """
+    values = [np.asarray(v).ravel() for v in axes.values()]
+    mesh = np.meshgrid(*values, indexing='ij')
+    return {k: m.ravel() for k, m in zip(axes, mesh)}
+
+
+def _chunk_path(out_dir: str, i_chunk: int) -> str:
+    return os.path.join(out_dir, f'chunk_{i_chunk:06d}.npz')
+
+
+def _grid_manifest(grid: dict, chunk_size: int) -> dict:
+    digest = hashlib.sha256()
+    for k, v in grid.items():
+        digest.update(k.encode())
+        digest.update(np.ascontiguousarray(v).tobytes())
+    return {'n_points' : int(next(iter(grid.values())).shape[0]) if grid else 0,
+            'chunk_size' : int(chunk_size),
+            'columns' : list(grid),
+            'digest' : digest.hexdigest()}
+
+
+def _save_chunk(path: str, columns: dict):
+    # Write-then-rename, so an interrupted run never leaves a partial chunk
+    tmp = path[:-len('.npz')] + '.tmp.npz'
+    np.savez(tmp, **columns)
+    os.replace(tmp, path)
+
+
+def _run_chunk(fn, chunk: dict, constants: dict) -> dict:
+    result = fn(chunk, **constants)
+    if not isinstance(result, dict) : result = {'result' : result}
+    return {k: np.asarray(v) for k, v in result.items()}
+
+
+def run_sweep(fn, grid: dict, out_dir: str, chunk_size: int = 1024, n_workers: int = None,
+              constants: dict = None, verbose: bool = True) -> int:
+    """
+    Evaluate fn over a parameter grid in chunks spread across a process pool,
+    checkpointing every finished chunk to out_dir.
+
+    Each chunk is written as soon as it arrives to chunk_NNNNNN.npz, holding
+    the chunk's parameter columns next to its result columns. A manifest
+    records the grid; rerunning with the same grid and chunk_size resumes the
+    sweep, skipping every chunk already on disk. A different grid in an
+    existing out_dir raises a ValueError rather than mixing results.
+
+    Args:
+        fn (callable): Module-level (picklable) function fn(chunk, **constants)
+                       mapping a dict of parameter arrays to a result array or
+                       a dict of result arrays, each with a leading axis of the
+                       chunk length.
+        grid (dict): Parameter name -> 1-D column, e.g. from parameter_grid.
+        out_dir (str): Checkpoint directory.
+        chunk_size (int): Points per chunk, i.e. per task and per file.
+        n_workers (int): Worker processes; None uses all cores, 1 runs in-process.
+        constants (dict): Picklable keyword arguments passed to every call of fn,
+                          e.g. decay rates looked up once from ARC.
+        verbose (bool): Whether to print progress.
+
+    Returns:
+        int: Number of chunks computed in this call.
+    """
+    constants = constants or {}
+    grid = {k: np.asarray(v).ravel() for k, v in grid.items()}
+    manifest = _grid_manifest(grid, chunk_size)
+    n_points = manifest['n_points']
+    n_chunks = -(-n_points // chunk_size)
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) != manifest:
+                raise ValueError(f"{out_dir} holds a sweep over a different grid")
+    else:
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+    pending = [i for i in range(n_chunks) if not os.path.exists(_chunk_path(out_dir, i))]
+    if verbose : print(f"Sweep of {n_points} points: {n_chunks - len(pending)}/{n_chunks} chunks on disk")
+
+    def chunk_columns(i_chunk):
+        return {k: v[i_chunk * chunk_size:(i_chunk + 1) * chunk_size] for k, v in grid.items()}
+
+    def store(i_chunk, result, n_done):
+        _save_chunk(_chunk_path(out_dir, i_chunk), {**chunk_columns(i_chunk), **result})
+        if verbose : print(f"  chunk {i_chunk} done ({n_done}/{len(pending)})")
+
+    if n_workers == 1:
+        for n_done, i_chunk in enumerate(pending, 1):
+            store(i_chunk, _run_chunk(fn, chunk_columns(i_chunk), constants), n_done)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {pool.submit(_run_chunk, fn, chunk_columns(i), constants): i for i in pending}
+            for n_done, future in enumerate(as_completed(futures), 1):
+                store(futures[future], future.result(), n_done)
+
+    return len(pending)
+
+
+def load_sweep(out_dir: str, allow_partial: bool = False) -> dict:
+    """
+    Gather a checkpointed sweep into columns.
+
+    Args:
+        out_dir (str): Checkpoint directory of run_sweep.
+        allow_partial (bool): Whether to return the finished chunks of an
+                              incomplete sweep instead of raising.
+
+    Returns:
+        dict: Column name -> array over all (finished) points, parameters and
+              results alike, in grid order.
+    """
+    with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    n_chunks = -(-manifest['n_points'] // manifest['chunk_size'])
+    paths = [_chunk_path(out_dir, i) for i in range(n_chunks)]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing and not allow_partial:
+        raise ValueError(f"Sweep in {out_dir} is incomplete: {len(missing)}/{n_chunks} chunks missing")
+
+    parts = []
+    for p in paths:
+        if os.path.exists(p):
+            with np.load(p) as data:
+                parts.append({k: data[k] for k in data.files})
+    if not parts : return {}
+    return {k: np.concatenate([part[k] for part in parts]) for k in parts[0]}
@@ -0,0 +1,95 @@
+import numpy as np
+
+from fns.fns_instrument import timed
+
+transition_dtype = np.dtype([
+    ('n_a', int), ('l_a', int), ('j_a', float), ('mj_a', float),
+    ('n_b', int), ('l_b', int), ('j_b', float), ('mj_b', float),
+    ('dip_type', int)])
+
+
+def nlj_levels(nmin: int, nmax: int, lmax: int) -> tuple:
+    """
+    Fine-structure levels (n, l, j) in the order of AtomicNLJMIterator(iter_mj=False).
+
+    Args:
+        nmin (int): Minimum principal quantum number.
+        nmax (int): Maximum principal quantum number.
+        lmax (int): Maximum orbital quantum number.
+
+    Returns:
+        tuple: (n, l, j) arrays of equal length.
+    """
+    n_lvl, l_lvl, j_lvl = [], [], []
+    for l in range(lmax + 1):
+        n_vals = np.arange(max(nmin, l + 1), nmax + 1)
+        for j in ((l - .5, l + .5) if l > 0 else (.5,)):
+            n_lvl.append(n_vals)
+            l_lvl.append(np.full(n_vals.shape, l))
+            j_lvl.append(np.full(n_vals.shape, j))
+    n_lvl, l_lvl, j_lvl = (np.concatenate(x) for x in (n_lvl, l_lvl, j_lvl))
+    order = np.lexsort((j_lvl, l_lvl, n_lvl))
+    return n_lvl[order], l_lvl[order], j_lvl[order]
+
+
+def _mj_pairs(j_a: float, j_b: float) -> np.ndarray:
+    """
+    All (mj_a, mj_b) with |mj_a - mj_b| <= 1 for the given pair of j values.
+    """
+    mj_a = np.arange(-j_a, j_a + 1.)
+    pairs = [(ma, ma + q) for ma in mj_a for q in (-1., 0., 1.) if abs(ma + q) <= j_b]
+    return np.array(pairs).reshape(-1, 2)
+
+
+@timed('transitions.enumerate')
+def dipole_transitions(nmin: int, nmax: int, lmax: int) -> np.ndarray:
+    """
+    Enumerate the dipole-permitted transitions between (n, l, j, m_j) states.
+
+    Transitions are generated directly from the selection rules
+    Delta l = +1, |Delta j| <= 1, |Delta m_j| <= 1 (see transition_profiling.py)
+    rather than by testing every pair of states with dip_trans_type, so the
+    cost is linear in the number of allowed transitions. Each transition is
+    stored once, with l_b = l_a + 1, and the rows are ordered exactly as the
+    double loop over AtomicNLJMIterator would produce them.
+
+    Args:
+        nmin (int): Minimum principal quantum number.
+        nmax (int): Maximum principal quantum number.
+        lmax (int): Maximum orbital quantum number.
+
+    Returns:
+        np.ndarray: Structured array of dtype transition_dtype with fields
+                    n_a, l_a, j_a, mj_a, n_b, l_b, j_b, mj_b and
+                    dip_type = mj_b - mj_a (-1 : left / 0 : linear / 1 : right).
+    """
+    n_lvl, l_lvl, j_lvl = nlj_levels(nmin, nmax, lmax)
+
+    # Rank of each (n, l, j, m_j) state in iterator order, used to sort the rows
+    lvl_offset = np.concatenate([[0], np.cumsum(2. * j_lvl + 1.)]).astype(np.int64)
+    n_states = lvl_offset[-1]
+
+    blocks, keys = [], []
+    for l_a in range(lmax):
+        for j_a in ((l_a - .5, l_a + .5) if l_a > 0 else (.5,)):
+            for j_b in (l_a + .5, l_a + 1.5):
+                if abs(j_a - j_b) > 1 : continue
+                lvl_a = np.nonzero((l_lvl == l_a) & (j_lvl == j_a))[0]
+                lvl_b = np.nonzero((l_lvl == l_a + 1) & (j_lvl == j_b))[0]
+                n_a, n_b = n_lvl[lvl_a], n_lvl[lvl_b]
+                mj = _mj_pairs(j_a, j_b)
+                block = np.empty((n_a.shape[0], n_b.shape[0], mj.shape[0]), dtype=transition_dtype)
+                block['n_a'] = n_a[:, None, None]
+                block['n_b'] = n_b[None, :, None]
+                block['l_a'], block['l_b'] = l_a, l_a + 1
+                block['j_a'], block['j_b'] = j_a, j_b
+                block['mj_a'], block['mj_b'] = mj[:, 0], mj[:, 1]
+                blocks.append(block.ravel())
+                rank_a = lvl_offset[lvl_a][:, None, None] + (mj[:, 0] + j_a).astype(np.int64)
+                rank_b = lvl_offset[lvl_b][None, :, None] + (mj[:, 1] + j_b).astype(np.int64)
+                keys.append((rank_a * n_states + rank_b).ravel())
+
+    if not blocks : return np.empty(0, dtype=transition_dtype)
+    trans = np.concatenate(blocks)[np.argsort(np.concatenate(keys))]
+    trans['dip_type'] = (trans['mj_b'] - trans['mj_a']).astype(int)
+    return trans
@@ -0,0 +1,174 @@
+import heapq
+
+import numpy as np
+import scipy.sparse as sps
+from scipy.sparse.linalg import spsolve
+
+
+def leakage_populations(gamma, primary, pop_primary=None, gamma_floor: float = 1e-3) -> np.ndarray:
+    """
+    Steady-state populations of all non-primary states in the weak-leakage
+    limit, where the primary populations act as fixed sources.
+
+    With Gamma_ab the rate from |b> to |a>, every peripheral population
+    obeys Gamma_a p_a = sum_b Gamma_ab p_b, i.e. the sparse M-matrix system
+        (diag(Gamma_R) - Gamma_RR) p_R = Gamma_RP p_P
+    over the peripheral set R, which also covers cascades and any upward
+    (blackbody) rates.
+
+    Args:
+        gamma (sparse or np.ndarray): Rates Gamma_ab from |b> to |a> (rad/us), (N, N).
+        primary (iterable): Indices of the primary (laser-coupled) states.
+        pop_primary (np.ndarray): Populations of the primary states; defaults
+                                  to one each, a conservative upper bound.
+        gamma_floor (float): Minimum loss rate of any state (rad/us), e.g. the
+                             transit-time rate, keeping states without decay
+                             channels in the basis from accumulating
+                             unbounded population.
+
+    Returns:
+        np.ndarray: Populations of all N states, the primary entries being
+                    pop_primary.
+    """
+    gamma = sps.csr_matrix(gamma, dtype=float)
+    gamma.setdiag(0.)
+    gamma.eliminate_zeros()
+    n_states = gamma.shape[0]
+    primary = np.asarray(primary, dtype=int)
+    pop_primary = np.ones(primary.shape[0]) if pop_primary is None else np.asarray(pop_primary, dtype=float)
+
+    periph = np.setdiff1d(np.arange(n_states), primary)
+    gamma_out = np.maximum(np.asarray(gamma.sum(axis=0)).ravel(), gamma_floor)
+    lhs = sps.diags(gamma_out[periph]) - gamma[periph][:, periph]
+    rhs = gamma[periph][:, primary] @ pop_primary
+
+    pops = np.zeros(n_states)
+    pops[primary] = pop_primary
+    if periph.shape[0] : pops[periph] = np.atleast_1d(spsolve(lhs.tocsc(), rhs))
+    return pops
+
+
+def laser_admixtures(ids_a, ids_b, rabi, detuning, gamma_out) -> sps.csr_matrix:
+    """
+    Off-resonant admixture of states coupled by the lasers, the steady-state
+    population ratio (Omega/2)**2 / (Delta**2 + (Gamma/2)**2) of a weakly
+    driven transition, with Gamma the summed decay rate of both states.
+
+    Args:
+        ids_a (np.ndarray): State index of the lower state of each coupled transition.
+        ids_b (np.ndarray): State index of the upper state of each coupled transition.
+        rabi (np.ndarray): Rabi frequency of the laser on each transition (rad/us).
+        detuning (np.ndarray): Laser detuning from each transition (rad/us).
+        gamma_out (np.ndarray): Total decay rate of every state (rad/us).
+
+    Returns:
+        scipy.sparse.csr_matrix: Symmetric (N, N) matrix s whose entry (a, b)
+                                 is the population fraction of |a> driven
+                                 into |b>.
+    """
+    ids_a, ids_b = np.asarray(ids_a), np.asarray(ids_b)
+    # Damping rate of the coherence, Gamma / 2
+    width = .5 * (gamma_out[ids_a] + gamma_out[ids_b])
+    ratio = (.5 * np.asarray(rabi)) ** 2 / (np.asarray(detuning) ** 2 + width ** 2)
+    n_states = gamma_out.shape[0]
+    return sps.csr_matrix((np.concatenate([ratio, ratio]), (np.concatenate([ids_b, ids_a]),
+                                                          np.concatenate([ids_a, ids_b]))),
+                          shape=(n_states, n_states))
+
+
+def truncate_basis(gamma, primary, tol: float = 1e-4, pop_primary=None, admixtures=None,
+                   gamma_floor: float = 1e-3, max_states: int = None) -> tuple:
+    """
+    Smallest connected basis around the primary states (g, e, r1, r2, ...)
+    whose omitted states carry an estimated total population below tol.
+    Solving on this basis (with reduced_gamma) changes the primary density
+    matrix by an amount of the same order as that omitted population.
+
+    Populations of all states are estimated once by leakage_populations,
+    plus the laser admixtures of states near-resonantly coupled to any
+    populated state. The basis then grows from the primaries by a
+    best-first walk over the decay and laser-coupling graph: among the
+    states fed directly by the basis, the most populated is added, until the
+    estimated population of everything left out falls below tol. Since a
+    state is only reachable through its feeders, a long-lived state behind a
+    short-lived one is picked up once its feeder has been added.
+
+    Args:
+        gamma (sparse or np.ndarray): Rates Gamma_ab from |b> to |a> (rad/us), (N, N),
+                                      e.g. for the StateTable levels or states.
+        primary (iterable): Indices of the primary states.
+        tol (float): Bound on the total population of the omitted states.
+        pop_primary (np.ndarray): Populations of the primary states (see
+                                  leakage_populations).
+        admixtures (sparse matrix): Laser admixture fractions (see laser_admixtures).
+        gamma_floor (float): Minimum loss rate of any state (rad/us).
+        max_states (int): Hard limit on the basis size.
+
+    Returns:
+        tuple: (kept, excluded_population, pops): the basis as state indices,
+               primaries first and then in order of inclusion; the estimated
+               total population of the omitted states (exact to leading
+               order in the leakage for exact pop_primary); and the
+               estimated populations of all N states.
+    """
+    gamma = sps.csr_matrix(gamma, dtype=float)
+    n_states = gamma.shape[0]
+    primary = [int(p) for p in primary]
+    pops = leakage_populations(gamma, primary, pop_primary, gamma_floor)
+    links = (gamma + gamma.T).tocsr()
+    if admixtures is not None:
+        admixtures = sps.csr_matrix(admixtures)
+        pops = pops + admixtures @ pops
+        links = (links + admixtures).tocsr()
+
+    kept = list(primary)
+    in_basis = np.zeros(n_states, dtype=bool)
+    in_basis[primary] = True
+    excluded = pops[~in_basis].sum()
+    queued = in_basis.copy()
+    frontier = []
+
+    def push_neighbours(state):
+        for nb in links.indices[links.indptr[state]:links.indptr[state + 1]]:
+            if not queued[nb]:
+                queued[nb] = True
+                heapq.heappush(frontier, (-pops[nb], int(nb)))
+
+    for state in primary : push_neighbours(state)
+    max_states = n_states if max_states is None else max_states
+    while excluded > tol and frontier and len(kept) < max_states:
+        _, state = heapq.heappop(frontier)
+        kept.append(state)
+        in_basis[state] = True
+        excluded -= pops[state]
+        push_neighbours(state)
+
+    return np.array(kept), max(excluded, 0.), pops
+
+
+def reduced_gamma(gamma, kept, sink: int = 0) -> sps.csr_matrix:
+    """
+    Rate matrix restricted to the basis kept, in its order, as needed by
+    PartitionedBlochModel (primaries first).
+
+    Decay from kept states into omitted ones is redirected to kept[sink]
+    (the ground state by default), so that every kept state retains its
+    full lifetime and the trace is conserved; otherwise a kept state whose
+    decay products were all omitted would turn into a spurious trap.
+
+    Args:
+        gamma (sparse or np.ndarray): Rates Gamma_ab from |b> to |a> (rad/us), (N, N).
+        kept (np.ndarray): Basis as returned by truncate_basis.
+        sink (int): Position within kept receiving the redirected decay.
+
+    Returns:
+        scipy.sparse.csr_matrix: (len(kept), len(kept)) rate matrix.
+    """
+    gamma = sps.csr_matrix(gamma, dtype=float)
+    gamma.setdiag(0.)
+    kept = np.asarray(kept)
+    reduced = gamma[kept][:, kept].tolil()
+    lost = np.asarray(gamma[:, kept].sum(axis=0)).ravel() - np.asarray(reduced.sum(axis=0)).ravel()
+    for b in np.nonzero(lost > 0.)[0]:
+        if b != sink : reduced[sink, b] += lost[b]
+    return reduced.tocsr()
@@ -3,20 +3,228 @@
 Main entry point for the
 RYDBERG MAXWELL-BLOCH project.
 
+Usage:
+    python main.py profile-transitions [--nmax 70] [--lmax 1] [--wavelength 852 509]
+    python main.py eit-spectrum [--rabi-p 0.5 1.0] [--rabi-c 10] [--temperature 0] [--method auto] [--out FILE]
+    python main.py c6 34d2.5 [--via 35p1.5 33f3.5 | --perturbative | --table FILE]
+    python main.py c6-table 30 60 --l 2 --j 2.5 [--mj 2.5 0.5] [--theta 0 0.79] --out FILE
+    python main.py sweep --out DIR [--levels 34d2.5 34d1.5] [--rabi-c 5 10 20]
+    python main.py --profile [--profile-json FILE] <command> ...
+
+Heavy modules (scipy, pandas, matplotlib, ARC) are imported only by the
+subcommands that need them, and the ARC atom is built only upon a cache
+miss, shared by everything in the run.
+
+With --profile (or RYDBERG_MB_PROFILE=1 in the environment) the main stages
+(ARC calls, Liouvillian assembly, linear solves, transition enumeration,
+Doppler and beam averaging) are timed and a summary with call counts and
+cache hit rates is printed at the end of the run.
+
 =============================
 Rev History
 -----------------------------
 
 2024-11-29: Initial creation.
+2026-10-18: Command-line interface with lazy imports.
+2026-10-18: Stage timings and cache hit rates (--profile).
 
 =============================
 
 """
 
-import numpy as np
-import scipy as sp
-import qutip as qt
-import matplotlib
-import matplotlib.pyplot as plt
-import scripts.atom_setup
+import argparse
+
+h_planck = 6.62607e-34          # SI, J / Hz
+
+
+def cmd_profile_transitions(args):
+    from scripts.transition_profiling import build_transition_table, nearest_transitions
+    from classes.classes_arc_cache import shared_atom
+    from fns.fns_rydberg_mb import wavelength_to_frequency
+
+    trans_df, spectral_index = build_transition_table(
+        shared_atom(args.species), args.nmin, args.nmax, args.lmax, args.temperature)
+    print(f'{len(trans_df)} dipole transitions for {args.nmin} <= n <= {args.nmax}, l <= {args.lmax}')
+    for wavelength_nm in args.wavelength:
+        print(f'The top {args.k} nearest transitions to {wavelength_nm} nm are (ranked):')
+        print(nearest_transitions(trans_df, spectral_index, wavelength_to_frequency(wavelength_nm), args.k))
+
+
+def cmd_eit_spectrum(args):
+    import numpy as np
+    from classes.classes_arc_cache import shared_atom
+    from fns.fns_rydberg_mb import parse_spec_state
+
+    cs = shared_atom(args.species)
+    gamma_eg = 2. * np.pi / (1e6 * cs.getStateLifetime(6, 1, 1.5))
+    gamma_re = 2. * np.pi / (1e6 * cs.getStateLifetime(*parse_spec_state(args.level)))
+
+    detune_p = np.linspace(-args.detune_max, args.detune_max, args.n_detune)
+    rabi_p = np.asarray(args.rabi_p)
+    solve_args = (2. * np.pi * detune_p[None, :], 2. * np.pi * args.detune_c,
+                  2. * np.pi * rabi_p[:, None], 2. * np.pi * args.rabi_c, gamma_eg, gamma_re)
+    solve_kwargs = dict(method=args.method, rtol=args.rtol, linewidth_p=2. * np.pi * args.linewidth_p,
+                        linewidth_c=2. * np.pi * args.linewidth_c)
+    if args.temperature > 0.:
+        from fns.fns_doppler import doppler_rho_ge
+        rho_ge = doppler_rho_ge(*solve_args, args.temperature, **solve_kwargs)
+    else:
+        from fns.fns_steady_state import ladder_rho_ge
+        rho_ge = ladder_rho_ge(*solve_args, **solve_kwargs)
+    absorption = np.abs(np.imag(rho_ge))
+
+    columns = np.column_stack([detune_p, absorption.T])
+    header = 'detune_p_mhz ' + ' '.join(f'absorption_rabi_p_{r:g}' for r in rabi_p)
+    if args.out:
+        np.savetxt(args.out, columns, header=header)
+        print(f'Spectrum written to {args.out}')
+    else:
+        import sys
+        np.savetxt(sys.stdout, columns, header=header, fmt='%.6e')
+
+    if args.plot:
+        from fns.fns_instrument import stage
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(6, 4))
+        for r, a in zip(rabi_p, absorption):
+            plt.plot(detune_p, a, label=f'Probe Rabi frequency {r:g} MHz')
+        plt.xlabel("Probe Detuning (MHz)")
+        plt.ylabel("Probe Absorption (arb.)")
+        plt.legend()
+        plt.tight_layout()
+        with stage('plot.save'):
+            plt.savefig(args.plot, dpi=300)
+
+
+def cmd_c6(args):
+    from fns.fns_rydberg_mb import parse_spec_state
+
+    state = parse_spec_state(args.state)
+    mj = args.mj if args.mj is not None else state[2]
+    if args.table:
+        from classes.classes_c6_table import C6Table
+        c6 = C6Table.load(args.table).lookup(state[0], state[1], state[2], mj, args.theta, args.phi)
+        print(f'C6 [{args.state}, mj={mj}] = {c6:.4e} GHz (um)^6 (from {args.table})')
+    elif args.perturbative:
+        from arc import PairStateInteractions
+        from classes.classes_arc_cache import shared_atom
+        calculation = PairStateInteractions(shared_atom(args.species).atom, *state, *state, mj, mj)
+        c6 = calculation.getC6perturbatively(args.theta, args.phi, args.dn, args.delta_max_ghz * 1e9)
+        print(f'C6 [{args.state}, mj={mj}] = {c6:.4e} GHz (um)^6')
+    else:
+        from classes.classes_arc_cache import shared_atom
+        pair = [parse_spec_state(s) for s in args.via]
+        # getC6term returns h Hz m^6
+        c6 = shared_atom(args.species).getC6term(*state, *pair[0], *pair[1]) / h_planck * 1e27
+        print(f'C6 term [{args.state} -> {args.via[0]} + {args.via[1]}] = {c6:.4e} GHz (um)^6')
+
+
+def cmd_c6_table(args):
+    from fns.fns_c6 import c6_table, load_c6_table, save_c6_table
+
+    table = c6_table(range(args.nmin, args.nmax + 1), args.l, args.j, args.mj, args.theta, args.phi,
+                     args.dn, args.delta_max_ghz * 1e9, args.species, args.workers,
+                     existing=load_c6_table(args.out))
+    save_c6_table(args.out, table)
+    print(f'{len(table)} C6 entries in {args.out}')
+
+
+def cmd_sweep(args):
+    import numpy as np
+    from scripts.eit_sweep import run_eit_sweep
+
+    detune_p = np.linspace(-args.detune_max, args.detune_max, args.n_detune)
+    results = run_eit_sweep(args.out, args.levels, args.rabi_p, args.rabi_c, args.detune_c,
+                            args.temperatures, detune_p, n_workers=args.workers,
+                            chunk_size=args.chunk_size)
+    print(f"{results['absorption'].shape[0]} points in {args.out}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Rydberg Maxwell-Bloch tools')
+    parser.add_argument('--species', default='Caesium', help='ARC atom species')
+    parser.add_argument('--profile', action='store_true', help='print stage timings at the end')
+    parser.add_argument('--profile-json', help='also write the stage timings to this JSON file')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('profile-transitions', help='dipole transitions near the laser lines')
+    p.add_argument('--nmin', type=int, default=6)
+    p.add_argument('--nmax', type=int, default=70)
+    p.add_argument('--lmax', type=int, default=1)
+    p.add_argument('--temperature', type=float, default=298., help='for Doppler widths (K)')
+    p.add_argument('--wavelength', type=float, nargs='+', default=[852., 509.], help='(nm)')
+    p.add_argument('-k', type=int, default=5, help='transitions listed per wavelength')
+    p.set_defaults(func=cmd_profile_transitions)
+
+    p = sub.add_parser('eit-spectrum', help='probe absorption of the g-e-r ladder')
+    p.add_argument('--level', default='34d2.5', help='Rydberg level, e.g. 34d2.5')
+    p.add_argument('--rabi-p', type=float, nargs='+', default=[.5, 1.], help='(MHz)')
+    p.add_argument('--rabi-c', type=float, default=10., help='(MHz)')
+    p.add_argument('--detune-c', type=float, default=0., help='(MHz)')
+    p.add_argument('--detune-max', type=float, default=80., help='probe detuning limit (MHz)')
+    p.add_argument('--n-detune', type=int, default=1000)
+    p.add_argument('--temperature', type=float, default=0., help='Doppler averaging if > 0 (K)')
+    p.add_argument('--linewidth-p', type=float, default=0., help='probe laser FWHM (MHz)')
+    p.add_argument('--linewidth-c', type=float, default=0., help='coupling laser FWHM (MHz)')
+    p.add_argument('--method', choices=['auto', 'analytic', 'full'], default='auto',
+                   help='weak-probe closed form where accurate to --rtol (auto), always, or never')
+    p.add_argument('--rtol', type=float, default=1e-3)
+    p.add_argument('--out', help='write the spectrum to this text file')
+    p.add_argument('--plot', help='save a plot to this image file')
+    p.set_defaults(func=cmd_eit_spectrum)
+
+    p = sub.add_parser('c6', help='C6 van der Waals coefficients')
+    p.add_argument('state', help='target state, e.g. 34d2.5')
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument('--via', nargs=2, metavar='STATE', help='single pair-state channel (getC6term)')
+    group.add_argument('--perturbative', action='store_true', help='full perturbative C6 (slow)')
+    group.add_argument('--table', help='interpolate in a table written by c6-table')
+    p.add_argument('--mj', type=float, help='target mj (default j)')
+    p.add_argument('--theta', type=float, default=0.)
+    p.add_argument('--phi', type=float, default=0.)
+    p.add_argument('--dn', type=int, default=5)
+    p.add_argument('--delta-max-ghz', type=float, default=25.)
+    p.set_defaults(func=cmd_c6)
+
+    p = sub.add_parser('c6-table', help='build or extend a C6 table in parallel')
+    p.add_argument('nmin', type=int)
+    p.add_argument('nmax', type=int)
+    p.add_argument('--l', type=int, default=2)
+    p.add_argument('--j', type=float, default=2.5)
+    p.add_argument('--mj', type=float, nargs='+', help='projections (default j)')
+    p.add_argument('--theta', type=float, nargs='+', default=[0.], help='(rad)')
+    p.add_argument('--phi', type=float, nargs='+', default=[0.], help='(rad)')
+    p.add_argument('--dn', type=int, default=5)
+    p.add_argument('--delta-max-ghz', type=float, default=25.)
+    p.add_argument('--workers', type=int, help='worker processes (default: all cores)')
+    p.add_argument('--out', required=True, help='table file (.npy), extended if it exists')
+    p.set_defaults(func=cmd_c6_table)
+
+    p = sub.add_parser('sweep', help='checkpointed parallel EIT parameter sweep')
+    p.add_argument('--out', required=True, help='checkpoint directory (rerun to resume)')
+    p.add_argument('--levels', nargs='+', default=['34d2.5'])
+    p.add_argument('--rabi-p', type=float, nargs='+', default=[.5], help='(MHz)')
+    p.add_argument('--rabi-c', type=float, nargs='+', default=[10.], help='(MHz)')
+    p.add_argument('--detune-c', type=float, nargs='+', default=[0.], help='(MHz)')
+    p.add_argument('--temperatures', type=float, nargs='+', default=[0.], help='(K)')
+    p.add_argument('--detune-max', type=float, default=80., help='(MHz)')
+    p.add_argument('--n-detune', type=int, default=401)
+    p.add_argument('--workers', type=int, help='worker processes (default: all cores)')
+    p.add_argument('--chunk-size', type=int, default=2048)
+    p.set_defaults(func=cmd_sweep)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile or args.profile_json:
+        from fns.fns_instrument import enable, report_at_exit
+        enable()
+        report_at_exit(args.profile_json)
+    args.func(args)
+
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+
+Regression check of the laser admixture estimate
+
+Compares laser_admixtures, used by truncate_basis to decide which
+laser-coupled states to keep, with the exact steady-state excited
+population of a driven two-level system with a stable lower state,
+    rho_ee = (Omega/2)**2 / (Delta**2 + (Gamma/2)**2 + Omega**2 / 2),
+over a range of detunings and decay rates. In the weak-driving limit the
+two agree up to the saturation term Omega**2 / 2. Exits with a non-zero
+status if the relative deviation exceeds the given tolerance.
+
+Usage:
+    python scripts/admixture_check.py [--rtol 0.05]
+
+"""
+
+import argparse
+
+import numpy as np
+
+# Append parent to path for resolving imports in adjacent folders
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Imports from adjacent folders
+from fns.fns_liouvillian import liouvillian, projector
+from fns.fns_steady_state import steady_state
+from fns.fns_truncation import laser_admixtures
+
+
+def two_level_rho_ee(rabi: float, detuning: float, gamma: float) -> float:
+    """
+    Exact steady-state population of |e> for a laser driving |g> -> |e>,
+    with |e> decaying to |g> at the rate gamma (rad/us).
+    """
+    ham = -detuning * projector(2, 1) + .5 * rabi * (projector(2, 0, 1) + projector(2, 1, 0))
+    rho = steady_state(liouvillian(ham, [np.sqrt(gamma) * projector(2, 0, 1)])[None])[0]
+    return rho[1, 1].real
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Laser admixture estimate vs exact two-level populations')
+    parser.add_argument('--rtol', type=float, default=.05, help='largest accepted relative deviation')
+    args = parser.parse_args()
+
+    worst = 0.
+    print(f"{'Gamma':>8}{'Omega':>8}{'Delta':>8}{'exact':>13}{'estimate':>13}{'rel. dev.':>11}")
+    for gamma in (10., 1.):
+        for rabi in (.01 * gamma, .1 * gamma):
+            for detuning in (0., .3 * gamma, 3. * gamma):
+                exact = two_level_rho_ee(rabi, detuning, gamma)
+                estimate = laser_admixtures([0], [1], [rabi], [detuning], np.array([0., gamma]))[0, 1]
+                dev = abs(estimate / exact - 1.)
+                worst = max(worst, dev)
+                print(f'{gamma:>8g}{rabi:>8g}{detuning:>8g}{exact:>13.4e}{estimate:>13.4e}{dev:>11.4f}')
+    print(f'\nLargest relative deviation {worst:.4f} (limit {args.rtol:g})')
+    sys.exit(0 if worst <= args.rtol else 1)
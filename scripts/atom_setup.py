@@ -1,9 +1,13 @@
 """ Sets up a Rydberg atom """
 
-from arc import Cesium, PairStateInteractions
+# Append parent to path for resolving imports in adjacent folders
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# Define the Cesium atom
-cs = Cesium()
+from classes.classes_arc_cache import shared_atom
+
+h_planck = 6.62607e-34          # SI, J / Hz
 
 # Define the principal quantum number and state
 n = 34
@@ -14,8 +18,17 @@ mj2 = .5
 
 state34d5o2 = (n, l, j)
 
-# Compute the van der Waals coefficient (C6)
-C6_coefficient = cs.getC6term(*state34d5o2, *state34d5o2, *state34d5o2)
 
-# Print the result
-print(f"C6 coefficient for Cs(34D5/2) pair-state: {C6_coefficient:.2e} GHz (µm)^6")
+def main():
+    # Define the Cesium atom (cached on disk across runs)
+    cs = shared_atom('Caesium')
+
+    # Compute the van der Waals coefficient (C6); getC6term returns h Hz m^6
+    C6_coefficient = cs.getC6term(*state34d5o2, *state34d5o2, *state34d5o2) / h_planck * 1e27
+
+    # Print the result
+    print(f"C6 coefficient for Cs(34D5/2) pair-state: {C6_coefficient:.2e} GHz (µm)^6")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+
+Checkpointed multi-dimensional EIT parameter sweep
+
+Scans probe absorption over probe/coupling Rabi frequencies, probe and
+coupling detunings, vapour temperature and Rydberg level, replacing the
+hand-edited config block of exercises/eit_plots.py. Chunks are spread
+over all cores and written to OUT_DIR as they finish; rerunning the
+script resumes an interrupted sweep.
+
+"""
+
+import numpy as np
+
+# Append parent to path for resolving imports in adjacent folders
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Imports from adjacent folders
+from fns.fns_sweep import parameter_grid, run_sweep, load_sweep
+from fns.fns_steady_state import ladder_rho_ge
+from fns.fns_doppler import doppler_rho_ge
+from fns.fns_rydberg_mb import parse_spec_state
+
+
+def eit_chunk(chunk: dict, gamma_eg: float, gamma_re: dict) -> dict:
+    """
+    Probe coherence for one chunk of sweep points, solved in one batch per
+    (Rydberg level, temperature) pair present in the chunk.
+
+    Args:
+        chunk (dict): Columns rabi_p, rabi_c, detune_p, detune_c (MHz),
+                      t_kelvin (K; 0 disables Doppler averaging) and level
+                      (spectroscopic string, e.g. '34d2.5').
+        gamma_eg (float): Decay rate from |e> to |g> (rad/us).
+        gamma_re (dict): Level string -> decay rate from |r> to |e> (rad/us).
+
+    Returns:
+        dict: 'rho_ge' (complex) and 'absorption' (|Im rho_ge|) per point.
+    """
+    omega_p, omega_c = 2. * np.pi * chunk['rabi_p'], 2. * np.pi * chunk['rabi_c']
+    delta_p, delta_c = 2. * np.pi * chunk['detune_p'], 2. * np.pi * chunk['detune_c']
+    rho_ge = np.empty(omega_p.shape, dtype=complex)
+    groups = np.stack([chunk['level'], chunk['t_kelvin'].astype(str)], axis=1)
+    for level, t_str in np.unique(groups, axis=0):
+        sel = (chunk['level'] == level) & (chunk['t_kelvin'] == float(t_str))
+        args = (delta_p[sel], delta_c[sel], omega_p[sel], omega_c[sel], gamma_eg, gamma_re[level])
+        rho_ge[sel] = doppler_rho_ge(*args, float(t_str)) if float(t_str) > 0. else ladder_rho_ge(*args)
+    return {'rho_ge' : rho_ge, 'absorption' : np.abs(rho_ge.imag)}
+
+
+def run_eit_sweep(out_dir: str, levels, rabi_p, rabi_c, detune_c, temperatures, detune_p,
+                  n_workers: int = None, chunk_size: int = 2048, atom=None) -> dict:
+    """
+    Run (or resume) a checkpointed EIT sweep over the outer product of the
+    given axes (see eit_chunk for units) and load its results.
+
+    Args:
+        out_dir (str): Checkpoint directory.
+        levels (list): Rydberg level strings, e.g. ['34d2.5', '34d1.5'].
+        rabi_p, rabi_c, detune_c, temperatures, detune_p: Axis values.
+        n_workers (int): Worker processes; None uses all cores.
+        chunk_size (int): Points per chunk.
+        atom (CachedAtom): Atom for the decay rates; defaults to the shared one.
+
+    Returns:
+        dict: Columns of the completed sweep (see load_sweep).
+    """
+    from classes.classes_arc_cache import shared_atom
+
+    # Decay rates looked up once here rather than in every worker
+    cs = atom if atom is not None else shared_atom('Caesium')
+    gamma_eg = 2. * np.pi / (1e6 * cs.getStateLifetime(6, 1, 1.5))
+    gamma_re = {lvl: 2. * np.pi / (1e6 * cs.getStateLifetime(*parse_spec_state(lvl))) for lvl in levels}
+    cs.flush()
+
+    grid = parameter_grid(level=levels, t_kelvin=temperatures, rabi_p=rabi_p, rabi_c=rabi_c,
+                          detune_c=detune_c, detune_p=detune_p)
+    run_sweep(eit_chunk, grid, out_dir, chunk_size=chunk_size, n_workers=n_workers,
+              constants={'gamma_eg' : gamma_eg, 'gamma_re' : gamma_re})
+    return load_sweep(out_dir)
+
+
+if __name__ == '__main__':
+
+    # User config entries:
+    OUT_DIR = 'eit_sweep_out'
+    levels = ['34d2.5', '34d1.5']                   # Rydberg levels
+    rabi_p = [0.5, 1.0]                             # Probe Rabi frequencies (MHz)
+    rabi_c = [5., 10., 20.]                         # Coupling Rabi frequencies (MHz)
+    detune_c = [0., 5.]                             # Coupling detunings (MHz)
+    temperatures = [0., 298.]                       # Vapour temperatures (K)
+    detune_p = np.linspace(-80., 80., 401)          # Probe detunings (MHz)
+
+    results = run_eit_sweep(OUT_DIR, levels, rabi_p, rabi_c, detune_c, temperatures, detune_p)
+    print(f"{results['absorption'].shape[0]} points in {OUT_DIR}")
@@ -0,0 +1,94 @@
+"""
+
+Regression check of the laser-noise trajectories
+
+Propagates the g-e-r ladder with white frequency noise on both lasers by
+stochastic_rho, both undriven from a g-e superposition (pure dephasing)
+and driven, and compares the trajectory average of rho_ge(t) with the
+deterministic evolution of AffineLiouvillian.ladder(linewidths=True), whose
+Lorentzian linewidths the white noise should reproduce exactly. Exits with
+a non-zero status if any point deviates by more than the given number of
+standard errors.
+
+Usage:
+    python scripts/phase_noise_check.py [--n-traj 20000] [--max-sigma 4]
+
+"""
+
+import argparse
+
+import numpy as np
+
+# Append parent to path for resolving imports in adjacent folders
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Imports from adjacent folders
+from classes.classes_affine_liouvillian import AffineLiouvillian
+from fns.fns_evolution import evolve_batch
+from fns.fns_phase_noise import stochastic_rho, white_frequency_noise
+
+
+def dephasing_deviation(case: str, n_traj: int, seed: int = 0) -> tuple:
+    """
+    Trajectory average against the Lindblad linewidth model.
+
+    Args:
+        case (str): 'free' for the pure dephasing of an undriven g-e
+                    superposition, rho_ge(t) = exp(-linewidth_p t / 2) / 2,
+                    or 'driven' for the driven ladder with noise on both lasers.
+        n_traj (int): Number of noise realizations.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        tuple: (times, mean, stderr, reference), rho_ge(t) of the noisy
+               trajectories, its standard error and that of the linewidth model.
+    """
+    linewidth_p = 2. * np.pi * 1.               # rad/us
+    linewidth_c = 2. * np.pi * .5               # rad/us
+    times = np.linspace(0., 1., 21)             # us
+    if case == 'free':
+        gamma_eg, gamma_re = 0., 0.
+        params = {'delta_p': 0., 'delta_c': 0., 'omega_p': 0., 'omega_c': 0.}
+        rho0 = np.zeros((3, 3), dtype=complex)
+        rho0[:2, :2] = .5
+    else:
+        gamma_eg = 2. * np.pi * 5.2             # rad/us
+        gamma_re = 2. * np.pi * .1              # rad/us
+        params = {'delta_p': 2. * np.pi * 1., 'delta_c': 0., 'omega_p': 2. * np.pi * 2.,
+                  'omega_c': 2. * np.pi * 5.}
+        rho0 = None
+
+    mean, stderr = stochastic_rho(
+        AffineLiouvillian.ladder(gamma_eg, gamma_re), times, (1, 0),
+        {'delta_p': white_frequency_noise(linewidth_p), 'delta_c': white_frequency_noise(linewidth_c)},
+        n_traj, n_substeps=10, rho0=rho0, rng=np.random.default_rng(seed), **params)
+    reference = evolve_batch(
+        AffineLiouvillian.ladder(gamma_eg, gamma_re, linewidths=True), times, {'rho_ge': (1, 0)},
+        rho0=rho0, method='expm', n_substeps=10, linewidth_p=linewidth_p, linewidth_c=linewidth_c,
+        **params)['rho_ge']
+    return times, mean, stderr, reference
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Laser-noise trajectories vs Lorentzian linewidths')
+    parser.add_argument('--n-traj', type=int, default=20000)
+    parser.add_argument('--max-sigma', type=float, default=4., help='largest accepted deviation (standard errors)')
+    args = parser.parse_args()
+
+    worst = 0.
+    for case in ('free', 'driven'):
+        times, mean, stderr, reference = dephasing_deviation(case, args.n_traj)
+        # Real and imaginary parts are compared separately against the error of |rho_ge|
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigmas = np.maximum(np.abs((mean - reference).real), np.abs((mean - reference).imag)) / stderr
+        sigmas[0] = 0.
+        print(f"\n{case}\n{'t (us)':>8}{'Re trajectories':>18}{'Re linewidth':>15}{'Im trajectories':>18}"
+              f"{'Im linewidth':>15}{'deviation (sigma)':>20}")
+        for t, m, r, s in zip(times, mean, reference, sigmas):
+            print(f'{t:>8.2f}{m.real:>18.5f}{r.real:>15.5f}{m.imag:>18.5f}{r.imag:>15.5f}{s:>20.2f}')
+        worst = max(worst, np.max(sigmas))
+    print(f'\nLargest deviation {worst:.2f} standard errors (limit {args.max_sigma:g})')
+    sys.exit(0 if worst <= args.max_sigma else 1)
@@ -32,11 +32,7 @@ Gamma in us^-1 (note not referred to as MHz, since appears as coeff in diff eq)
 
 # Generic imports
 import numpy as np
-from matplotlib import pyplot as plt
-from arc import *
-from itertools import product
 import pandas as pd
-import time
 
 # Append parent to path for resolving imports in adjacent folders
 import sys
@@ -46,8 +42,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # Imports from adjacent folders
 from fns.fns_rydberg_mb import *
 from classes.classes_rydberg_mb import *
-
-pd.set_option('display.max_rows', None)
+from fns.fns_transitions import dipole_transitions
+from fns.fns_rates import spontaneous_rates, blackbody_occupation
+from classes.classes_arc_cache import shared_atom
+from classes.classes_spectral_index import SpectralIndex
+from fns.fns_instrument import stage
 
 # Sim size
 nmin = 6  # Minimum n
@@ -69,132 +68,165 @@ m_kg = 2.21e-25                 # Mass of caesium atom in kg
 joules_to_mhz = 1e-6 / h_planck
 ev_to_mhz = e_coulomb * joules_to_mhz
 ea0_to_mhz_v_m = e_coulomb * a0_metres * joules_to_mhz
-v_fwhm = 1.177 * np.sqrt(2. * k_boltz * t_kelvin / m_kg) 
-
-# Load parameters for Caesium
-atom = Caesium()
-
-""" ASSEMBLE THE ENERGY LEVELS
-Pull energy levels from the ARC database
- and append to a dictionary with key elts
- corresponding to state strings
-
-"""
-
-""" DIAGNOSTICS """
 
-state_a = (6, 1, 1.5, .5)
-state_b = (6, 2, 1.5, -.5)
-print('This transition has dip ')
-print(atom.getDipoleMatrixElement(*state_a, *state_b, -1) * ea0_to_mhz_v_m)
 
+def build_transition_table(atom, nmin: int, nmax: int, lmax: int, t_kelvin: float = t_kelvin) -> tuple:
+    """
+    Assemble a dataframe of the dipole transitions among the (n, l, j, mj)
+    states with nmin <= n <= nmax and l <= lmax, indexed by the tuple
+    (n_a, l_a, j_a, mj_a, n_b, l_b, j_b, mj_b), including:
+        'delta' : energy in MHz
+        'dip' : dipole elt in MHz/(V/m)
+        'dip-type' : polarization q
+        'gamma' : spontaneous rate in us^-1
+        'gamma-bbr' : blackbody-stimulated rate at t_kelvin in us^-1
+        'lwid' : natural linewidth in MHz
+        'doppler' : Doppler fwhm in MHz
+        'id-a', 'id-b' : StateTable ids of both states
+
+    Args:
+        atom (CachedAtom): Atom supplying energies and dipole elements.
+        nmin (int): Minimum n.
+        nmax (int): Maximum n.
+        lmax (int): Maximum l.
+        t_kelvin (float): Temperature for the Doppler widths and blackbody rates (K).
+
+    Returns:
+        tuple: (trans_df, spectral_index), the latter a SpectralIndex over
+               the 'delta' column for nearest-transition queries. The
+               decay matrix of the state table follows as
+               rate_matrix(trans_df['id-a'], trans_df['id-b'],
+               trans_df['delta'], trans_df['dip'], n_states, t_kelvin).
+    """
+    v_fwhm = 1.177 * np.sqrt(2. * k_boltz * t_kelvin / m_kg)
+
+    # Pull energy levels from the ARC database into an array indexed by level id
+    states = StateTable.from_range(nmin, nmax, lmax)
+    levels, level_ids = states.levels()
+    with stage('transitions.energies'):
+        level_energies = np.array([atom.getEnergy(*this_level) for this_level in levels]) * ev_to_mhz
+
+    # Only dipole permitted transitions (l_a < l_b to avoid double counting)
+    trans_arr = dipole_transitions(nmin, nmax, lmax)
+    ids_a, ids_b = states.transition_ids(trans_arr)
+    delta_arr = level_energies[level_ids[ids_b]] - level_energies[level_ids[ids_a]]
+
+    # The dipole elements are the only per-transition (cached) ARC calls;
+    #  all derived quantities are array operations
+    trans_list = trans_arr.tolist()
+    with stage('transitions.dipoles'):
+        dip_arr = np.array([atom.getDipoleMatrixElement(*trans[:4], *trans[4:8], trans[8])
+                            for trans in trans_list]) * ea0_to_mhz_v_m
+    gamma_arr = spontaneous_rates(delta_arr, dip_arr)
+    index_list = [tuple(trans[:8]) for trans in trans_list]
+    trans_df = pd.DataFrame({
+        'delta' : delta_arr,
+        'dip' : dip_arr,
+        'dip-type' : trans_arr['dip_type'],
+        'gamma' : gamma_arr,
+        'gamma-bbr' : gamma_arr * blackbody_occupation(delta_arr, t_kelvin),
+        'lwid' : gamma_arr / (2. * np.pi),
+        'doppler' : delta_arr * v_fwhm / c_light,
+        'id-a' : ids_a,
+        'id-b' : ids_b}, index=index_list)
+
+    # Transition frequencies are sorted once into a spectral index,
+    #  such that each nearest-transition query is a binary search
+    spectral_index = SpectralIndex(trans_df['delta'].to_numpy(), ids_a, ids_b)
+    return trans_df, spectral_index
+
+
+def nearest_transitions(trans_df, spectral_index, ref_delta, k=5):
+    """ The k transitions nearest in frequency to ref_delta (MHz), ranked. """
+    rows, diffs = spectral_index.nearest(ref_delta, k)
+    return pd.DataFrame(diffs, index=trans_df.index[rows], columns=['trans_diff'])
+
+
+def main():
+    from matplotlib import pyplot as plt
+
+    pd.set_option('display.max_rows', None)
+
+    # Load parameters for Caesium (cached on disk across runs)
+    atom = shared_atom('Caesium')
+
+    """ DIAGNOSTICS """
+
+    state_a = (6, 1, 1.5, .5)
+    state_b = (6, 2, 1.5, -.5)
+    print('This transition has dip ')
+    print(atom.getDipoleMatrixElement(*state_a, *state_b, -1) * ea0_to_mhz_v_m)
+
+    print('Assembling energy levels and transitions...')
+    trans_df, spectral_index = build_transition_table(atom, nmin, nmax, lmax)
+
+    trans_lvls = np.arange(7,71)
+    trans_rates = np.empty(trans_lvls.shape[0], dtype=float)
+    trans_dips = np.empty(trans_lvls.shape[0], dtype=float)
+    trans_deltas = np.empty(trans_lvls.shape[0], dtype=float)
+    for id, top_lvl in enumerate(trans_lvls):
+        trans_tuple = (6, 0, 0.5, 0.5, top_lvl, 1, 1.5, 0.5)
+        trans_rates[id] = trans_df.at[trans_tuple, 'gamma']
+        trans_dips[id] = trans_df.at[trans_tuple, 'dip']
+        trans_deltas[id] = trans_df.at[trans_tuple, 'delta']
+
+    plt.cla()
+    plt.loglog(trans_lvls, trans_rates)
+    plt.title('Transition rates to ground vs principal')
+    plt.show()
+
+    plt.cla()
+    plt.loglog(trans_lvls, np.abs(trans_dips))
+    plt.title('Transition dipoles to ground vs principal')
+    plt.show()
+
+    plt.cla()
+    plt.loglog(trans_lvls, trans_deltas)
+    plt.title('Transition deltas to ground vs principal')
+    plt.show()
+
+
+    # plt.cla()
+    # print('Plotting the spontaneous emission rates...')
+    # gamma_vals = trans_df['gamma'].to_numpy()
+    # plt.scatter(range(gamma_vals.shape[0]),gamma_vals)
+    # plt.show()
+
+
+    print('The 6p3/2 to 34d5/2 transition Doppler broadening fwhm is ')
+    print(trans_df.at[(6,1,1.5,34,2,2.5), 'doppler'])
+
+    """ NEAREST-TRANSITION QUERIES
+
+    Transition frequencies are sorted once into a spectral index,
+     such that each query below is a binary search.
+
+    """
+
+    print('The 6s1/2 to 6p3/2 wavelength is ')
+    print(frequency_to_wavelength(trans_df.at[(6,0,0.5,6,1,1.5), 'delta']))
+    print('The top five nearest deviations from 6s1/2--6p3/2 are (ranked):')
+    ref_delta = trans_df.at[(6,0,0.5,6,1,1.5), 'delta']
+    print(nearest_transitions(trans_df, spectral_index, ref_delta))
+    print('-')
+
+    print('The 6p3/2 to 34d5/2 wavelength is ')
+    print(frequency_to_wavelength(trans_df.at[(6,1,1.5,34,2,2.5), 'delta']))
+    print('The top five nearest deviations from 6p3/2--34d5/2 are (ranked):')
+    ref_delta = trans_df.at[(6,1,1.5,34,2,2.5), 'delta']
+    print(nearest_transitions(trans_df, spectral_index, ref_delta))
+    print('-')
+
+    print('The top five nearest transitions to 852 nm are (ranked):')
+    ref_delta = wavelength_to_frequency(852)
+    print(nearest_transitions(trans_df, spectral_index, ref_delta))
+    print('-')
 
+    print('The top five nearest transitions to 509 nm are (ranked):')
+    ref_delta = wavelength_to_frequency(509)
+    print(nearest_transitions(trans_df, spectral_index, ref_delta))
+    print('-')
 
-print('Assembling energy levels...')
-levels_list = []
-index_list = []
-for this_state in AtomicNLJMIterator(nmin, nmax, lmax, iter_mj=False):
-    this_energy = atom.getEnergy(*this_state) * ev_to_mhz
-    levels_list.append({'energy':this_energy})
-    index_list.append(this_state)
-    
-levels_df = pd.DataFrame(levels_list, index=index_list)
-
-
-""" ASSEMBLE TRANSITIONS
-
-Assemble a dataframe of the transitions,
- indexed by 'spec_name_a-spec_name_b',
- including:
-    'energy' : energy in MHz
-    'dip' : dipole elt in MHz/(V/m)
-
-"""
 
-print('Assembling transitions...')
-trans_list = []
-index_list = []
-for state_a in AtomicNLJMIterator(nmin,nmax,lmax):
-    for state_b in AtomicNLJMIterator(nmin,nmax,lmax):
-        dip_valid, dip_type = dip_trans_type(state_a, state_b)
-        if not dip_valid : continue     # Store only dipole permitted transitions
-        if state_b[1] <= state_a[1] : continue      # l1 < l2 to avoid double counting
-        dip_mhz_v_m = atom.getDipoleMatrixElement(*state_a, *state_b, dip_type) * ea0_to_mhz_v_m
-        delta_mhz = levels_df.at[state_b[:3], 'energy'] - levels_df.at[state_a[:3], 'energy']
-        omega_si = delta_mhz * 1e6 * 2. * np.pi
-        dip_si = dip_mhz_v_m / joules_to_mhz
-        gamma_us = 1e-6 * abs(
-            omega_si ** 3 * dip_si ** 2
-            / (3. * np.pi * eps0_si * hbar_planck * c_light ** 3))
-        lwid_mhz = gamma_us / (2. * np.pi)
-        doppler_mhz = delta_mhz * v_fwhm / c_light
-        trans_tuple = (*state_a, *state_b)
-        trans_list.append({
-            'delta' : delta_mhz,
-            'dip' : dip_mhz_v_m,
-            'dip-type' : dip_type,
-            'gamma' : gamma_us,
-            'lwid' : lwid_mhz,
-            'doppler' : doppler_mhz})
-        index_list.append(trans_tuple)
-trans_df = pd.DataFrame(trans_list, index=index_list)
-
-trans_lvls = np.arange(7,71)
-trans_rates = np.empty(trans_lvls.shape[0], dtype=float)
-trans_dips = np.empty(trans_lvls.shape[0], dtype=float)
-trans_deltas = np.empty(trans_lvls.shape[0], dtype=float)
-for id, top_lvl in enumerate(trans_lvls):
-    trans_tuple = (6, 0, 0.5, 0.5, top_lvl, 1, 1.5, 0.5)
-    trans_rates[id] = trans_df.at[trans_tuple, 'gamma']
-    trans_dips[id] = trans_df.at[trans_tuple, 'dip']
-    trans_deltas[id] = trans_df.at[trans_tuple, 'delta']
-
-plt.cla()
-plt.loglog(trans_lvls, trans_rates)
-plt.title('Transition rates to ground vs principal')
-plt.show()
-
-plt.cla()
-plt.loglog(trans_lvls, np.abs(trans_dips))
-plt.title('Transition dipoles to ground vs principal')
-plt.show()
-
-plt.cla()
-plt.loglog(trans_lvls, trans_deltas)
-plt.title('Transition deltas to ground vs principal')
-plt.show()
-
-
-# plt.cla()
-# print('Plotting the spontaneous emission rates...')
-# gamma_vals = trans_df['gamma'].to_numpy()
-# plt.scatter(range(gamma_vals.shape[0]),gamma_vals)
-# plt.show()
-
-
-print('The 6p3/2 to 34d5/2 transition Doppler broadening fwhm is ')
-print(trans_df.at[(6,1,1.5,34,2,2.5), 'doppler'])
-
-print('The 6s1/2 to 6p3/2 wavelength is ')
-print(frequency_to_wavelength(trans_df.at[(6,0,0.5,6,1,1.5), 'delta']))
-print('The top five nearest deviations from 6s1/2--6p3/2 are (ranked):')
-ref_delta = trans_df.at[(6,0,0.5,6,1,1.5), 'delta']
-print(compare_transitions(ref_delta, trans_df).head())
-print('-')
-
-print('The 6p3/2 to 34d5/2 wavelength is ')
-print(frequency_to_wavelength(trans_df.at[(6,1,1.5,34,2,2.5), 'delta']))
-print('The top five nearest deviations from 6p3/2--34d5/2 are (ranked):')
-ref_delta = trans_df.at[(6,1,1.5,34,2,2.5), 'delta']
-print(compare_transitions(ref_delta, trans_df).head())
-print('-')
-
-print('The top five nearest transitions to 852 nm are (ranked):')
-ref_delta = wavelength_to_frequency(852)
-print(compare_transitions(ref_delta, trans_df).head())
-print('-')
-
-print('The top five nearest transitions to 509 nm are (ranked):')
-ref_delta = wavelength_to_frequency(509)
-print(compare_transitions(ref_delta, trans_df).head())
-print('-')
+if __name__ == '__main__':
+    main()